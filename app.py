@@ -54,6 +54,7 @@ st.markdown("Ask questions about your documents!")
 
 # Get API URL from secrets or fallback to localhost
 API_URL = st.secrets.get("BACKEND_API_URL", "http://localhost:8000/chat")
+STREAM_API_URL = st.secrets.get("BACKEND_STREAM_URL", f"{API_URL.rstrip('/')}/stream")
 
 # Function to send message to MCP server
 def send_message(message):
@@ -82,6 +83,40 @@ def send_message(message):
         logging.exception("Unexpected error occurred")
         return f"Error: {str(e)}"
 
+# Function to stream a reply token by token from the /chat/stream endpoint
+def stream_message(message):
+    try:
+        logging.debug(f"Streaming message: {message}")
+        with requests.post(STREAM_API_URL, json={"text": message}, stream=True) as response:
+            logging.debug(f"Response status: {response.status_code}")
+            if response.status_code != 200:
+                try:
+                    error_detail = response.json().get("detail", "Unknown error")
+                except json.JSONDecodeError:
+                    error_detail = response.text  # fallback to raw text
+                yield f"Error: Server returned status code {response.status_code}\nDetails: {error_detail}"
+                return
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                event = json.loads(line[len("data:"):])
+                if "token" in event:
+                    yield event["token"]
+                elif "error" in event:
+                    yield f"\nError: {event['error']}"
+    except requests.exceptions.ConnectionError:
+        yield f"Error: Could not connect to the server at {STREAM_API_URL}. Please check if it's running."
+    except Exception as e:
+        logging.exception("Unexpected error occurred")
+        yield f"Error: {str(e)}"
+
+def render_assistant_message(placeholder, text):
+    placeholder.markdown(f"""
+    <div class="message-box">
+        <strong>Assistant:</strong><br>{html.escape(text)}
+    </div>
+    """, unsafe_allow_html=True)
+
 # Input and button
 user_input = st.text_input("Your question:", placeholder="Type your question here...")
 send_button = st.button("Send")
@@ -95,12 +130,13 @@ if send_button and user_input:
     </div>
     """, unsafe_allow_html=True)
 
-    # Get response and display immediately
+    # Render the response as tokens arrive
+    placeholder = st.empty()
+    response = ""
     with st.spinner("Thinking..."):
-        response = send_message(user_input)
+        for token in stream_message(user_input):
+            response += token
+            render_assistant_message(placeholder, response)
 
-    st.markdown(f"""
-    <div class="message-box">
-        <strong>Assistant:</strong><br>{html.escape(response)}
-    </div>
-    """, unsafe_allow_html=True)
+    if not response:
+        render_assistant_message(placeholder, send_message(user_input))
@@ -0,0 +1,80 @@
+import argparse
+import time
+
+import numpy as np
+import yaml
+
+from faiss_index import build_index, set_search_params
+
+# (index_type, build params, search params to sweep)
+DEFAULT_CONFIGS = [
+    ("ivf", {"nlist": 1024}, [{"nprobe": n} for n in (1, 4, 16, 64)]),
+    ("ivfpq", {"nlist": 1024, "pq_m": 16, "pq_nbits": 8}, [{"nprobe": n} for n in (4, 16, 64)]),
+    ("hnsw", {"hnsw_m": 32, "ef_construction": 200}, [{"ef_search": n} for n in (16, 64, 256)]),
+    ("pq", {"pq_m": 16, "pq_nbits": 8}, [{}]),
+]
+
+
+def search_latencies(index, queries: np.ndarray, k: int):
+    """Search one query at a time, as the server does, and time each call."""
+    latencies = []
+    results = np.empty((len(queries), k), dtype=np.int64)
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        _, positions = index.search(query.reshape(1, -1), k)
+        latencies.append(time.perf_counter() - start)
+        results[i] = positions[0]
+    return results, np.array(latencies) * 1000
+
+
+def recall_at_k(results: np.ndarray, ground_truth: np.ndarray) -> float:
+    hits = sum(len(set(found) & set(truth)) for found, truth in zip(results, ground_truth))
+    return hits / ground_truth.size
+
+
+def run_benchmark(vectors: np.ndarray, num_queries: int, k: int, seed: int):
+    # Hold the query chunks out of the index so they don't trivially find themselves
+    rng = np.random.default_rng(seed)
+    query_rows = rng.choice(len(vectors), size=min(num_queries, len(vectors) // 10), replace=False)
+    mask = np.ones(len(vectors), dtype=bool)
+    mask[query_rows] = False
+    corpus, queries = vectors[mask], vectors[query_rows]
+    print(f"Corpus: {len(corpus)} vectors, {len(queries)} held-out queries, k={k}\n")
+
+    flat = build_index(corpus, "flat")
+    ground_truth, flat_latencies = search_latencies(flat, queries, k)
+
+    print(f"{'index':<8} {'params':<44} {'build s':>8} {'recall':>7} {'p50 ms':>8} {'p95 ms':>8}")
+    print(f"{'flat':<8} {'':<44} {'-':>8} {1.0:>7.3f} "
+          f"{np.percentile(flat_latencies, 50):>8.3f} {np.percentile(flat_latencies, 95):>8.3f}")
+
+    for index_type, build_params, sweep in DEFAULT_CONFIGS:
+        start = time.perf_counter()
+        try:
+            index = build_index(corpus, index_type, **build_params)
+        except Exception as e:
+            print(f"{index_type:<8} skipped: {str(e)}")
+            continue
+        build_time = time.perf_counter() - start
+
+        for search_params in sweep:
+            set_search_params(index, **search_params)
+            results, latencies = search_latencies(index, queries, k)
+            params = ", ".join(f"{key}={value}" for key, value in {**build_params, **search_params}.items())
+            print(f"{index_type:<8} {params:<44} {build_time:>8.1f} {recall_at_k(results, ground_truth):>7.3f} "
+                  f"{np.percentile(latencies, 50):>8.3f} {np.percentile(latencies, 95):>8.3f}")
+
+
+if __name__ == "__main__":
+    with open("mcp/mcp.yaml", "r") as f:
+        config = yaml.safe_load(f)
+
+    parser = argparse.ArgumentParser(description="Recall vs latency of FAISS ANN indexes against exact search")
+    parser.add_argument("--vectors", default=f"{config['vector_store']['path']}/vectors.npy",
+                        help="Chunk embeddings written by process_documents.py with a local vector store")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    run_benchmark(np.load(args.vectors), args.queries, args.k, args.seed)
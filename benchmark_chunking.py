@@ -0,0 +1,103 @@
+import argparse
+import json
+import os
+import random
+import re
+import time
+
+import numpy as np
+
+from chunking import CHUNKING_STRATEGIES, create_chunker, tokenizer_token_counts
+from embeddings import load_embedding_model
+from process_documents import config, extract_text
+
+_SENTENCE = re.compile(r"[^.!?\n]{40,300}[.!?]")
+
+
+def normalize_space(text: str) -> str:
+    return " ".join(text.split())
+
+
+def load_documents(directories: list) -> dict:
+    documents = {}
+    for directory in directories:
+        for root, _, files in os.walk(directory):
+            for file in files:
+                if file.lower().endswith(('.pdf', '.txt')):
+                    path, text = extract_text(os.path.join(root, file))
+                    if text:
+                        documents[path] = text
+    return documents
+
+
+def sample_queries(documents: dict, limit: int, seed: int) -> list:
+    """Use sentences from the corpus as queries; a hit is a retrieved chunk containing the whole sentence.
+
+    This measures what the chunkers change: whether a passage survives intact
+    in a chunk that still ranks for it.
+    """
+    candidates = [
+        {"query": normalize_space(match.group(0)), "answer": normalize_space(match.group(0))}
+        for text in documents.values() for match in _SENTENCE.finditer(text)
+    ]
+    random.Random(seed).shuffle(candidates)
+    return candidates[:limit]
+
+
+def run_benchmark(model, documents: dict, queries: list, strategies: list, k: int, batch_size: int):
+    count_tokens = tokenizer_token_counts(model.tokenizer)
+    query_vectors = np.asarray(model.encode([q["query"] for q in queries], batch_size=batch_size,
+                                            normalize_embeddings=True), dtype=np.float32)
+    print(f"{len(documents)} documents, {len(queries)} queries, k={k}\n")
+
+    print(f"{'strategy':<26} {'chunks':>7} {'tokens':>9} {'truncated':>9} {'encode s':>9} {f'recall@{k}':>9}")
+    for strategy in strategies:
+        chunker = create_chunker({**config.get("chunking", {}), "strategy": strategy}, model)
+        chunks = [chunk for text in documents.values() for chunk in chunker.chunk(text)]
+
+        # Tokens are the embedding cost; anything past max_seq_length is silently dropped
+        tokens = np.array(count_tokens(chunks))
+        truncated = int(np.sum(tokens > model.max_seq_length - 2))
+
+        start = time.perf_counter()
+        vectors = np.asarray(model.encode(chunks, batch_size=batch_size, normalize_embeddings=True),
+                             dtype=np.float32)
+        encode_time = time.perf_counter() - start
+
+        top_k = np.argsort(-(query_vectors @ vectors.T), axis=1)[:, :k]
+        normalized = [normalize_space(chunk) for chunk in chunks]
+        hits = sum(
+            any(query["answer"] in normalized[i] for i in rows)
+            for query, rows in zip(queries, top_k)
+        )
+        print(f"{chunker.signature:<26} {len(chunks):>7} {int(tokens.sum()):>9} {truncated:>9} "
+              f"{encode_time:>9.1f} {hits / len(queries):>9.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Chunk count, embedding cost and retrieval recall of each chunking strategy"
+    )
+    parser.add_argument("--directories", nargs="+", default=["docs/insurance", "docs/Insurance PDFs", "docs/angelone"])
+    parser.add_argument("--strategies", nargs="+", default=list(CHUNKING_STRATEGIES), choices=CHUNKING_STRATEGIES)
+    parser.add_argument("--queries", help="JSON lines of {\"query\", \"answer\"}; a hit is a chunk "
+                                          "containing the answer text. Defaults to sampled corpus sentences")
+    parser.add_argument("--num-queries", type=int, default=300)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    documents = load_documents(args.directories)
+    if not documents:
+        raise SystemExit("No documents found; pass --directories with PDFs or text files")
+    if args.queries:
+        with open(args.queries, "r", encoding="utf-8") as f:
+            queries = [json.loads(line) for line in f if line.strip()]
+        for query in queries:
+            query["answer"] = normalize_space(query["answer"])
+    else:
+        queries = sample_queries(documents, args.num_queries, args.seed)
+
+    model = load_embedding_model(config["vector_store"]["embedding_model"])
+    run_benchmark(model, documents, queries, args.strategies, args.k, args.batch_size)
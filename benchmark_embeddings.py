@@ -0,0 +1,86 @@
+import argparse
+import os
+import random
+import time
+
+import numpy as np
+
+from chunking import create_chunker
+from embeddings import EMBEDDING_BACKENDS, embedding_model_spec, load_embedding_model
+from process_documents import config, extract_text
+
+
+def sample_chunks(directories: list, limit: int, seed: int) -> list:
+    """Chunk the corpus the way ingestion does and sample up to ``limit`` chunks."""
+    chunker = create_chunker(config.get("chunking"))
+    chunks = []
+    for directory in directories:
+        for root, _, files in os.walk(directory):
+            for file in files:
+                if file.lower().endswith(('.pdf', '.txt')):
+                    _, text = extract_text(os.path.join(root, file))
+                    chunks.extend(chunker.chunk(text))
+    random.Random(seed).shuffle(chunks)
+    return chunks[:limit]
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def measure(model, chunks: list, batch_size: int):
+    model.encode(chunks[:batch_size], batch_size=batch_size)  # warm-up
+    start = time.perf_counter()
+    embeddings = model.encode(chunks, batch_size=batch_size)
+    elapsed = time.perf_counter() - start
+    return normalize(np.asarray(embeddings, dtype=np.float32)), len(chunks) / elapsed
+
+
+def run_benchmark(model_name: str, backends: list, chunks: list, threads: int, batch_size: int, k: int):
+    print(f"{len(chunks)} chunks, {threads} thread(s), batch size {batch_size}\n")
+    reference = None
+    reference_neighbours = None
+
+    print(f"{'backend':<11} {'sent/s':>8} {'sent/s/core':>12} {'cos mean':>9} {'cos min':>8} {'top-k overlap':>14}")
+    for backend in ["torch"] + [b for b in backends if b != "torch"]:
+        try:
+            model = load_embedding_model({"name": model_name, "backend": backend}, threads=threads)
+        except Exception as e:
+            print(f"{backend:<11} skipped: {str(e)}")
+            continue
+        embeddings, throughput = measure(model, chunks, batch_size)
+
+        # Use every chunk as a query against the rest to see whether
+        # quantization changes which neighbours come back
+        similarities = embeddings @ embeddings.T
+        np.fill_diagonal(similarities, -np.inf)
+        neighbours = np.argsort(-similarities, axis=1)[:, :k]
+
+        if reference is None:
+            reference, reference_neighbours = embeddings, neighbours
+        drift = np.sum(embeddings * reference, axis=1)
+        overlap = np.mean([
+            len(set(a) & set(b)) / k for a, b in zip(neighbours, reference_neighbours)
+        ])
+        print(f"{backend:<11} {throughput:>8.1f} {throughput / threads:>12.1f} "
+              f"{drift.mean():>9.5f} {drift.min():>8.5f} {overlap:>14.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Throughput and cosine drift of embedding backends against PyTorch fp32"
+    )
+    parser.add_argument("--model", default=embedding_model_spec(config["vector_store"]["embedding_model"])["name"])
+    parser.add_argument("--backends", nargs="+", default=list(EMBEDDING_BACKENDS), choices=EMBEDDING_BACKENDS)
+    parser.add_argument("--directories", nargs="+", default=["docs/insurance", "docs/Insurance PDFs", "docs/angelone"])
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    chunks = sample_chunks(args.directories, args.chunks, args.seed)
+    if not chunks:
+        raise SystemExit("No documents found; pass --directories with PDFs or text files")
+    run_benchmark(args.model, args.backends, chunks, args.threads, args.batch_size, args.k)
@@ -0,0 +1,419 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+import httpx
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+# The fake inference server ignores the key, but mcp_server refuses to start without one
+os.environ.setdefault("HF_API_KEY", "benchmark")
+
+import mcp_server
+from chunk_store import ChunkStore
+from chunking import create_chunker
+from corpora import corpus_for_path
+from document_manifest import chunk_id, text_sha256
+from embeddings import load_embedding_model
+from lexical_index import LexicalIndex, tokenize
+from observability import stage_listeners
+from reranker import DEFAULT_RERANKER_MODEL, CrossEncoderReranker
+from vector_store import NumpyVectorStore
+
+DEFAULT_DIRECTORIES = ["docs/insurance", "docs/Insurance PDFs", "docs/angelone"]
+FILLER_WORDS = ("account", "policy", "charges", "form", "online", "branch", "customer", "premium",
+                "trading", "claim", "documents", "support", "payment", "portfolio", "nominee", "renewal")
+
+
+def create_fake_inference_app(token_latency_ms: float, answer_tokens: int) -> FastAPI:
+    """Stand-in for the Hugging Face endpoint that spends ``token_latency_ms`` per generated token.
+
+    Relevance checks get "YES"; answers are ``answer_tokens`` tokens, sent
+    as server-sent events when the payload asks to stream.
+    """
+    app = FastAPI()
+    delay = token_latency_ms / 1000
+
+    @app.post("/models/{model_id:path}")
+    async def generate(model_id: str, request: Request):
+        payload = await request.json()
+        if "Answer only YES or NO" in payload["inputs"]:
+            tokens = ["YES"]
+        else:
+            max_new_tokens = payload.get("parameters", {}).get("max_new_tokens", answer_tokens)
+            tokens = [f" token{i}" for i in range(min(answer_tokens, max_new_tokens))]
+
+        if payload.get("stream"):
+            async def events():
+                for token in tokens:
+                    await asyncio.sleep(delay)
+                    yield f"data:{json.dumps({'token': {'text': token, 'special': False}})}\n\n"
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        await asyncio.sleep(delay * len(tokens))
+        return [{"generated_text": "".join(tokens).strip()}]
+
+    return app
+
+
+def start_fake_inference_server(app: FastAPI, port: int = 0) -> str:
+    """Serve ``app`` from a background thread with its own event loop; returns the base URL."""
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", log_config=None))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    host, port = server.servers[0].sockets[0].getsockname()[:2]
+    return f"http://{host}:{port}"
+
+
+class HashingEmbedder:
+    """Bag-of-words vectors hashed into ``dimension`` buckets.
+
+    Lets the harness run without downloading the embedding model; retrieval
+    quality is irrelevant here, only that the vector path does the same work.
+    """
+
+    def __init__(self, dimension: int = 384):
+        self.dimension = dimension
+
+    def encode(self, texts, batch_size: int = 32, **kwargs):
+        single = isinstance(texts, str)
+        texts = [texts] if single else texts
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in tokenize(text):
+                bucket = int(hashlib.md5(token.encode("utf-8")).hexdigest()[:8], 16) % self.dimension
+                vectors[row, bucket] += 1.0
+        return vectors[0] if single else vectors
+
+
+def load_queries(path: str) -> list:
+    """Read a JSON-lines query log into /chat request bodies.
+
+    Each line needs a ``text`` (or ``query``/``title``) and may carry ``k``,
+    ``vector_weight`` and ``lexical_weight``.
+    """
+    queries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            body = {"text": entry.get("text") or entry.get("query") or entry["title"]}
+            for key in ("k", "vector_weight", "lexical_weight"):
+                if key in entry:
+                    body[key] = entry[key]
+            queries.append(body)
+    return queries
+
+
+def load_corpus(directories: list, chunker) -> list:
+    """``(source, chunk_index, text)`` for the documents ingestion would embed."""
+    from process_documents import extract_text
+
+    chunks = []
+    for directory in directories:
+        for root, _, files in os.walk(directory):
+            for file in sorted(files):
+                if file.lower().endswith(('.pdf', '.txt')):
+                    path = os.path.join(root, file)
+                    _, text = extract_text(path)
+                    chunks.extend((path, i, chunk) for i, chunk in enumerate(chunker.chunk(text)))
+    return chunks
+
+
+def synthetic_corpus(queries: list, documents: int, seed: int) -> list:
+    """Documents built from the query words plus filler, so every query has matches.
+
+    Documents are spread over the configured corpus directories, so routed
+    queries search a partition as they would in production.
+    """
+    rng = random.Random(seed)
+    vocabulary = [word for query in queries for word in tokenize(query["text"])] or list(FILLER_WORDS)
+    directories = [settings["directories"][0] for settings in mcp_server.CORPORA.values()
+                   if settings["directories"]] or ["synthetic"]
+    chunks = []
+    for doc in range(documents):
+        source = os.path.join(directories[doc % len(directories)], f"synthetic_{doc}.txt")
+        for index in range(4):
+            words = rng.choices(vocabulary, k=40) + rng.choices(FILLER_WORDS, k=80)
+            rng.shuffle(words)
+            sentences = [" ".join(words[i:i + 12]).capitalize() + "." for i in range(0, len(words), 12)]
+            chunks.append((source, index, " ".join(sentences)))
+    return chunks
+
+
+def build_stores(chunks: list, embedder, dimension: int, directory: str):
+    """Vector store, chunk store and BM25 index holding ``chunks``.
+
+    The vector store and BM25 index are never saved, so they live in memory;
+    the chunk store is SQLite in ``directory``.
+    """
+    ids = [chunk_id(source, text_sha256(text)) for source, _, text in chunks]
+    corpora = [corpus_for_path(source, mcp_server.CORPORA) for source, _, _ in chunks]
+    vectors = embedder.encode([text for _, _, text in chunks], batch_size=64)
+
+    store = NumpyVectorStore(os.path.join(directory, "vectors"), dimension)
+    store.upsert([
+        (doc_id, vector, {"source": source, "chunk_index": index, "corpus": corpus})
+        for doc_id, vector, (source, index, _), corpus in zip(ids, vectors, chunks, corpora)
+    ])
+    chunk_store = ChunkStore(os.path.join(directory, "chunks.sqlite3"))
+    chunk_store.put_many((doc_id, source, index, text) for doc_id, (source, index, text) in zip(ids, chunks))
+    lexical_index = LexicalIndex(os.path.join(directory, "lexical"))
+    lexical_index.add((doc_id, text, corpus) for doc_id, (_, _, text), corpus in zip(ids, chunks, corpora))
+    return store, chunk_store, lexical_index
+
+
+class StageTimings:
+    """Raw per-stage durations, fed by the server's stage timers."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.durations = defaultdict(list)
+
+    def __call__(self, stage: str, seconds: float):
+        with self._lock:
+            self.durations[stage].append(seconds)
+
+    def clear(self):
+        with self._lock:
+            self.durations.clear()
+
+
+def summarize(durations: list, wall: float) -> dict:
+    latencies = np.asarray(durations) * 1000
+    return {
+        "count": len(durations),
+        "throughput": len(durations) / wall,
+        "mean_ms": float(latencies.mean()),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+    }
+
+
+async def send(client: httpx.AsyncClient, endpoint: str, body: dict) -> bool:
+    response = await client.post(endpoint, json=body)
+    if endpoint == "/chat/stream":
+        return response.status_code == 200 and '"done": true' in response.text
+    return response.status_code == 200
+
+
+async def replay(client: httpx.AsyncClient, endpoint: str, queries: list, qps: float, requests: int):
+    """Send ``requests`` queries at a fixed ``qps`` arrival rate, however long each takes.
+
+    Returns ``(latencies, errors, wall_seconds)``.
+    """
+    latencies = []
+    errors = 0
+
+    async def timed_send(body: dict):
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            ok = await send(client, endpoint, body)
+        except httpx.HTTPError:
+            ok = False
+        latencies.append(time.perf_counter() - start)
+        errors += not ok
+
+    tasks = []
+    start = time.perf_counter()
+    for i in range(requests):
+        delay = start + i / qps - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(timed_send(queries[i % len(queries)])))
+    await asyncio.gather(*tasks)
+    return latencies, errors, time.perf_counter() - start
+
+
+async def run_benchmark(args, queries: list, settings: dict) -> dict:
+    timings = StageTimings()
+    stage_listeners.append(timings)
+    mcp_server.get_http_client()
+    transport = httpx.ASGITransport(app=mcp_server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+        try:
+            for body in queries[:args.warmup]:
+                await send(client, args.endpoint, body)
+            timings.clear()
+            latencies, errors, wall = await replay(client, args.endpoint, queries, args.qps, args.requests)
+        finally:
+            stage_listeners.remove(timings)
+            if mcp_server.embedding_batcher is not None:
+                await mcp_server.embedding_batcher.close()
+            await mcp_server.http_client.aclose()
+
+    return {
+        "settings": settings,
+        "errors": errors,
+        "achieved_qps": len(latencies) / wall,
+        "request": summarize(latencies, wall),
+        "stages": {stage: summarize(durations, wall) for stage, durations in sorted(timings.durations.items())},
+    }
+
+
+def print_results(results: dict):
+    print(f"\n{results['request']['count']} requests, {results['errors']} errors, "
+          f"{results['achieved_qps']:.1f} req/s achieved\n")
+    print(f"{'stage':<24} {'count':>6} {'per s':>8} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    rows = [("request", results["request"])] + list(results["stages"].items())
+    for name, r in rows:
+        print(f"{name:<24} {r['count']:>6} {r['throughput']:>8.1f} {r['mean_ms']:>9.2f} "
+              f"{r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f}")
+
+
+def compare_with_baseline(results: dict, baseline: dict, tolerance: float, min_delta_ms: float) -> list:
+    """Print p50/p95/p99 against the baseline; returns the metrics that regressed.
+
+    A percentile regresses when it is more than ``tolerance`` slower and at
+    least ``min_delta_ms`` slower, so jitter in sub-millisecond stages is ignored.
+    """
+    if baseline["settings"] != results["settings"]:
+        print("\nWarning: baseline was recorded with different settings:")
+        for key in sorted(set(baseline["settings"]) | set(results["settings"])):
+            if baseline["settings"].get(key) != results["settings"].get(key):
+                print(f"  {key}: {baseline['settings'].get(key)} -> {results['settings'].get(key)}")
+
+    print(f"\n{'stage':<24} {'metric':<7} {'baseline ms':>12} {'current ms':>11} {'change':>8}")
+    regressions = []
+    rows = [("request", results["request"], baseline["request"])] + [
+        (stage, r, baseline["stages"][stage]) for stage, r in results["stages"].items() if stage in baseline["stages"]
+    ]
+    for name, current, previous in rows:
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            change = current[metric] / previous[metric] - 1 if previous[metric] else 0.0
+            flag = ""
+            if change > tolerance and current[metric] - previous[metric] >= min_delta_ms:
+                flag = "  REGRESSION"
+                regressions.append(f"{name} {metric}")
+            print(f"{name:<24} {metric[:3]:<7} {previous[metric]:>12.2f} {current[metric]:>11.2f} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Replay a query log against mcp_server at a target QPS with a fake inference "
+                    "endpoint and in-memory indexes, and report per-stage latency"
+    )
+    parser.add_argument("--queries", default="benchmark_queries.jsonl", help="JSON-lines query log")
+    parser.add_argument("--endpoint", default="/chat", choices=["/chat", "/chat/stream"])
+    parser.add_argument("--qps", type=float, default=10.0, help="Request arrival rate")
+    parser.add_argument("--requests", type=int, default=200, help="Requests to send, cycling through the log")
+    parser.add_argument("--warmup", type=int, default=5, help="Queries sent one by one before measuring")
+    parser.add_argument("--token-latency-ms", type=float, default=20.0,
+                        help="Time the fake endpoint spends per generated token")
+    parser.add_argument("--answer-tokens", type=int, default=64, help="Tokens per fake answer")
+    parser.add_argument("--docs", nargs="+", default=DEFAULT_DIRECTORIES, help="Corpus directories")
+    parser.add_argument("--synthetic", type=int, metavar="N",
+                        help="Generate N synthetic documents from the query log instead of reading --docs")
+    parser.add_argument("--embedder", default="model", choices=["model", "hash"],
+                        help="'model' loads vector_store.embedding_model; 'hash' needs no download")
+    parser.add_argument("--rerank", action="store_true", help="Load the configured cross-encoder reranker")
+    parser.add_argument("--answer-cache", action="store_true",
+                        help="Keep the semantic answer cache (off by default so every request is answered)")
+    parser.add_argument("--retrieval-cache", action="store_true",
+                        help="Keep the retrieval result cache (off by default so every request is searched)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default="benchmark_baseline.json", help="Baseline results file")
+    parser.add_argument("--save-baseline", action="store_true", help="Write these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed slowdown of any percentile against the baseline (0.2 = 20%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0,
+                        help="Smallest slowdown in milliseconds that counts as a regression")
+    args = parser.parse_args()
+
+    # Per-request log lines would swamp the report
+    logging.getLogger().setLevel(logging.WARNING)
+
+    queries = load_queries(args.queries)
+    if args.embedder == "hash":
+        embedder = HashingEmbedder(mcp_server.config["vector_store"].get("dimension", 384))
+        dimension = embedder.dimension
+    else:
+        embedder = load_embedding_model(mcp_server.config["vector_store"]["embedding_model"])
+        dimension = embedder.get_sentence_embedding_dimension()
+
+    if args.synthetic:
+        chunks = synthetic_corpus(queries, args.synthetic, args.seed)
+    else:
+        chunker = create_chunker(mcp_server.config.get("chunking"), None if args.embedder == "hash" else embedder)
+        chunks = load_corpus(args.docs, chunker)
+    if not chunks:
+        sys.exit(f"No documents found under {args.docs}; pass --docs or --synthetic N")
+
+    with tempfile.TemporaryDirectory() as directory:
+        store, chunk_store, lexical_index = build_stores(chunks, embedder, dimension, directory)
+        print(f"Indexed {len(chunks)} chunks")
+
+        mcp_server.model = embedder
+        mcp_server.embedding_cache = None
+        mcp_server.index = store
+        mcp_server.chunk_store = chunk_store
+        mcp_server.lexical_index = lexical_index if mcp_server.RETRIEVAL_MODE == "hybrid" else None
+        mcp_server.reranker = None
+        if args.rerank:
+            reranker_config = mcp_server.config.get("reranker", {})
+            mcp_server.reranker = CrossEncoderReranker(
+                reranker_config.get("model", DEFAULT_RERANKER_MODEL),
+                max_candidates=reranker_config.get("max_candidates", 20),
+                batch_size=reranker_config.get("batch_size", 16),
+                time_budget_ms=reranker_config.get("time_budget_ms", 150),
+                max_length=reranker_config.get("max_length", 256)
+            )
+        if not args.answer_cache:
+            mcp_server.answer_cache = None
+        if not args.retrieval_cache:
+            mcp_server.retrieval_cache = None
+        mcp_server.retriever_tool = mcp_server.RetrieverTool()
+        mcp_server.startup_state["status"] = "ready"
+
+        inference_url = start_fake_inference_server(create_fake_inference_app(args.token_latency_ms, args.answer_tokens))
+        mcp_server.API_URL = f"{inference_url}/models/{mcp_server.config['model']['model']}"
+
+        settings = {
+            "endpoint": args.endpoint,
+            "qps": args.qps,
+            "requests": args.requests,
+            "token_latency_ms": args.token_latency_ms,
+            "answer_tokens": args.answer_tokens,
+            "embedder": args.embedder,
+            "chunks": len(chunks),
+            "relevance_mode": mcp_server.RELEVANCE_MODE,
+            "retrieval_mode": mcp_server.RETRIEVAL_MODE,
+            "rerank": args.rerank,
+            "answer_cache": args.answer_cache,
+            "retrieval_cache": args.retrieval_cache,
+        }
+        results = asyncio.run(run_benchmark(args, queries, settings))
+
+    print_results(results)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(results, baseline, args.tolerance, args.min_delta_ms)
+        if regressions:
+            sys.exit(f"\n{len(regressions)} percentile(s) regressed by more than {args.tolerance:.0%}: "
+                     + ", ".join(regressions))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import argparse
+import asyncio
+import time
+
+import mcp_server
+from mcp_server import Query, RELEVANCE_MODES, NOT_RELEVANT_RESPONSE
+
+# A mix of on-topic and off-topic questions; pass --questions to use your own
+DEFAULT_QUESTIONS = [
+    "How do I open an AngelOne account?",
+    "What are the DP charges on AngelOne?",
+    "How do I add funds to my trading account?",
+    "What does my health insurance policy cover for hospitalisation?",
+    "How do I file an insurance claim?",
+    "What is the capital of France?",
+    "Write me a poem about the sea.",
+]
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def benchmark_mode(mode: str, questions: list, repeats: int) -> dict:
+    latencies = []
+    rejected = 0
+    errors = 0
+    for _ in range(repeats):
+        for question in questions:
+            start = time.perf_counter()
+            try:
+                answer = await mcp_server.answer_query(Query(text=question), mode=mode)
+                if answer == NOT_RELEVANT_RESPONSE:
+                    rejected += 1
+            except Exception as e:
+                errors += 1
+                print(f"[{mode}] error for '{question}': {str(e)}")
+            latencies.append(time.perf_counter() - start)
+
+    return {
+        "mode": mode,
+        "requests": len(latencies),
+        "rejected": rejected,
+        "errors": errors,
+        "mean": sum(latencies) / len(latencies),
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+    }
+
+
+async def run_benchmark(modes: list, questions: list, repeats: int, rerank: bool = False):
+    # Every mode must pay for its own retrieval and round trips
+    mcp_server.answer_cache = None
+    mcp_server.retrieval_cache = None
+    mcp_server.get_http_client()
+    await mcp_server.ensure_initialized()
+    if not rerank:
+        mcp_server.reranker = None
+    try:
+        results = [await benchmark_mode(mode, questions, repeats) for mode in modes]
+    finally:
+        await mcp_server.http_client.aclose()
+
+    print(f"\n{'mode':<12} {'requests':>8} {'rejected':>8} {'errors':>6} {'mean s':>8} {'p50 s':>8} {'p95 s':>8}")
+    for r in results:
+        print(f"{r['mode']:<12} {r['requests']:>8} {r['rejected']:>8} {r['errors']:>6} "
+              f"{r['mean']:>8.2f} {r['p50']:>8.2f} {r['p95']:>8.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare /chat latency across relevance modes")
+    parser.add_argument("--modes", nargs="+", default=list(RELEVANCE_MODES), choices=RELEVANCE_MODES)
+    parser.add_argument("--questions", help="File with one question per line")
+    parser.add_argument("--repeats", type=int, default=1)
+    parser.add_argument("--rerank", action="store_true",
+                        help="Keep the cross-encoder reranker on (the same cost for every mode)")
+    args = parser.parse_args()
+
+    questions = DEFAULT_QUESTIONS
+    if args.questions:
+        with open(args.questions, "r", encoding="utf-8") as f:
+            questions = [line.strip() for line in f if line.strip()]
+
+    asyncio.run(run_benchmark(args.modes, questions, args.repeats, args.rerank))
@@ -0,0 +1,99 @@
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+DEFAULT_CHUNK_STORE_PATH = "embeddings/chunks.sqlite3"
+
+# SQLite caps bound parameters per statement (999 on older builds)
+_MAX_PARAMS = 900
+
+
+def chunk_store_enabled(config: dict) -> bool:
+    """Whether ``chunk_store`` is on in mcp.yaml.
+
+    ``auto`` enables it with a local vector store or lexical index, since the
+    server then reads ingestion's files anyway and BM25 hits have no vector
+    metadata to take their text from. A remote index on its own can be served
+    from a machine that never sees ingestion's SQLite file, so its vectors keep
+    their text in metadata.
+    """
+    enabled = config.get("chunk_store", {}).get("enabled", False)
+    if enabled == "auto":
+        return (config.get("vector_store", {}).get("type", "pinecone") != "pinecone"
+                or bool(config.get("lexical_index", {}).get("enabled", False)))
+    return bool(enabled)
+
+
+class ChunkStore:
+    """Chunk text keyed by vector ID, kept in SQLite beside the vector index.
+
+    Vector metadata then only carries small fields (source, chunk index) and
+    the text for a query's top-k hits comes back in one ``get_many`` lookup.
+    The database runs in WAL mode so ``process_documents.py`` can write while
+    server workers read; each thread gets its own connection.
+    """
+
+    def __init__(self, path: str = DEFAULT_CHUNK_STORE_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS chunks ("
+                "id TEXT PRIMARY KEY, source TEXT, chunk_index INTEGER, text TEXT NOT NULL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def put_many(self, records: Iterable[Tuple[str, str, int, str]]):
+        """Insert or replace ``(id, source, chunk_index, text)`` rows."""
+        with self._connection() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO chunks (id, source, chunk_index, text) VALUES (?, ?, ?, ?)",
+                records
+            )
+
+    def get_many(self, ids: List[str]) -> Dict[str, str]:
+        """Text for each of ``ids`` that is stored; missing IDs are left out."""
+        texts = {}
+        connection = self._connection()
+        for start in range(0, len(ids), _MAX_PARAMS):
+            batch = ids[start:start + _MAX_PARAMS]
+            placeholders = ",".join("?" * len(batch))
+            texts.update(connection.execute(
+                f"SELECT id, text FROM chunks WHERE id IN ({placeholders})", batch
+            ).fetchall())
+        return texts
+
+    def get_records(self, ids: List[str]) -> Dict[str, dict]:
+        """``{"source", "chunk_index", "text"}`` for each of ``ids`` that is stored."""
+        records = {}
+        connection = self._connection()
+        for start in range(0, len(ids), _MAX_PARAMS):
+            batch = ids[start:start + _MAX_PARAMS]
+            placeholders = ",".join("?" * len(batch))
+            for doc_id, source, chunk_index, text in connection.execute(
+                f"SELECT id, source, chunk_index, text FROM chunks WHERE id IN ({placeholders})", batch
+            ):
+                records[doc_id] = {"source": source, "chunk_index": chunk_index, "text": text}
+        return records
+
+    def delete(self, ids: List[str]):
+        with self._connection() as connection:
+            for start in range(0, len(ids), _MAX_PARAMS):
+                batch = ids[start:start + _MAX_PARAMS]
+                placeholders = ",".join("?" * len(batch))
+                connection.execute(f"DELETE FROM chunks WHERE id IN ({placeholders})", batch)
@@ -0,0 +1,232 @@
+import re
+from typing import Callable, List, Optional
+
+CHUNKING_STRATEGIES = ("character", "sentence", "heading")
+
+# Models like all-MiniLM-L6-v2 truncate at 256 word pieces, two of which are [CLS]/[SEP]
+DEFAULT_MAX_TOKENS = 254
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_HEADING = re.compile(r"^(#{1,6})\s+(.+?)\s*$")
+_WORD_PIECE = re.compile(r"\w+|[^\w\s]")
+
+TokenCounter = Callable[[List[str]], List[int]]
+
+
+def chunk_text(text: str, chunk_size: int = 1000, overlap: int = 200) -> list:
+    """Split text into overlapping chunks."""
+    chunks = []
+    start = 0
+    text_length = len(text)
+
+    while start < text_length:
+        end = start + chunk_size
+        chunk = text[start:end]
+        chunks.append(chunk)
+        start = end - overlap
+
+    return chunks
+
+
+def approximate_token_counts(texts: List[str]) -> List[int]:
+    """Words plus punctuation, a lower bound on word-piece counts for when no tokenizer is loaded."""
+    return [len(_WORD_PIECE.findall(text)) for text in texts]
+
+
+def tokenizer_token_counts(tokenizer) -> TokenCounter:
+    """Count tokens with a Hugging Face tokenizer, excluding special tokens."""
+    def count(texts: List[str]) -> List[int]:
+        if not texts:
+            return []
+        encoded = tokenizer(texts, add_special_tokens=False, verbose=False)
+        return [len(ids) for ids in encoded["input_ids"]]
+    return count
+
+
+class CharacterChunker:
+    """Fixed character windows; the original ``chunk_text`` behaviour."""
+
+    def __init__(self, chunk_size: int = 1000, overlap: int = 200):
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.signature = f"character:{chunk_size}:{overlap}"
+
+    def chunk(self, text: str) -> List[str]:
+        return chunk_text(text, self.chunk_size, self.overlap)
+
+
+class SentenceChunker:
+    """Pack whole sentences into chunks of at most ``max_tokens`` tokens.
+
+    Text is split into paragraphs on blank lines and paragraphs into sentences;
+    chunks end on a sentence boundary and keep paragraph breaks. The last
+    sentences of a chunk, up to ``overlap_tokens``, are repeated at the start
+    of the next one. A sentence longer than the budget is split on lines, then
+    words.
+    """
+
+    def __init__(self, max_tokens: int = DEFAULT_MAX_TOKENS, overlap_tokens: int = 32,
+                 count_tokens: TokenCounter = approximate_token_counts):
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.count_tokens = count_tokens
+        self.signature = f"sentence:{max_tokens}:{overlap_tokens}"
+
+    def _units(self, text: str) -> List[tuple]:
+        """``(paragraph_index, sentence)`` pairs in document order."""
+        units = []
+        for paragraph_index, paragraph in enumerate(_PARAGRAPH_BREAK.split(text)):
+            for sentence in _SENTENCE_END.split(paragraph.strip()):
+                if sentence.strip():
+                    units.append((paragraph_index, sentence.strip()))
+        return units
+
+    def _split_long(self, text: str, budget: int) -> List[tuple]:
+        """Break an over-long sentence into ``(piece, tokens)`` pairs that fit ``budget``."""
+        lines = [line for line in text.split("\n") if line.strip()]
+        if len(lines) > 1:
+            pieces, separator = lines, "\n"
+        else:
+            pieces, separator = text.split(), " "
+        counts = self.count_tokens(pieces)
+
+        parts = []
+        current, size = [], 0
+        for piece, tokens in zip(pieces, counts):
+            if tokens > budget and separator == "\n":
+                if current:
+                    parts.append((separator.join(current), size))
+                    current, size = [], 0
+                parts.extend(self._split_long(piece, budget))
+                continue
+            if current and size + tokens > budget:
+                parts.append((separator.join(current), size))
+                current, size = [], 0
+            current.append(piece)
+            size += tokens
+        if current:
+            parts.append((separator.join(current), size))
+        return parts
+
+    @staticmethod
+    def _join(units: List[tuple]) -> str:
+        text = units[0][1]
+        for (previous, _, _), (paragraph, sentence, _) in zip(units, units[1:]):
+            text += ("\n\n" if paragraph != previous else " ") + sentence
+        return text
+
+    def chunk(self, text: str, prefix: str = "") -> List[str]:
+        """Chunk ``text``, starting every chunk with ``prefix`` (e.g. its heading) if given."""
+        budget = self.max_tokens
+        if prefix:
+            budget -= self.count_tokens([prefix])[0] + 1
+        budget = max(budget, 1)
+
+        units = self._units(text)
+        sized = []
+        for (paragraph, sentence), tokens in zip(units, self.count_tokens([sentence for _, sentence in units])):
+            if tokens > budget:
+                sized.extend((paragraph, piece, n) for piece, n in self._split_long(sentence, budget))
+            else:
+                sized.append((paragraph, sentence, tokens))
+
+        chunks = []
+        current, size = [], 0
+        for unit in sized:
+            tokens = unit[2]
+            if current and size + tokens > budget:
+                chunks.append(self._join(current))
+                # Carry trailing sentences forward as overlap, leaving room for this one
+                carry, carried = [], 0
+                for previous in reversed(current):
+                    if carried + previous[2] > self.overlap_tokens or carried + previous[2] + tokens > budget:
+                        break
+                    carry.insert(0, previous)
+                    carried += previous[2]
+                current, size = carry, carried
+            current.append(unit)
+            size += tokens
+        if current:
+            chunks.append(self._join(current))
+
+        if prefix:
+            chunks = [f"{prefix}\n{chunk}" for chunk in chunks]
+        return chunks
+
+
+class HeadingChunker:
+    """Split on Markdown-style ``#`` headings, then chunk each section by sentence.
+
+    The scraper marks ``<h1>``-``<h6>`` this way. Every chunk starts with the
+    section's heading path (``Account > Opening an account``) so it is embedded
+    with its context. Text without headings is chunked as a single section.
+    """
+
+    def __init__(self, sentence_chunker: SentenceChunker):
+        self.sentence_chunker = sentence_chunker
+        self.signature = f"heading:{sentence_chunker.signature}"
+
+    def sections(self, text: str) -> List[tuple]:
+        """``(heading_path, body)`` pairs in document order."""
+        sections = []
+        path: List[tuple] = []
+        body: List[str] = []
+
+        def flush():
+            if any(line.strip() for line in body):
+                sections.append((" > ".join(title for _, title in path), "\n".join(body).strip()))
+
+        for line in text.split("\n"):
+            match = _HEADING.match(line)
+            if not match:
+                body.append(line)
+                continue
+            flush()
+            body = []
+            level = len(match.group(1))
+            path = [(depth, title) for depth, title in path if depth < level]
+            path.append((level, match.group(2)))
+        flush()
+        return sections
+
+    def chunk(self, text: str) -> List[str]:
+        sections = self.sections(text)
+        # Text before the first heading (e.g. the scraper's "Source URL:" line)
+        # joins the first section rather than becoming a chunk of its own
+        if len(sections) > 1 and not sections[0][0]:
+            preamble, (heading, body) = sections[0][1], sections[1]
+            sections = [(heading, f"{preamble}\n\n{body}")] + sections[2:]
+
+        chunks = []
+        for heading, body in sections:
+            chunks.extend(self.sentence_chunker.chunk(body, prefix=heading))
+        return chunks
+
+
+def create_chunker(chunking_config: Optional[dict] = None, model=None):
+    """Build the chunker selected by ``chunking.strategy``.
+
+    Token-aware strategies count tokens with ``model``'s tokenizer when one is
+    given and default ``max_tokens`` to its ``max_seq_length``.
+    """
+    chunking_config = chunking_config or {}
+    strategy = chunking_config.get("strategy", "character")
+    if strategy not in CHUNKING_STRATEGIES:
+        raise ValueError(f"Unknown chunking strategy '{strategy}', expected one of {CHUNKING_STRATEGIES}")
+
+    if strategy == "character":
+        return CharacterChunker(chunking_config.get("chunk_size", 1000), chunking_config.get("overlap", 200))
+
+    count_tokens = approximate_token_counts
+    max_tokens = chunking_config.get("max_tokens")
+    tokenizer = getattr(model, "tokenizer", None)
+    if tokenizer is not None:
+        count_tokens = tokenizer_token_counts(tokenizer)
+    if not max_tokens and getattr(model, "max_seq_length", None):
+        max_tokens = model.max_seq_length - 2
+    sentence_chunker = SentenceChunker(max_tokens or DEFAULT_MAX_TOKENS,
+                                       chunking_config.get("overlap_tokens", 32), count_tokens)
+    if strategy == "sentence":
+        return sentence_chunker
+    return HeadingChunker(sentence_chunker)
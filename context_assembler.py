@@ -0,0 +1,184 @@
+import logging
+import re
+import threading
+from collections import defaultdict
+from typing import List, Optional, Tuple
+
+from chunking import SentenceChunker, TokenCounter, approximate_token_counts, tokenizer_token_counts
+
+_WORD = re.compile(r"\w+")
+
+logger = logging.getLogger(__name__)
+
+
+def load_token_counter(tokenizer_name: Optional[str], token: Optional[str] = None) -> Tuple[TokenCounter, str]:
+    """Token counter for the generation model, or word counts if its tokenizer can't be loaded.
+
+    Returns ``(count_tokens, description)``.
+    """
+    if tokenizer_name:
+        try:
+            from transformers import AutoTokenizer
+
+            tokenizer = AutoTokenizer.from_pretrained(tokenizer_name, token=token)
+            return tokenizer_token_counts(tokenizer), tokenizer_name
+        except Exception as e:
+            logger.warning(f"Could not load tokenizer {tokenizer_name}, approximating token counts: {str(e)}")
+    return approximate_token_counts, "approximate"
+
+
+def merge_overlapping(first: str, second: str, min_overlap: int = 20) -> str:
+    """Join two neighbouring chunks, dropping the text they share.
+
+    ``second`` may repeat ``first``'s heading line before the overlap, as the
+    heading chunker does; that line is dropped too.
+    """
+    starts = []
+    newline = second.find("\n")
+    if newline > 0 and first.startswith(second[:newline + 1]):
+        starts.append(newline + 1)
+    starts.append(0)
+
+    for start in starts:
+        head = second[start:start + min_overlap]
+        if len(head) < min_overlap:
+            continue
+        # The earliest match is the longest suffix of ``first`` that ``second`` repeats
+        position = first.find(head, max(0, len(first) - (len(second) - start)))
+        while position != -1:
+            if second.startswith(first[position:], start):
+                return first + second[start + len(first) - position:]
+            position = first.find(head, position + 1)
+    return f"{first}\n{second[starts[0]:]}"
+
+
+def _shingles(text: str) -> set:
+    words = _WORD.findall(text.lower())
+    if len(words) < 3:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + 3]) for i in range(len(words) - 2)}
+
+
+class ContextAssembler:
+    """Turn ranked retrieval hits into one prompt context within a token budget.
+
+    Hits that are neighbouring chunks of the same source (consecutive
+    ``chunk_index``) are stitched back together without their overlap. A
+    passage whose word 3-grams are at least ``duplicate_threshold`` contained
+    in an already kept passage is dropped. Passages are then added in rank
+    order until ``max_tokens``; one that does not fit is cut at a sentence
+    boundary if at least ``min_partial_tokens`` remain, otherwise skipped.
+    """
+
+    def __init__(self, count_tokens: TokenCounter = approximate_token_counts, max_tokens: int = 1024,
+                 duplicate_threshold: float = 0.8, min_partial_tokens: int = 32):
+        self.count_tokens = count_tokens
+        self.max_tokens = max_tokens
+        self.duplicate_threshold = duplicate_threshold
+        self.min_partial_tokens = min_partial_tokens
+
+    @staticmethod
+    def _merge_neighbours(passages: List[Tuple[str, dict]]) -> List[str]:
+        by_source = defaultdict(list)
+        blocks = []
+        for rank, (text, metadata) in enumerate(passages):
+            metadata = metadata or {}
+            chunk_index = metadata.get("chunk_index")
+            if metadata.get("source") is not None and isinstance(chunk_index, (int, float)):
+                # Pinecone returns numeric metadata as floats
+                by_source[metadata["source"]].append((int(chunk_index), rank, text))
+            else:
+                blocks.append((rank, text))
+
+        for members in by_source.values():
+            # Repeats of the same chunk sort next to each other
+            members.sort(key=lambda member: (member[0], member[2], member[1]))
+            index, rank, text = members[0]
+            for next_index, next_rank, next_text in members[1:]:
+                if next_index == index and next_text == text:
+                    rank = min(rank, next_rank)
+                elif next_index == index + 1:
+                    text = merge_overlapping(text, next_text)
+                    index, rank = next_index, min(rank, next_rank)
+                else:
+                    # A gap, or another chunk stored under the same index (e.g.
+                    # by an incremental run), starts a block of its own
+                    blocks.append((rank, text))
+                    index, rank, text = next_index, next_rank, next_text
+            blocks.append((rank, text))
+
+        # A merged block ranks where its best member did
+        return [text for _, text in sorted(blocks)]
+
+    def _drop_duplicates(self, blocks: List[str]) -> List[str]:
+        kept, kept_shingles = [], []
+        for text in blocks:
+            shingles = _shingles(text)
+            if any(len(shingles & other) >= self.duplicate_threshold * len(shingles) for other in kept_shingles):
+                continue
+            kept.append(text)
+            kept_shingles.append(shingles)
+        return kept
+
+    def assemble(self, passages: List[Tuple[str, dict]], max_tokens: Optional[int] = None) -> Tuple[str, dict]:
+        """Build the context from ``(content, metadata)`` pairs in rank order.
+
+        Returns ``(context, stats)`` with token counts before and after.
+        """
+        budget = max_tokens or self.max_tokens
+        merged = self._merge_neighbours(passages)
+        blocks = self._drop_duplicates(merged)
+
+        selected, used = [], 0
+        for text, tokens in zip(blocks, self.count_tokens(blocks)):
+            remaining = budget - used
+            if tokens <= remaining:
+                selected.append(text)
+                used += tokens
+            elif remaining >= self.min_partial_tokens:
+                partial = SentenceChunker(remaining, 0, self.count_tokens).chunk(text)
+                if partial:
+                    selected.append(partial[0])
+                    used += self.count_tokens([partial[0]])[0]
+
+        context = "\n\n".join(selected)
+        stats = {
+            "passages": len(passages),
+            "merged": len(passages) - len(merged),
+            "duplicates": len(merged) - len(blocks),
+            "dropped": len(blocks) - len(selected),
+            "tokens_before": sum(self.count_tokens([text for text, _ in passages])),
+            "tokens_after": used,
+        }
+        return context, stats
+
+
+class TokenUsage:
+    """Running totals of prompt tokens sent to the inference endpoint."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.input_tokens = 0
+        self.context_tokens_before = 0
+        self.context_tokens_after = 0
+
+    def record(self, input_tokens: int, context_stats: Optional[dict] = None):
+        with self._lock:
+            self.requests += 1
+            self.input_tokens += input_tokens
+            if context_stats:
+                self.context_tokens_before += context_stats["tokens_before"]
+                self.context_tokens_after += context_stats["tokens_after"]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "input_tokens_total": self.input_tokens,
+                "input_tokens_mean": self.input_tokens / self.requests if self.requests else 0.0,
+                "context_tokens_before": self.context_tokens_before,
+                "context_tokens_after": self.context_tokens_after,
+                "context_savings": (1 - self.context_tokens_after / self.context_tokens_before
+                                    if self.context_tokens_before else 0.0),
+            }
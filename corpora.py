@@ -0,0 +1,66 @@
+import os
+from typing import Dict, List, Optional
+
+from lexical_index import tokenize
+
+# Tag for documents outside every configured corpus directory
+DEFAULT_CORPUS = "general"
+
+
+def load_corpora(config: dict) -> Dict[str, dict]:
+    """``corpora`` from mcp.yaml as ``{name: {"directories": [...], "keywords": [...]}}``."""
+    return {
+        name: {
+            "directories": list(settings.get("directories", [])),
+            "keywords": list(settings.get("keywords", [])),
+        }
+        for name, settings in (config.get("corpora") or {}).items()
+    }
+
+
+def corpus_for_path(path: str, corpora: Dict[str, dict]) -> str:
+    """Name of the first corpus with a directory containing ``path``."""
+    path = os.path.normpath(path)
+    for name, settings in corpora.items():
+        for directory in settings["directories"]:
+            if path.startswith(os.path.normpath(directory) + os.sep):
+                return name
+    return DEFAULT_CORPUS
+
+
+def corpora_signature(corpora: Dict[str, dict]) -> str:
+    """Changes whenever a document's corpus tag could, so ingestion knows to re-tag."""
+    return ";".join(f"{name}={','.join(settings['directories'])}" for name, settings in corpora.items())
+
+
+def corpus_filter(corpora: Optional[List[str]]) -> Optional[dict]:
+    """Vector store metadata filter for chunks in ``corpora``; None searches everything."""
+    if not corpora:
+        return None
+    return {"corpus": {"$in": sorted(corpora)}}
+
+
+class CorpusRouter:
+    """Send a query only to the corpora whose keywords it mentions.
+
+    Each corpus scores one point per distinct keyword in the query. The
+    best-scoring corpora (several on a tie) are searched; a query that hits
+    no keywords, or hits every corpus equally, searches everything.
+    """
+
+    def __init__(self, corpora: Dict[str, dict]):
+        self.keywords = {
+            name: {token for keyword in settings["keywords"] for token in tokenize(keyword)}
+            for name, settings in corpora.items()
+        }
+
+    def route(self, text: str) -> Optional[List[str]]:
+        terms = set(tokenize(text))
+        hits = {name: len(terms & keywords) for name, keywords in self.keywords.items()}
+        best = max(hits.values(), default=0)
+        if not best:
+            return None
+        chosen = [name for name, count in hits.items() if count == best]
+        if len(chosen) == len(hits):
+            return None
+        return chosen
@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+from typing import Dict, Iterable, List, Optional
+
+from chunking import chunk_text
+
+DEFAULT_MANIFEST_PATH = "embeddings/manifest.json"
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def text_sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunk_id(source_path: str, chunk_hash: str) -> str:
+    """Stable vector ID for a chunk: identical text in the same file keeps its ID."""
+    source_hash = hashlib.sha1(os.path.normpath(source_path).encode("utf-8")).hexdigest()
+    return f"{source_hash[:12]}_{chunk_hash[:16]}"
+
+
+def legacy_chunk_ids(source_path: str, text: str) -> List[str]:
+    """IDs ingestion gave a file's chunks before the manifest: ``<basename>_<i>``
+    for each 1000/200 character window."""
+    return [f"{os.path.basename(source_path)}_{i}" for i in range(len(chunk_text(text)))]
+
+
+class DocumentManifest:
+    """Persistent record of what ingestion has stored, keyed by document path.
+
+    Each entry holds the file's size, mtime and content hash plus a map of the
+    vector IDs it produced to their chunk hashes, which is what lets a run skip
+    unchanged files and chunks and delete vectors for chunks that went away,
+    and the position of each chunk in the file, so a chunk that moved gets its
+    ``chunk_index`` metadata rewritten.
+    ``chunker`` is the signature of the chunker that produced the chunks and
+    ``corpora`` that of the corpus mapping their vectors were tagged with, and
+    ``text_in_metadata`` whether their metadata carries the chunk text.
+    """
+
+    def __init__(self, path: str = DEFAULT_MANIFEST_PATH):
+        self.path = path
+        self.documents: Dict[str, dict] = {}
+        self.chunker: Optional[str] = None
+        self.corpora: Optional[str] = None
+        self.text_in_metadata: Optional[bool] = None
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.documents = data.get("documents", {})
+            # Manifests from before chunkers were recorded used 1000/200 character windows
+            self.chunker = data.get("chunker", "character:1000:200")
+            self.corpora = data.get("corpora")
+            self.text_in_metadata = data.get("text_in_metadata")
+
+    def paths(self) -> List[str]:
+        return list(self.documents)
+
+    def matches_stat(self, path: str, stat: os.stat_result) -> bool:
+        entry = self.documents.get(path)
+        return bool(entry) and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime
+
+    def matches_hash(self, path: str, sha256: str) -> bool:
+        entry = self.documents.get(path)
+        return bool(entry) and entry["sha256"] == sha256
+
+    def chunks(self, path: str) -> Dict[str, str]:
+        entry = self.documents.get(path)
+        return dict(entry["chunks"]) if entry else {}
+
+    def positions(self, path: str) -> Dict[str, int]:
+        """Chunk index each vector ID was stored with; empty for manifests from before positions were recorded."""
+        entry = self.documents.get(path)
+        return dict(entry.get("positions", {})) if entry else {}
+
+    def update(self, path: str, stat: os.stat_result, sha256: Optional[str], chunks: Dict[str, str],
+               positions: Dict[str, int]):
+        self.documents[path] = {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "sha256": sha256,
+            "chunks": chunks,
+            "positions": positions,
+        }
+
+    def mark_incomplete(self, path: str, failed_ids: Iterable[str], replaced: Dict[str, str]):
+        """Leave ``path`` for the next run to finish after some of its chunks failed to store.
+
+        The entry stops matching the file's stat and hash, so the file is
+        re-processed; ``failed_ids`` are forgotten, so they are re-embedded;
+        and the ``replaced`` chunks, whose vectors were kept, are remembered,
+        so they are deleted once the document is stored in full.
+        """
+        entry = self.documents[path]
+        entry["size"] = entry["mtime"] = entry["sha256"] = None
+        failed_ids = set(failed_ids)
+        chunks = {doc_id: chunk_hash for doc_id, chunk_hash in entry["chunks"].items() if doc_id not in failed_ids}
+        chunks.update(replaced)
+        entry["chunks"] = chunks
+        entry["positions"] = {doc_id: i for doc_id, i in entry.get("positions", {}).items() if doc_id not in failed_ids}
+
+    def touch(self, path: str, stat: os.stat_result):
+        """Record a new size/mtime for a file whose content hash did not change."""
+        self.documents[path]["size"] = stat.st_size
+        self.documents[path]["mtime"] = stat.st_mtime
+
+    def remove(self, path: str) -> List[str]:
+        """Forget a document and return the vector IDs that belonged to it."""
+        entry = self.documents.pop(path, None)
+        return list(entry["chunks"]) if entry else []
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"chunker": self.chunker, "corpora": self.corpora,
+                       "text_in_metadata": self.text_in_metadata, "documents": self.documents}, f)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,108 @@
+import asyncio
+import time
+from collections import Counter
+from typing import Callable, List, Optional
+
+import numpy as np
+
+
+class EmbeddingBatcher:
+    """Coalesce concurrent single-text encodes into batched calls.
+
+    ``embed`` queues a text and waits for its vector. A background task takes
+    the first queued text, keeps collecting until ``max_batch_size`` texts are
+    waiting or ``max_wait_ms`` has passed, then runs ``encode_fn`` on the whole
+    batch in a worker thread so the event loop stays free.
+    """
+
+    def __init__(self, encode_fn: Callable[[List[str]], np.ndarray],
+                 max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self.encode_fn = encode_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop = None
+
+        self.batch_sizes = Counter()
+        self.requests = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+        self.encode_time_total = 0.0
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def embed(self, text: str) -> np.ndarray:
+        self._ensure_worker()
+        future = self._loop.create_future()
+        await self._queue.put((text, future, time.perf_counter()))
+        return await future
+
+    async def _collect_batch(self) -> list:
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect_batch()
+            batch = [item for item in batch if not item[1].cancelled()]
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            for _, _, enqueued in batch:
+                wait = started - enqueued
+                self.queue_wait_total += wait
+                self.queue_wait_max = max(self.queue_wait_max, wait)
+            self.requests += len(batch)
+            self.batch_sizes[len(batch)] += 1
+
+            try:
+                vectors = await asyncio.to_thread(self.encode_fn, [text for text, _, _ in batch])
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            finally:
+                self.encode_time_total += time.perf_counter() - started
+
+            for (_, future, _), vector in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(vector)
+
+    async def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    def stats(self) -> dict:
+        batches = sum(self.batch_sizes.values())
+        return {
+            "requests": self.requests,
+            "batches": batches,
+            "mean_batch_size": self.requests / batches if batches else 0.0,
+            "batch_size_histogram": dict(sorted(self.batch_sizes.items())),
+            "queue_wait_ms_mean": 1000 * self.queue_wait_total / self.requests if self.requests else 0.0,
+            "queue_wait_ms_max": 1000 * self.queue_wait_max,
+            "encode_ms_mean": 1000 * self.encode_time_total / batches if batches else 0.0,
+        }
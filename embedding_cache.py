@@ -0,0 +1,128 @@
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """On-disk embedding cache keyed by model name and text hash.
+
+    Every model gets its own ``records.bin`` under ``directory``: fixed-size
+    records of a 32-byte SHA-256 of the text followed by the float32 vector.
+    Records are only ever appended (one ``os.write`` per batch on an
+    ``O_APPEND`` descriptor), so the ingestion job and server workers can share
+    the file, and reads go through a memory map that is extended when the file
+    grows.
+
+    ``encode(..., persist=False)`` reads the file but never appends to it;
+    the vectors it computes go to an in-memory LRU of ``memory_entries``
+    instead, so one-off text such as user queries doesn't grow the shared file.
+    """
+
+    def __init__(self, directory: str, model_name: str, dimension: int = 384, memory_entries: int = 0):
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+        self.directory = os.path.join(directory, safe_name)
+        self.path = os.path.join(self.directory, "records.bin")
+        self.dimension = dimension
+        self.record_dtype = np.dtype([("key", "S32"), ("vector", "<f4", (dimension,))])
+
+        self._lock = threading.Lock()
+        self._records = None
+        self._rows: Dict[bytes, int] = {}
+        self._mapped_rows = 0
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        os.makedirs(self.directory, exist_ok=True)
+        self._refresh()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @staticmethod
+    def key(text: str) -> bytes:
+        return hashlib.sha256(text.encode("utf-8")).digest()
+
+    def _refresh(self):
+        """Map any records appended since the last look, by this or another process."""
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return
+        # A trailing partial record means a write is still in progress
+        rows = size // self.record_dtype.itemsize
+        if rows <= self._mapped_rows:
+            return
+        self._records = np.memmap(self.path, dtype=self.record_dtype, mode="r", shape=(rows,))
+        keys = self._records["key"][self._mapped_rows:rows]
+        for offset, key in enumerate(keys.tolist()):
+            self._rows.setdefault(key, self._mapped_rows + offset)
+        self._mapped_rows = rows
+
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        with self._lock:
+            if any(key not in self._rows for key in keys):
+                self._refresh()
+            return {
+                key: np.array(self._records["vector"][self._rows[key]])
+                for key in keys if key in self._rows
+            }
+
+    def put_many(self, keys: List[bytes], vectors: np.ndarray):
+        if not keys:
+            return
+        records = np.empty(len(keys), dtype=self.record_dtype)
+        records["key"] = keys
+        records["vector"] = np.asarray(vectors, dtype=np.float32).reshape(len(keys), self.dimension)
+        with self._lock:
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644)
+            try:
+                os.write(fd, records.tobytes())
+            finally:
+                os.close(fd)
+            self._refresh()
+
+    def _recall_many(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        with self._lock:
+            found = {}
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+            return found
+
+    def _remember_many(self, keys: List[bytes], vectors: np.ndarray):
+        with self._lock:
+            for key, vector in zip(keys, vectors):
+                self._memory[key] = vector
+                self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def encode(self, texts: List[str], encode_fn: Callable, persist: bool = True, **encode_kwargs) -> np.ndarray:
+        """Return embeddings for ``texts``, only calling ``encode_fn`` for unseen text.
+
+        New vectors are appended to the file, or with ``persist=False`` kept in memory only.
+        """
+        keys = [self.key(text) for text in texts]
+        found = self.get_many(keys)
+        if not persist and len(found) < len(keys):
+            found.update(self._recall_many([key for key in keys if key not in found]))
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        if missing:
+            encoded = np.asarray(encode_fn(list(missing.values()), **encode_kwargs), dtype=np.float32)
+            if persist:
+                self.put_many(list(missing), encoded)
+            else:
+                self._remember_many(list(missing), encoded)
+            found.update(zip(missing, encoded))
+
+        return np.stack([found[key] for key in keys]) if keys else np.zeros((0, self.dimension), dtype=np.float32)
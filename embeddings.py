@@ -0,0 +1,70 @@
+from typing import Optional, Union
+
+EMBEDDING_BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+
+# Pre-quantized weights shipped in the sentence-transformers model repos
+DEFAULT_ONNX_INT8_FILE = "onnx/model_quint8_avx2.onnx"
+
+
+def embedding_model_spec(value: Union[str, dict]) -> dict:
+    """Normalise ``vector_store.embedding_model`` into ``{name, backend, file_name}``.
+
+    The setting is either a model name (PyTorch fp32) or a mapping with a
+    ``backend`` of ``torch``, ``torch-int8`` (dynamic int8 quantization of the
+    linear layers), ``onnx`` (ONNX Runtime fp32) or ``onnx-int8`` (ONNX Runtime
+    with the quantized weights in ``file_name``).
+    """
+    if isinstance(value, str):
+        value = {"name": value}
+    spec = {
+        "name": value["name"],
+        "backend": value.get("backend", "torch"),
+        "file_name": value.get("file_name"),
+    }
+    if spec["backend"] not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{spec['backend']}', expected one of {EMBEDDING_BACKENDS}")
+    if spec["backend"] == "onnx-int8" and not spec["file_name"]:
+        spec["file_name"] = DEFAULT_ONNX_INT8_FILE
+    return spec
+
+
+def embedding_model_id(value: Union[str, dict]) -> str:
+    """Name that identifies the vectors a model produces, for cache keys."""
+    spec = embedding_model_spec(value)
+    if spec["backend"] == "torch":
+        return spec["name"]
+    return f"{spec['name']}@{spec['backend']}"
+
+
+def load_embedding_model(value: Union[str, dict], threads: Optional[int] = None):
+    """Load a SentenceTransformer on the configured backend.
+
+    ``threads`` caps the intra-op thread pool, which the benchmarks use to
+    measure per-core throughput.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    spec = embedding_model_spec(value)
+    backend = spec["backend"]
+
+    if backend.startswith("torch"):
+        import torch
+
+        if threads:
+            torch.set_num_threads(threads)
+        model = SentenceTransformer(spec["name"], device="cpu" if backend == "torch-int8" else None)
+        if backend == "torch-int8":
+            # Dynamic quantization only supports CPU inference
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return model
+
+    model_kwargs = {}
+    if spec["file_name"]:
+        model_kwargs["file_name"] = spec["file_name"]
+    if threads:
+        import onnxruntime
+
+        session_options = onnxruntime.SessionOptions()
+        session_options.intra_op_num_threads = threads
+        model_kwargs["session_options"] = session_options
+    return SentenceTransformer(spec["name"], backend="onnx", model_kwargs=model_kwargs)
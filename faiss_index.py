@@ -0,0 +1,124 @@
+import argparse
+import logging
+import time
+
+import numpy as np
+import yaml
+
+INDEX_TYPES = ("flat", "ivf", "ivfpq", "hnsw", "pq")
+
+# FAISS warns when an IVF quantizer gets fewer than ~39 training points per list
+MIN_POINTS_PER_LIST = 39
+
+logger = logging.getLogger(__name__)
+
+
+def build_index(vectors: np.ndarray, index_type: str = "flat", nlist: int = 1024,
+                pq_m: int = 16, pq_nbits: int = 8, hnsw_m: int = 32,
+                ef_construction: int = 200):
+    """Build an inner-product FAISS index over L2-normalised ``vectors``.
+
+    ``flat`` is exact; ``ivf``/``ivfpq`` cluster the vectors into ``nlist``
+    inverted lists (``ivfpq`` also product-quantizes them into ``pq_m``
+    sub-vectors of ``pq_nbits`` bits); ``hnsw`` builds a graph with ``hnsw_m``
+    links per node; ``pq`` is a flat scan over product-quantized codes.
+    Corpora too small to train the requested type get a ``flat`` index.
+    """
+    import faiss
+
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    dimension = vectors.shape[1]
+    metric = faiss.METRIC_INNER_PRODUCT
+
+    required = min_training_points(index_type, pq_nbits)
+    if len(vectors) < required:
+        logger.info(
+            f"{len(vectors)} vectors are too few to train a {index_type} index "
+            f"(needs {required}), using flat"
+        )
+        index_type = "flat"
+
+    if index_type == "flat":
+        index = faiss.IndexFlatIP(dimension)
+    elif index_type in ("ivf", "ivfpq"):
+        # Shrink nlist on small corpora so every list gets enough training points
+        nlist = max(1, min(nlist, len(vectors) // MIN_POINTS_PER_LIST))
+        quantizer = faiss.IndexFlatIP(dimension)
+        if index_type == "ivf":
+            index = faiss.IndexIVFFlat(quantizer, dimension, nlist, metric)
+        else:
+            index = faiss.IndexIVFPQ(quantizer, dimension, nlist, pq_m, pq_nbits, metric)
+        index.train(vectors)
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dimension, hnsw_m, metric)
+        index.hnsw.efConstruction = ef_construction
+    elif index_type == "pq":
+        index = faiss.IndexPQ(dimension, pq_m, pq_nbits, metric)
+        index.train(vectors)
+    else:
+        raise ValueError(f"Unknown FAISS index type '{index_type}', expected one of {INDEX_TYPES}")
+
+    if len(vectors):
+        index.add(vectors)
+    return index
+
+
+def min_training_points(index_type: str, pq_nbits: int = 8) -> int:
+    """Fewest vectors ``build_index`` can train ``index_type`` on: one full
+    inverted list for IVF and a point per centroid for product quantization."""
+    if index_type == "ivf":
+        return MIN_POINTS_PER_LIST
+    if index_type == "ivfpq":
+        return max(MIN_POINTS_PER_LIST, 2 ** pq_nbits)
+    if index_type == "pq":
+        return 2 ** pq_nbits
+    return 0
+
+
+def set_search_params(index, nprobe: int = None, ef_search: int = None):
+    """Apply query-time knobs; parameters that don't apply to ``index`` are ignored."""
+    if nprobe is not None and hasattr(index, "nprobe"):
+        index.nprobe = nprobe
+    if ef_search is not None and hasattr(index, "hnsw"):
+        index.hnsw.efSearch = ef_search
+
+
+def index_options(faiss_config: dict) -> dict:
+    """Split the ``vector_store.faiss`` config into build and search parameters."""
+    build_keys = ("index_type", "nlist", "pq_m", "pq_nbits", "hnsw_m", "ef_construction")
+    search_keys = ("nprobe", "ef_search")
+    return {
+        "build_params": {key: faiss_config[key] for key in build_keys if key in faiss_config},
+        "search_params": {key: faiss_config[key] for key in search_keys if key in faiss_config},
+    }
+
+
+if __name__ == "__main__":
+    from vector_store import FaissVectorStore
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    with open("mcp/mcp.yaml", "r") as f:
+        config = yaml.safe_load(f)
+    store_config = config["vector_store"]
+    defaults = index_options(store_config.get("faiss", {}))["build_params"]
+
+    parser = argparse.ArgumentParser(description="Rebuild the local FAISS index with a different index type")
+    parser.add_argument("--type", dest="index_type", choices=INDEX_TYPES, default=defaults.get("index_type", "flat"))
+    parser.add_argument("--nlist", type=int, default=defaults.get("nlist", 1024))
+    parser.add_argument("--pq-m", type=int, default=defaults.get("pq_m", 16))
+    parser.add_argument("--pq-nbits", type=int, default=defaults.get("pq_nbits", 8))
+    parser.add_argument("--hnsw-m", type=int, default=defaults.get("hnsw_m", 32))
+    parser.add_argument("--ef-construction", type=int, default=defaults.get("ef_construction", 200))
+    args = parser.parse_args()
+
+    build_params = vars(args)
+    store = FaissVectorStore(store_config["path"], store_config.get("dimension", 384),
+                             build_params=build_params)
+    start = time.perf_counter()
+    store.rebuild_index()
+    store.save()
+    logger.info(
+        f"Built {args.index_type} index over {len(store)} vectors in "
+        f"{time.perf_counter() - start:.1f}s at {store.index_path}"
+    )
@@ -0,0 +1,27 @@
+import os
+
+DEFAULT_VERSION_FILE = "embeddings/index_version"
+
+
+def read_index_version(path: str = DEFAULT_VERSION_FILE) -> int:
+    """Return the current index version, or 0 if nothing has been ingested yet."""
+    try:
+        with open(path, "r") as f:
+            return int(f.read().strip() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def bump_index_version(path: str = DEFAULT_VERSION_FILE) -> int:
+    """Increment the index version so readers drop anything derived from the old index."""
+    version = read_index_version(path) + 1
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    # Write to a temp file and rename so readers never see a partial value
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(str(version))
+    os.replace(tmp_path, path)
+    return version
@@ -0,0 +1,212 @@
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Collection, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_LEXICAL_INDEX_PATH = "embeddings/lexical_index"
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset("""
+a an and are as at be but by can do does for from how i if in into is it its me my
+no not of on or our so that the their then there these this to was we what when
+where which who why will with you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased alphanumeric runs, so "DP-charges" and "DP charges" match."""
+    return [token for token in _TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class LexicalIndex:
+    """BM25 search over chunk text with an in-memory inverted index.
+
+    Postings are held compressed-sparse-row style: ``offsets[t]:offsets[t + 1]``
+    slices ``doc_rows``/``term_freqs`` for vocabulary entry ``t``, so a query
+    touches only the postings of its own terms. The index lives in ``path``
+    as ``postings.npz`` plus ``index.json`` (chunk IDs and vocabulary), which
+    is written last; ``refresh()`` reloads when its mtime changes, like the
+    local vector stores. Updates are applied to a per-chunk term table that is
+    only rebuilt from the postings when the index is first modified. Each
+    chunk may carry a corpus tag that ``search`` can filter on.
+    """
+
+    def __init__(self, path: str = DEFAULT_LEXICAL_INDEX_PATH, k1: float = 1.2, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._loaded_mtime = None
+        self._load()
+
+    @property
+    def postings_path(self) -> str:
+        return os.path.join(self.path, "postings.npz")
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.path, "index.json")
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._positions
+
+    def _load(self):
+        with self._lock:
+            self._ids: List[str] = []
+            self._corpora: List[Optional[str]] = []
+            self._terms: Dict[str, int] = {}
+            self._offsets = np.zeros(1, dtype=np.int64)
+            self._doc_rows = np.zeros(0, dtype=np.int32)
+            self._term_freqs = np.zeros(0, dtype=np.float32)
+            self._doc_lengths = np.zeros(0, dtype=np.float32)
+            if os.path.exists(self.index_path) and os.path.exists(self.postings_path):
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    stored = json.load(f)
+                postings = np.load(self.postings_path)
+                self._ids = stored["ids"]
+                # Indexes written before corpus tags were recorded have none
+                self._corpora = stored.get("corpora") or [None] * len(self._ids)
+                self._terms = {term: i for i, term in enumerate(stored["terms"])}
+                self._offsets = postings["offsets"]
+                self._doc_rows = postings["doc_rows"]
+                self._term_freqs = postings["term_freqs"]
+                self._doc_lengths = postings["doc_lengths"]
+                if len(self._doc_lengths) != len(self._ids):
+                    raise ValueError(f"Lexical index at {self.path} is inconsistent; re-run ingestion")
+                self._loaded_mtime = os.path.getmtime(self.index_path)
+            self._positions = {doc_id: i for i, doc_id in enumerate(self._ids)}
+            self._doc_terms: Optional[List[Counter]] = None
+            self._corpus_masks: Dict[frozenset, np.ndarray] = {}
+            self._dirty = False
+
+    def refresh(self):
+        try:
+            mtime = os.path.getmtime(self.index_path)
+        except OSError:
+            return
+        if mtime != self._loaded_mtime:
+            self._load()
+
+    def _editable_terms(self) -> List[Counter]:
+        """Per-chunk term counts, recovered from the postings on first use."""
+        if self._doc_terms is None:
+            self._doc_terms = [Counter() for _ in self._ids]
+            for term, t in self._terms.items():
+                start, end = self._offsets[t], self._offsets[t + 1]
+                for row, tf in zip(self._doc_rows[start:end].tolist(), self._term_freqs[start:end].tolist()):
+                    self._doc_terms[row][term] = int(tf)
+        return self._doc_terms
+
+    def add(self, records: Iterable[Tuple]):
+        """Index or re-index ``(doc_id, text)`` or ``(doc_id, text, corpus)`` tuples."""
+        with self._lock:
+            doc_terms = self._editable_terms()
+            for doc_id, text, *corpus in records:
+                terms = Counter(tokenize(text))
+                corpus = corpus[0] if corpus else None
+                if doc_id in self._positions:
+                    doc_terms[self._positions[doc_id]] = terms
+                    self._corpora[self._positions[doc_id]] = corpus
+                else:
+                    self._positions[doc_id] = len(self._ids)
+                    self._ids.append(doc_id)
+                    self._corpora.append(corpus)
+                    doc_terms.append(terms)
+                self._corpus_masks = {}
+                self._dirty = True
+
+    def delete(self, ids: List[str]):
+        with self._lock:
+            doomed = {self._positions[doc_id] for doc_id in ids if doc_id in self._positions}
+            if not doomed:
+                return
+            doc_terms = self._editable_terms()
+            keep = [i for i in range(len(self._ids)) if i not in doomed]
+            self._ids = [self._ids[i] for i in keep]
+            self._corpora = [self._corpora[i] for i in keep]
+            self._corpus_masks = {}
+            self._doc_terms = [doc_terms[i] for i in keep]
+            self._positions = {doc_id: i for i, doc_id in enumerate(self._ids)}
+            self._dirty = True
+
+    def _rebuild(self):
+        """Regenerate the postings arrays from the per-chunk term table."""
+        postings = defaultdict(list)
+        for row, terms in enumerate(self._doc_terms):
+            for term, tf in terms.items():
+                postings[term].append((row, tf))
+
+        terms = sorted(postings)
+        lengths = [len(postings[term]) for term in terms]
+        self._terms = {term: i for i, term in enumerate(terms)}
+        self._offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        self._offsets[1:] = np.cumsum(lengths)
+        pairs = [pair for term in terms for pair in postings[term]]
+        self._doc_rows = np.array([row for row, _ in pairs], dtype=np.int32)
+        self._term_freqs = np.array([tf for _, tf in pairs], dtype=np.float32)
+        self._doc_lengths = np.array([sum(terms.values()) for terms in self._doc_terms], dtype=np.float32)
+        self._dirty = False
+
+    def _corpus_mask(self, corpora: Collection[str]) -> np.ndarray:
+        key = frozenset(corpora)
+        mask = self._corpus_masks.get(key)
+        if mask is None:
+            mask = np.fromiter((corpus in key for corpus in self._corpora), dtype=bool, count=len(self._corpora))
+            self._corpus_masks[key] = mask
+        return mask
+
+    def search(self, query: str, top_k: int, corpora: Optional[Collection[str]] = None) -> List[Dict]:
+        """Return up to ``top_k`` ``{"id", "score"}`` dicts by descending BM25 score.
+
+        ``corpora`` limits the results to chunks tagged with one of them.
+        """
+        with self._lock:
+            if self._dirty:
+                self._rebuild()
+            if not self._ids:
+                return []
+
+            scores = np.zeros(len(self._ids), dtype=np.float32)
+            average_length = float(self._doc_lengths.mean()) or 1.0
+            for term in set(tokenize(query)):
+                t = self._terms.get(term)
+                if t is None:
+                    continue
+                start, end = self._offsets[t], self._offsets[t + 1]
+                rows = self._doc_rows[start:end]
+                tf = self._term_freqs[start:end]
+                idf = math.log(1 + (len(self._ids) - len(rows) + 0.5) / (len(rows) + 0.5))
+                norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[rows] / average_length)
+                scores[rows] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+            if corpora:
+                scores[~self._corpus_mask(corpora)] = 0
+            candidates = np.flatnonzero(scores)
+            if top_k < len(candidates):
+                candidates = candidates[np.argpartition(-scores[candidates], top_k)[:top_k]]
+            order = candidates[np.argsort(-scores[candidates])]
+            return [{"id": self._ids[row], "score": float(scores[row])} for row in order]
+
+    def save(self):
+        with self._lock:
+            if self._dirty:
+                self._rebuild()
+            os.makedirs(self.path, exist_ok=True)
+            tmp_postings = os.path.join(self.path, "postings.tmp.npz")
+            np.savez(tmp_postings, offsets=self._offsets, doc_rows=self._doc_rows,
+                     term_freqs=self._term_freqs, doc_lengths=self._doc_lengths)
+            os.replace(tmp_postings, self.postings_path)
+            # index.json is written last; its mtime tells readers to reload
+            tmp_path = f"{self.index_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"ids": self._ids, "corpora": self._corpora, "terms": list(self._terms)}, f)
+            os.replace(tmp_path, self.index_path)
+            self._loaded_mtime = os.path.getmtime(self.index_path)
@@ -1,47 +1,43 @@
 from typing import List, Dict, Optional
-import faiss
-import numpy as np
-from sentence_transformers import SentenceTransformer
-import json
-import os
+from chunk_store import DEFAULT_CHUNK_STORE_PATH, ChunkStore
+from embeddings import load_embedding_model
+from faiss_index import index_options
+from vector_store import FaissVectorStore
 
 class DocumentSearchTool:
     def __init__(self, config: Dict):
         self.top_k = config.get("top_k", 3)
         self.similarity_threshold = config.get("similarity_threshold", 0.7)
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+        self.embedding_model = load_embedding_model(config.get("embedding_model", 'all-MiniLM-L6-v2'))
         
-        # Load FAISS index
-        self.index_path = "embeddings/faiss_index"
-        self.index = faiss.read_index(os.path.join(self.index_path, "index.faiss"))
-        
-        # Load document metadata
-        with open(os.path.join(self.index_path, "metadata.json"), "r") as f:
-            self.metadata = json.load(f)
+        # Load the local FAISS index written by process_documents.py
+        self.index_path = config.get("index_path", "embeddings/faiss_index")
+        self.store = FaissVectorStore(self.index_path, config.get("dimension", 384),
+                                      **index_options(config.get("faiss", {})))
+        self.chunk_store = ChunkStore(config.get("chunk_store_path", DEFAULT_CHUNK_STORE_PATH))
     
     def search(self, query: str) -> List[Dict]:
         # Generate query embedding
         query_embedding = self.embedding_model.encode([query])[0]
         
-        # Search in FAISS index
-        distances, indices = self.index.search(
-            np.array([query_embedding]).astype('float32'),
-            self.top_k
-        )
+        # Search in FAISS index (inner product over normalised vectors = cosine)
+        self.store.refresh()
+        matches = self.store.query(query_embedding, self.top_k)
         
         # Format results
         results = []
-        for distance, idx in zip(distances[0], indices[0]):
-            if distance < self.similarity_threshold:
-                doc_metadata = self.metadata[str(idx)]
-                results.append({
-                    "content": doc_metadata["content"],
-                    "source": doc_metadata["source"],
-                    "page": doc_metadata.get("page"),
-                    "similarity_score": float(1 - distance)
-                })
-        
+        matches = [match for match in matches if match["score"] >= self.similarity_threshold]
+        texts = self.chunk_store.get_many([match["id"] for match in matches])
+        for match in matches:
+            doc_metadata = match["metadata"]
+            results.append({
+                "content": texts.get(match["id"]) or doc_metadata.get("chunk_text", doc_metadata.get("content")),
+                "source": doc_metadata.get("source"),
+                "page": doc_metadata.get("page"),
+                "similarity_score": match["score"]
+            })
+    
         return results
     
     def __call__(self, query: str) -> List[Dict]:
-        return self.search(query) 
\ No newline at end of file
+        return self.search(query) 
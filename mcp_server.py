@@ -1,85 +1,429 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import List, Optional
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field, field_validator
+from typing import AsyncIterator, List, Optional, Tuple
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+import asyncio
+import json
+import logging
 import os
+import time
 from dotenv import load_dotenv
-from sentence_transformers import SentenceTransformer
-import requests
+import httpx
 import yaml
 import traceback
-from pinecone import Pinecone, ServerlessSpec
+from concurrent.futures import ThreadPoolExecutor
+from chunk_store import DEFAULT_CHUNK_STORE_PATH, ChunkStore, chunk_store_enabled
+from corpora import CorpusRouter, corpus_filter, load_corpora
+from context_assembler import ContextAssembler, TokenUsage, load_token_counter
+from embedding_batcher import EmbeddingBatcher
+from embedding_cache import EmbeddingCache
+from embeddings import embedding_model_id, load_embedding_model
+from index_version import DEFAULT_VERSION_FILE, read_index_version
+from lexical_index import DEFAULT_LEXICAL_INDEX_PATH, LexicalIndex
+from observability import (INPUT_TOKENS, REQUEST_SECONDS, STATS, configure_logging, observe_stage,
+                           render_metrics, timed)
+from reranker import DEFAULT_RERANKER_MODEL, CrossEncoderReranker
+from retrieval_cache import RetrievalCache, normalize_query
+from semantic_cache import SemanticCache
+from vector_store import create_vector_store
 
-print("Starting server initialization...")
+logger = logging.getLogger("mcp_server")
 
 # Load environment variables
 load_dotenv()
-print("Environment variables loaded")
 
 # Load configuration
 try:
     with open("mcp/mcp.yaml", "r") as f:
         config = yaml.safe_load(f)
-    print("Configuration loaded successfully")
-except Exception as e:
-    print(f"Error loading configuration: {str(e)}")
+except Exception:
+    logger.exception("Error loading configuration")
     raise
 
+logging_config = config.get("logging", {})
+configure_logging(logging_config.get("level", "INFO"), logging_config.get("format", "json"))
+logger.info("Starting server initialization")
+
 # Initialize Hugging Face API
 HF_API_KEY = os.getenv("HF_API_KEY")
 if not HF_API_KEY:
     raise ValueError("Hugging Face API key not found in environment variables")
 
-print("Hugging Face API key loaded")
+# The embedding model, embedding cache and vector store are created by
+# initialize_resources(). In "lazy" startup mode that runs in a background
+# thread after the app starts, so /health answers immediately; in "eager"
+# mode the app doesn't accept requests until it has finished.
+STARTUP_MODES = ("lazy", "eager")
+STARTUP_MODE = config["server"].get("startup", "lazy")
+if STARTUP_MODE not in STARTUP_MODES:
+    raise ValueError(f"Unknown startup mode '{STARTUP_MODE}', expected one of {STARTUP_MODES}")
+
+embedding_model_name = embedding_model_id(config["vector_store"]["embedding_model"])
+model = None
+embedding_cache: Optional[EmbeddingCache] = None
+chunk_store: Optional[ChunkStore] = None
+lexical_index: Optional[LexicalIndex] = None
+reranker: Optional[CrossEncoderReranker] = None
+index = None
+retriever_tool = None
+startup_state = {"status": "pending", "phases": {}, "error": None}
+_startup_task: Optional[asyncio.Task] = None
+
+
+@contextmanager
+def startup_phase(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        startup_state["phases"][name] = round(elapsed, 3)
+        logger.info(f"Startup phase '{name}' took {elapsed:.2f}s", extra={"phase": name, "seconds": round(elapsed, 3)})
+
+
+def initialize_resources():
+    """Load the embedding model and open the caches, chunk store and indexes."""
+    global model, embedding_cache, chunk_store, lexical_index, reranker, index, retriever_tool
+
+    # Initialize sentence transformer for embeddings
+    with startup_phase("load_embedding_model"):
+        logger.info(f"Embedding model: {embedding_model_name}")
+        model = load_embedding_model(config["vector_store"]["embedding_model"])
+
+    # Embedding cache shared with process_documents.py
+    embedding_cache_config = config.get("embedding_cache", {})
+    if embedding_cache_config.get("enabled", False):
+        with startup_phase("open_embedding_cache"):
+            embedding_cache = EmbeddingCache(
+                embedding_cache_config.get("path", "embeddings/cache"),
+                embedding_model_name,
+                config["vector_store"].get("dimension", 384),
+                memory_entries=embedding_cache_config.get("query_entries", 1024)
+            )
+            logger.info(f"Embedding cache loaded with {len(embedding_cache)} vectors")
+
+    # Chunk text written by process_documents.py; vector metadata only has small fields
+    chunk_store_config = config.get("chunk_store", {})
+    if chunk_store_enabled(config):
+        with startup_phase("open_chunk_store"):
+            chunk_store = ChunkStore(chunk_store_config.get("path", DEFAULT_CHUNK_STORE_PATH))
+            logger.info(f"Chunk store opened with {len(chunk_store)} chunks")
+
+    # BM25 index written by process_documents.py, for hybrid retrieval
+    lexical_config = config.get("lexical_index", {})
+    if lexical_config.get("enabled", False):
+        with startup_phase("open_lexical_index"):
+            lexical_index = LexicalIndex(lexical_config.get("path", DEFAULT_LEXICAL_INDEX_PATH),
+                                         k1=lexical_config.get("k1", 1.2), b=lexical_config.get("b", 0.75))
+            logger.info(f"Lexical index loaded with {len(lexical_index)} chunks")
+
+    # Initialize the vector store selected by vector_store.type
+    with startup_phase("connect_vector_store"):
+        logger.info(f"Vector store: {config['vector_store'].get('type', 'pinecone')}")
+        index = create_vector_store(config["vector_store"])
+
+    # Cross-encoder that re-scores over-fetched candidates
+    reranker_config = config.get("reranker", {})
+    if reranker_config.get("enabled", False):
+        with startup_phase("load_reranker"):
+            reranker = CrossEncoderReranker(
+                reranker_config.get("model", DEFAULT_RERANKER_MODEL),
+                max_candidates=reranker_config.get("max_candidates", 20),
+                batch_size=reranker_config.get("batch_size", 16),
+                time_budget_ms=reranker_config.get("time_budget_ms", 150),
+                max_length=reranker_config.get("max_length", 256)
+            )
+            logger.info(f"Reranker: {reranker.model_name} (up to {reranker.max_candidates} candidates)")
+
+    # Generation model tokenizer, for the prompt context budget
+    with startup_phase("load_tokenizer"):
+        context_assembler.count_tokens, tokenizer_name = load_token_counter(
+            context_config.get("tokenizer") or config["model"]["model"], HF_API_KEY
+        )
+        context_usage_state["tokenizer"] = tokenizer_name
+        logger.info(f"Context budget: {context_assembler.max_tokens} tokens ({tokenizer_name})")
+
+    # Run one encode and search so the first real query doesn't pay for
+    # lazy allocations and kernel selection
+    with startup_phase("warm_up"):
+        warm_up_embedding = model.encode("warm-up query")
+        index.query(warm_up_embedding, top_k=1, include_metadata=False)
+        # Local stores build a search structure per corpus filter on first use
+        for corpus in CORPORA:
+            index.query(warm_up_embedding, top_k=1, include_metadata=False, filter=corpus_filter([corpus]))
+        if reranker is not None:
+            reranker.rerank("warm-up query", ["warm-up passage"], 1)
+
+    retriever_tool = RetrieverTool()
+
+
+def _run_startup():
+    start = time.perf_counter()
+    try:
+        initialize_resources()
+    except Exception as e:
+        startup_state["status"] = "failed"
+        startup_state["error"] = str(e)
+        logger.exception("Error during startup")
+        raise
+    startup_state["status"] = "ready"
+    startup_state["error"] = None
+    logger.info(f"Server ready after {time.perf_counter() - start:.2f}s")
+
+
+def start_initialization() -> asyncio.Task:
+    """Start (or restart after a failure) resource initialization in a worker thread."""
+    global _startup_task
+    if _startup_task is None or (_startup_task.done() and startup_state["status"] == "failed"):
+        startup_state["status"] = "initializing"
+        _startup_task = asyncio.ensure_future(asyncio.to_thread(_run_startup))
+    return _startup_task
 
-# Initialize sentence transformer for embeddings
-try:
-    print("Initializing sentence transformer...")
-    embedding_model_name = config["vector_store"]["embedding_model"]
-    print(f"Embedding model: {embedding_model_name}")
-    model = SentenceTransformer(embedding_model_name)
-    print("Sentence transformer initialized successfully")
-except Exception as e:
-    print(f"Error initializing sentence transformer: {str(e)}")
-    raise
 
-# Initialize Pinecone instance
-pinecone_api_key = os.getenv("PINECONE_API_KEY")
-if not pinecone_api_key:
-    raise ValueError("Pinecone API key not found in environment variables")
-
-pinecone_instance = Pinecone(api_key=pinecone_api_key)
-
-# Create an index if it doesn't exist
-collection_name = "documents"
-if collection_name not in pinecone_instance.list_indexes().names():
-    pinecone_instance.create_index(
-        name=collection_name,
-        dimension=384,
-        metric="cosine",
-        spec=ServerlessSpec(cloud="aws", region="us-east-1")
+async def ensure_initialized():
+    if startup_state["status"] != "ready":
+        await asyncio.shield(start_initialization())
+
+# Relevance gating: "llm" asks the model YES/NO before answering, "score"
+# compares the best retrieval score with the document_search similarity
+# threshold, "single_pass" lets the answer prompt itself reject the question.
+RELEVANCE_MODES = ("llm", "score", "single_pass")
+RELEVANCE_MODE = config.get("relevance", {}).get("mode", "llm")
+if RELEVANCE_MODE not in RELEVANCE_MODES:
+    raise ValueError(f"Unknown relevance mode '{RELEVANCE_MODE}', expected one of {RELEVANCE_MODES}")
+
+
+def get_tool_config(name: str) -> dict:
+    for tool in config.get("tools", []):
+        if tool.get("name") == name:
+            return tool.get("config", {})
+    return {}
+
+
+SIMILARITY_THRESHOLD = get_tool_config("document_search").get("similarity_threshold", 0.7)
+logger.info(f"Relevance mode: {RELEVANCE_MODE} (similarity threshold {SIMILARITY_THRESHOLD})")
+
+# Hybrid retrieval fuses vector and BM25 rankings with reciprocal rank fusion;
+# the weights are defaults that a query can override
+RETRIEVAL_MODES = ("vector", "hybrid")
+retrieval_config = config.get("retrieval", {})
+RETRIEVAL_MODE = retrieval_config.get("mode", "vector")
+if RETRIEVAL_MODE not in RETRIEVAL_MODES:
+    raise ValueError(f"Unknown retrieval mode '{RETRIEVAL_MODE}', expected one of {RETRIEVAL_MODES}")
+DEFAULT_VECTOR_WEIGHT = retrieval_config.get("vector_weight", 1.0)
+DEFAULT_LEXICAL_WEIGHT = retrieval_config.get("lexical_weight", 1.0) if RETRIEVAL_MODE == "hybrid" else 0.0
+RRF_K = retrieval_config.get("rrf_k", 60)
+HYBRID_CANDIDATES = retrieval_config.get("candidates", 20)
+logger.info(f"Retrieval mode: {RETRIEVAL_MODE}")
+
+# Chunks are tagged with their corpus at ingestion; a query searches the
+# corpora it names, or those the keyword router picks, or everything
+CORPORA = load_corpora(config)
+corpus_router: Optional[CorpusRouter] = None
+if retrieval_config.get("routing", False) and CORPORA:
+    corpus_router = CorpusRouter(CORPORA)
+    logger.info(f"Corpus routing across {', '.join(CORPORA)}")
+
+# Retrieved chunks are merged, de-duplicated and cut to a token budget before
+# they go into prompts; token counts use the approximation until the model
+# tokenizer is loaded
+context_config = config.get("context", {})
+context_assembler = ContextAssembler(
+    max_tokens=context_config.get("max_tokens", 1024),
+    duplicate_threshold=context_config.get("duplicate_threshold", 0.8),
+    min_partial_tokens=context_config.get("min_partial_tokens", 32)
+)
+RELEVANCE_CONTEXT_TOKENS = context_config.get("relevance_max_tokens", 512)
+token_usage = TokenUsage()
+context_usage_state = {"tokenizer": "approximate"}
+# Per-request prompt token counts, filled in by the inference helpers
+request_usage: ContextVar[Optional[dict]] = ContextVar("request_usage", default=None)
+
+# Semantic answer cache, invalidated whenever ingestion bumps the index version
+INDEX_VERSION_FILE = config["vector_store"].get("version_file", DEFAULT_VERSION_FILE)
+answer_cache_config = config.get("answer_cache", {})
+answer_cache: Optional[SemanticCache] = None
+if answer_cache_config.get("enabled", False):
+    answer_cache = SemanticCache(
+        max_entries=answer_cache_config.get("max_entries", 1000),
+        similarity_threshold=answer_cache_config.get("similarity_threshold", 0.95),
+        ttl_seconds=answer_cache_config.get("ttl_seconds", 3600)
+    )
+    logger.info(f"Answer cache enabled ({answer_cache.max_entries} entries)")
+
+# Concurrent /chat requests share batched encode calls for their queries
+embedding_batcher_config = config.get("embedding_batcher", {})
+embedding_batcher: Optional[EmbeddingBatcher] = None
+if embedding_batcher_config.get("enabled", False):
+    embedding_batcher = EmbeddingBatcher(
+        lambda texts: retriever_tool.embed_many(texts),
+        max_batch_size=embedding_batcher_config.get("max_batch_size", 32),
+        max_wait_ms=embedding_batcher_config.get("max_wait_ms", 5)
     )
-    print(f"Index '{collection_name}' created successfully.")
-else:
-    print(f"Index '{collection_name}' already exists.")
+    logger.info(f"Query embedding batcher enabled (batch {embedding_batcher.max_batch_size}, "
+                f"wait {embedding_batcher_config.get('max_wait_ms', 5)}ms)")
 
-index = pinecone_instance.Index(collection_name)
+# /chat/batch: items per request and items retrieving/generating at once per
+# batch; inference calls still share the server-wide semaphore
+batch_config = config.get("batch", {})
+BATCH_MAX_QUERIES = batch_config.get("max_queries", 64)
+BATCH_CONCURRENCY = batch_config.get("concurrency", 8)
 
-# FastAPI app
-app = FastAPI()
+# Ranked documents per normalised query, so a repeated lookup skips search
+# and reranking; invalidated by the same index version as the answer cache
+retrieval_cache_config = config.get("retrieval_cache", {})
+retrieval_cache: Optional[RetrievalCache] = None
+if retrieval_cache_config.get("enabled", False):
+    retrieval_cache = RetrievalCache(max_bytes=retrieval_cache_config.get("max_bytes", 32 * 1024 * 1024))
+    logger.info(f"Retrieval cache enabled ({retrieval_cache.max_bytes} bytes)")
+
+# Cache, batcher and token stats are exported as gauges on /metrics
+STATS.register("token_usage", lambda: token_usage.stats())
+if answer_cache is not None:
+    STATS.register("answer_cache", answer_cache.stats)
+if retrieval_cache is not None:
+    STATS.register("retrieval_cache", retrieval_cache.stats)
+if embedding_batcher is not None:
+    STATS.register("embedding_batcher", embedding_batcher.stats)
 
 # Hugging Face API setup
 API_URL = f"{config['model']['inference_endpoint']}{config['model']['model']}"
 headers = {"Authorization": f"Bearer {HF_API_KEY}"}
 
+# Shared async HTTP client for the inference endpoint. Connections are kept
+# alive between requests and the semaphore caps in-flight calls per worker.
+http_config = config["model"].get("http", {})
+http_client: Optional[httpx.AsyncClient] = None
+inference_semaphore = asyncio.Semaphore(http_config.get("max_concurrency", 32))
+
+
+def create_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        headers=headers,
+        timeout=httpx.Timeout(
+            http_config.get("timeout", 120.0),
+            connect=http_config.get("connect_timeout", 10.0)
+        ),
+        limits=httpx.Limits(
+            max_connections=http_config.get("max_connections", 50),
+            max_keepalive_connections=http_config.get("max_keepalive_connections", 20)
+        )
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    # Created on first use as well, for hosts that don't run the lifespan
+    global http_client
+    if http_client is None:
+        http_client = create_http_client()
+        logger.info("HTTP client for inference endpoint created")
+    return http_client
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    get_http_client()
+    if STARTUP_MODE == "eager":
+        await ensure_initialized()
+    else:
+        start_initialization()
+    try:
+        yield
+    finally:
+        if embedding_batcher is not None:
+            await embedding_batcher.close()
+        await http_client.aclose()
+
+
+def count_input_tokens(payload: dict):
+    tokens = context_assembler.count_tokens([payload["inputs"]])[0]
+    INPUT_TOKENS.inc(tokens)
+    usage = request_usage.get()
+    if usage is not None:
+        usage["input_tokens"] += tokens
+
+
+def start_request_usage() -> dict:
+    usage = {"input_tokens": 0, "context": None}
+    request_usage.set(usage)
+    return usage
+
+
+def finish_request_usage(usage: dict):
+    """Report the prompt tokens a request sent; answers served from cache send none."""
+    if not usage["input_tokens"]:
+        return
+    token_usage.record(usage["input_tokens"], usage["context"])
+    context = usage["context"]
+    detail = f" (context {context['tokens_before']} -> {context['tokens_after']} tokens)" if context else ""
+    fields = {"input_tokens": usage["input_tokens"]}
+    if context:
+        fields.update(context_tokens_before=context["tokens_before"], context_tokens_after=context["tokens_after"])
+    logger.info(f"Input tokens: {usage['input_tokens']}{detail}", extra=fields)
+
+
+async def query_inference_api(payload: dict):
+    """POST a payload to the inference endpoint and return the decoded JSON."""
+    count_input_tokens(payload)
+    async with inference_semaphore:
+        response = await get_http_client().post(API_URL, json=payload)
+    response.raise_for_status()
+    return response.json()
+
+
+# FastAPI app
+app = FastAPI(lifespan=lifespan)
+
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    """Observe request latency by route template, so path parameters don't add series.
+
+    For /chat/stream this covers retrieval up to the first byte; generation
+    time is in the ``generation`` stage.
+    """
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        endpoint = route.path if route is not None else "unmatched"
+        REQUEST_SECONDS.labels(endpoint, str(status)).observe(time.perf_counter() - start)
+
 
 class Query(BaseModel):
     text: str
     k: Optional[int] = 3
+    # Per-query fusion weights; 0 turns a retriever off. Defaults come from mcp.yaml
+    vector_weight: Optional[float] = Field(None, ge=0)
+    lexical_weight: Optional[float] = Field(None, ge=0)
+    # Only search these corpora (see corpora in mcp.yaml); routed from the text when unset
+    corpora: Optional[List[str]] = None
+
+    @field_validator("corpora")
+    @classmethod
+    def known_corpora(cls, corpora: Optional[List[str]]) -> Optional[List[str]]:
+        unknown = [corpus for corpus in corpora or [] if corpus not in CORPORA]
+        if unknown:
+            raise ValueError(f"Unknown corpora {unknown}, expected some of {list(CORPORA)}")
+        return corpora
+
+
+class BatchQuery(BaseModel):
+    queries: List[Query] = Field(..., min_length=1)
 
 
 class Document(BaseModel):
     content: str
     metadata: Optional[dict] = None
+    score: Optional[float] = None
+    rerank_score: Optional[float] = None
 
 
 class RetrieverTool:
@@ -89,37 +433,269 @@ class RetrieverTool:
             "type": "object",
             "properties": {
                 "query": {"type": "string"},
-                "k": {"type": "integer", "default": 3}
+                "k": {"type": "integer", "default": 3},
+                "corpora": {"type": "array", "items": {"type": "string"}}
             }
         }
         self.collection = index
+        # BM25 searches run here while the calling thread does the vector search
+        self._lexical_pool = ThreadPoolExecutor(thread_name_prefix="lexical")
+
+    def embed(self, query: str):
+        return self.embed_many([query])[0]
+
+    def embed_many(self, queries: List[str]):
+        with timed("embed"):
+            if embedding_cache is not None:
+                # Chunk vectors from ingestion are reused; query vectors stay in memory
+                return embedding_cache.encode(queries, model.encode, persist=False)
+            return model.encode(queries)
+
+    def call(self, query: str, k: int = 3, corpora: Optional[List[str]] = None,
+             vector_weight: Optional[float] = None, lexical_weight: Optional[float] = None,
+             query_embedding=None) -> List[Document]:
+        """The ``k`` best documents for ``query``; see ``call_many``."""
+        query_embeddings = None if query_embedding is None else [query_embedding]
+        return self.call_many([query], k, corpora, vector_weight, lexical_weight, query_embeddings)[0]
+
+    def call_many(self, queries: List[str], k: int = 3, corpora: Optional[List[str]] = None,
+                  vector_weight: Optional[float] = None, lexical_weight: Optional[float] = None,
+                  query_embeddings=None) -> List[List[Document]]:
+        """The ``k`` best documents for each of ``queries``, in the same order.
+
+        Vector search, or (in hybrid mode) vector and BM25 search run
+        concurrently and fused with reciprocal rank fusion. The weights default
+        to mcp.yaml's ``retrieval`` settings; 0 turns a retriever off. With a
+        reranker, ``reranker.max_candidates`` are fetched and the cross-encoder
+        picks the best ``k``. Queries not in the retrieval cache share one
+        encode batch (skipped when ``query_embeddings`` are given) and one
+        multi-query vector search per corpus set.
+        """
+        weights = resolve_weights(vector_weight, lexical_weight)
+        vector_weight, lexical_weight = weights
+        fetch_k, candidates = fetch_sizes(k, lexical_weight)
+        routes = [resolve_corpora(query, corpora) for query in queries]
+        cache_keys = [retrieval_cache_key(query, k, route, weights) for query, route in zip(queries, routes)]
+        version = retrieval_cache_version()
+        results = [lookup_cached_documents(cache_key, version) for cache_key in cache_keys]
+        misses = [i for i, documents in enumerate(results) if documents is None]
+        if not misses:
+            return results
 
-    def call(self, query: str, k: int = 3) -> List[Document]:
         try:
-            query_embedding = model.encode(query)
-            results = self.collection.query(
-                vector=query_embedding.tolist(),
+            lexical = []
+            if lexical_weight:
+                lexical = [self._lexical_pool.submit(self.lexical_matches, queries[i], candidates, routes[i])
+                           for i in misses]
+            vector = []
+            if vector_weight or not lexical_weight:
+                if query_embeddings is None:
+                    embeddings = self.embed_many([queries[i] for i in misses])
+                else:
+                    embeddings = [query_embeddings[i] for i in misses]
+                vector = self.routed_vector_matches(embeddings, candidates, [routes[i] for i in misses])
+            ranked = []
+            for j in range(len(misses)):
+                if not lexical:
+                    ranked.append(vector[j][:fetch_k])
+                    continue
+                rankings, rank_weights = [lexical[j].result()], [lexical_weight]
+                if vector:
+                    rankings.append(vector[j])
+                    rank_weights.append(vector_weight)
+                ranked.append(reciprocal_rank_fusion(rankings, rank_weights)[:fetch_k])
+        except Exception:
+            logger.exception("Error in RetrieverTool")
+            raise
+
+        for i, matches in zip(misses, ranked):
+            documents = self.to_documents(matches)
+            if reranker is not None and len(documents) > 1:
+                documents = rerank_documents(queries[i], documents, k)
+            results[i] = documents[:k]
+            store_cached_documents(cache_keys[i], results[i], version)
+        return results
+
+    def vector_matches(self, query_embedding, k: int, corpora: Optional[List[str]] = None) -> List[dict]:
+        with timed("vector_query"):
+            self.collection.refresh()
+            return self.collection.query(
+                vector=query_embedding,
                 top_k=k,
-                include_metadata=True
+                include_metadata=True,
+                filter=corpus_filter(corpora)
             )
 
-            documents = []
-            matches = results.get("matches", [])
-            if matches:
-                for match in matches:
-                    metadata = match.get("metadata", {})
-                    content = metadata.get("chunk_text", "No content found")
-                    documents.append(Document(content=content, metadata=metadata))
+    def vector_matches_many(self, query_embeddings, k: int, corpora: Optional[List[str]] = None) -> List[List[dict]]:
+        with timed("vector_query"):
+            self.collection.refresh()
+            return self.collection.query_many(query_embeddings, top_k=k, include_metadata=True,
+                                              filter=corpus_filter(corpora))
 
-            return documents
+    def routed_vector_matches(self, query_embeddings, k: int,
+                              routes: List[Optional[List[str]]]) -> List[List[dict]]:
+        """``vector_matches_many`` with a corpus set per query: one search per distinct set."""
+        groups = {}
+        for i, corpora in enumerate(routes):
+            groups.setdefault(tuple(sorted(corpora)) if corpora else None, []).append(i)
+        matches = [None] * len(routes)
+        for corpora, rows in groups.items():
+            results = self.vector_matches_many([query_embeddings[i] for i in rows], k, corpora and list(corpora))
+            for i, result in zip(rows, results):
+                matches[i] = result
+        return matches
 
-        except Exception as e:
-            print(f"Error in RetrieverTool: {str(e)}")
-            print(traceback.format_exc())
-            raise
+    def lexical_matches(self, text: str, k: int, corpora: Optional[List[str]] = None) -> List[dict]:
+        with timed("lexical_query"):
+            lexical_index.refresh()
+            return lexical_index.search(text, k, corpora)
+
+    def to_documents(self, matches: List[dict]) -> List[Document]:
+        """Attach chunk text to ranked matches with one chunk store lookup.
+
+        Vectors stored before the chunk store existed still carry their text in
+        metadata; BM25 matches have no metadata and take source and chunk index
+        from the chunk store. Matches with no text either way are dropped.
+        """
+        if not matches:
+            return []
+        with timed("chunk_lookup"):
+            records = chunk_store.get_records([match["id"] for match in matches]) if chunk_store else {}
+        documents = []
+        missing = []
+        for match in matches:
+            record = records.get(match["id"])
+            metadata = match.get("metadata") or (
+                {"source": record["source"], "chunk_index": record["chunk_index"]} if record else {}
+            )
+            content = (record and record["text"]) or metadata.get("chunk_text")
+            if content is None:
+                missing.append(match["id"])
+                continue
+            documents.append(Document(content=content, metadata=metadata, score=match.get("score")))
+        if missing:
+            # The index and the chunk store are out of step, e.g. a server that
+            # can't see ingestion's chunk_store.path
+            logger.error(
+                f"No text for {len(missing)} of {len(matches)} matches in the chunk store or vector metadata, dropping them",
+                extra={"missing_ids": missing[:10], "chunk_store": chunk_store.path if chunk_store else None}
+            )
+        return documents
+
+
+def reciprocal_rank_fusion(rankings: List[List[dict]], weights: List[float], k: int = RRF_K) -> List[dict]:
+    """Merge ranked match lists, scoring each ID by ``sum(weight / (k + rank))``.
+
+    Merged matches keep the vector store's cosine ``score`` and ``metadata``
+    where they have them, so the score relevance gate still sees cosines.
+    """
+    fused = {}
+    for matches, weight in zip(rankings, weights):
+        for rank, match in enumerate(matches, start=1):
+            entry = fused.setdefault(match["id"], {"id": match["id"], "fusion": 0.0})
+            entry["fusion"] += weight / (k + rank)
+            if "metadata" in match:
+                entry.setdefault("score", match.get("score"))
+                entry.setdefault("metadata", match.get("metadata"))
+    return sorted(fused.values(), key=lambda entry: entry["fusion"], reverse=True)
+
+
+def resolve_weights(vector_weight: Optional[float] = None,
+                    lexical_weight: Optional[float] = None) -> Tuple[float, float]:
+    """Fusion weights with mcp.yaml's defaults filled in; no BM25 without a lexical index."""
+    vector_weight = DEFAULT_VECTOR_WEIGHT if vector_weight is None else vector_weight
+    lexical_weight = DEFAULT_LEXICAL_WEIGHT if lexical_weight is None else lexical_weight
+    if lexical_index is None:
+        lexical_weight = 0.0
+    return vector_weight, lexical_weight
+
+
+def retrieval_weights(query: Query) -> Tuple[float, float]:
+    return resolve_weights(query.vector_weight, query.lexical_weight)
+
+
+def retrieval_cache_key(text: str, k: int, corpora: Optional[List[str]] = None,
+                        weights: Tuple[float, float] = (1.0, 0.0)) -> tuple:
+    """Normalised text, k, corpora and retrieval mode. Vector-only searches share
+    a key whatever the vector weight, which only matters in fusion."""
+    mode = ("hybrid",) + tuple(weights) if weights[1] else ("vector",)
+    return (normalize_query(text), k, tuple(sorted(corpora)) if corpora else None) + mode
+
+
+def retrieval_cache_version():
+    """Index version, read once per search so results are stored under the version they came from."""
+    return read_index_version(INDEX_VERSION_FILE) if retrieval_cache is not None else None
+
+
+def lookup_cached_documents(cache_key: tuple, version) -> Optional[List[Document]]:
+    if retrieval_cache is None:
+        return None
+    cached = retrieval_cache.lookup(cache_key, version)
+    return None if cached is None else [Document(**document) for document in cached]
+
+
+def store_cached_documents(cache_key: tuple, documents: List[Document], version):
+    if retrieval_cache is not None:
+        retrieval_cache.store(cache_key, [document.model_dump() for document in documents], version)
+
+
+def rerank_documents(query_text: str, documents: List[Document], k: int) -> List[Document]:
+    with timed("rerank"):
+        ranked = reranker.rerank(query_text, [doc.content for doc in documents], k)
+    reranked = []
+    for position, score in ranked:
+        document = documents[position]
+        document.rerank_score = score
+        reranked.append(document)
+    return reranked
+
+
+def resolve_corpora(text: str, corpora: Optional[List[str]] = None) -> Optional[List[str]]:
+    """Corpora to search: the ones asked for, else the router's pick; None means all."""
+    if corpora:
+        return corpora
+    if corpus_router is not None:
+        return corpus_router.route(text)
+    return None
+
+
+def fetch_sizes(k: int, lexical_weight: float) -> Tuple[int, int]:
+    """``(fetch_k, candidates)``: hits to hand the reranker, and hits each retriever returns."""
+    fetch_k = max(k, reranker.max_candidates) if reranker is not None else k
+    return fetch_k, max(fetch_k, HYBRID_CANDIDATES) if lexical_weight else fetch_k
 
 
-def check_relevance(context: str, question: str) -> bool:
+async def search_documents(query: Query, query_embedding) -> List[Document]:
+    """``RetrieverTool.call`` for a /chat query, off the event loop."""
+    return await run_in_threadpool(
+        retriever_tool.call, query.text, query.k, query.corpora, query.vector_weight, query.lexical_weight,
+        query_embedding
+    )
+
+
+async def search_documents_many(queries: List[Query], query_embeddings) -> List[List[Document]]:
+    """``RetrieverTool.call_many`` for /chat/batch, one call per distinct set of
+    retrieval parameters (usually one for the whole batch), run concurrently."""
+    groups = {}
+    for i, query in enumerate(queries):
+        params = (query.k, tuple(query.corpora) if query.corpora else None, query.vector_weight, query.lexical_weight)
+        groups.setdefault(params, []).append(i)
+
+    async def search_group(params: tuple, rows: List[int]):
+        k, corpora, vector_weight, lexical_weight = params
+        return rows, await run_in_threadpool(
+            retriever_tool.call_many, [queries[i].text for i in rows], k, corpora and list(corpora),
+            vector_weight, lexical_weight, [query_embeddings[i] for i in rows]
+        )
+
+    documents = [None] * len(queries)
+    for rows, results in await asyncio.gather(*(search_group(params, rows) for params, rows in groups.items())):
+        for i, result in zip(rows, results):
+            documents[i] = result
+    return documents
+
+
+async def check_relevance(context: str, question: str) -> bool:
     relevance_prompt = f"""
 Is the following question relevant to the context below? Answer only YES or NO.
 
@@ -138,17 +714,15 @@ Question:
     }
 
     try:
-        response = requests.post(API_URL, headers=headers, json=payload)
-        response.raise_for_status()
-        response_data = response.json()
-        print("Relevance check response:", response_data)
+        response_data = await query_inference_api(payload)
+        logger.debug(f"Relevance check response: {response_data}")
 
         if isinstance(response_data, list) and len(response_data) > 0:
             generated_text = response_data[0].get("generated_text", "").strip().lower()
         elif isinstance(response_data, dict):
             generated_text = response_data.get("generated_text", "").strip().lower()
         else:
-            print("Unexpected response format for relevance check.")
+            logger.warning("Unexpected response format for relevance check")
             return False
 
         if "yes" in generated_text:
@@ -156,94 +730,419 @@ Question:
         else:
             return False
 
-    except Exception as e:
-        print(f"Error during relevance check: {str(e)}")
+    except Exception:
+        logger.exception("Error during relevance check")
         return True  # fallback: allow if relevance check fails
 
 
-# Initialize tools
-retriever_tool = RetrieverTool()
+NO_DOCUMENTS_RESPONSE = "I couldn't find relevant information. Please clarify your question."
+NOT_RELEVANT_RESPONSE = "Your question doesn't seem related to the document content. Please clarify your question."
+
+
+# Sentinel the single-pass prompt asks the model to emit for off-topic questions
+NOT_RELEVANT_MARKER = "NOT_RELEVANT"
+
+
+def build_answer_prompt(context: str, question: str, single_pass: bool = False) -> str:
+    relevance_instruction = ""
+    if single_pass:
+        relevance_instruction = (
+            f" If the question is not related to the context at all, reply with exactly "
+            f"{NOT_RELEVANT_MARKER} and nothing else."
+        )
+    return f"""Context information is below.
+---------------------
+{context}
+---------------------
+Given the context information, please answer the following question. If you cannot find the answer in the context, say "I don't know."{relevance_instruction}
+
+Question: {question}"""
+
+
+def is_not_relevant_answer(text: str) -> bool:
+    return text.strip().startswith(NOT_RELEVANT_MARKER)
+
+
+def passes_score_gate(documents: List[Document]) -> bool:
+    """Local relevance check: the best retrieval score must reach the threshold."""
+    scores = [doc.score for doc in documents if doc.score is not None]
+    if not scores:
+        return True  # fallback: allow if the store returned no scores
+    return max(scores) >= SIMILARITY_THRESHOLD
+
+
+def build_answer_payload(prompt: str, stream: bool = False) -> dict:
+    payload = {
+        "inputs": prompt,
+        "parameters": {
+            "max_new_tokens": config['model']['max_tokens'],
+            "temperature": config['model']['temperature'],
+            "top_p": 0.95,
+            "do_sample": True
+        }
+    }
+    if stream:
+        payload["stream"] = True
+    return payload
+
+
+def extract_generated_text(response_data, prompt: str) -> str:
+    """Pull the completion out of an inference response, dropping an echoed prompt."""
+    if isinstance(response_data, list) and len(response_data) > 0:
+        if "generated_text" not in response_data[0]:
+            return str(response_data[0])
+        generated_text = response_data[0]["generated_text"]
+    elif isinstance(response_data, dict) and "generated_text" in response_data:
+        generated_text = response_data["generated_text"]
+    else:
+        return str(response_data)
+
+    if generated_text.startswith(prompt):
+        generated_text = generated_text.replace(prompt, "").strip()
+    return generated_text
+
+
+def format_http_error(e: httpx.HTTPError) -> str:
+    error_msg = f"Error calling Hugging Face API: {str(e)}"
+    if isinstance(e, httpx.HTTPStatusError):
+        error_msg += f"\nAPI Response: {e.response.text}"
+    return error_msg
+
+
+async def stream_inference_api(payload: dict) -> AsyncIterator[str]:
+    """Yield generated tokens from the inference endpoint's server-sent events."""
+    count_input_tokens(payload)
+    async with inference_semaphore:
+        async with get_http_client().stream("POST", API_URL, json=payload) as response:
+            if response.is_error:
+                await response.aread()
+                response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                event = json.loads(line[len("data:"):])
+                token = event.get("token") or {}
+                if token.get("special"):
+                    continue
+                if token.get("text"):
+                    yield token["text"]
+
+
+def sse_event(data: dict) -> str:
+    return f"data: {json.dumps(data)}\n\n"
+
+
+async def retrieve_relevant_context(query: Query, query_embedding, mode: str = RELEVANCE_MODE,
+                                    documents: Optional[List[Document]] = None) -> Tuple[Optional[str], Optional[str]]:
+    """Run retrieval, unless ``documents`` were already retrieved, and the relevance check for ``mode``.
+
+    Returns ``(context, None)`` when generation should proceed, or
+    ``(None, message)`` with the canned reply to send instead. In
+    ``single_pass`` mode the check is deferred to the answer prompt.
+    """
+    if documents is None:
+        documents = await search_documents(query, query_embedding)
+
+    if not documents:
+        return None, NO_DOCUMENTS_RESPONSE
+
+    # Prepare context from documents: overlapping neighbours merged,
+    # near-duplicates dropped, cut to the token budget
+    passages = [(doc.content, doc.metadata) for doc in documents]
+    with timed("context_assembly"):
+        context, context_stats = context_assembler.assemble(passages)
+    usage = request_usage.get()
+    if usage is not None:
+        usage["context"] = context_stats
+
+    # Step 1: Check relevance first, on a smaller slice of the context
+    if mode == "llm":
+        relevance_context = context
+        if context_stats["tokens_after"] > RELEVANCE_CONTEXT_TOKENS:
+            relevance_context, _ = context_assembler.assemble(passages, RELEVANCE_CONTEXT_TOKENS)
+        with timed("relevance"):
+            is_relevant = await check_relevance(relevance_context, query.text)
+    elif mode == "score":
+        is_relevant = passes_score_gate(documents)
+    else:
+        is_relevant = True
+
+    if not is_relevant:
+        return None, NOT_RELEVANT_RESPONSE
+
+    return context, None
+
+
+async def embed_query(text: str):
+    """Embed a query off the event loop, coalescing with concurrent requests if enabled."""
+    with timed("query_embedding"):
+        if embedding_batcher is not None:
+            return await embedding_batcher.embed(text)
+        return await run_in_threadpool(retriever_tool.embed, text)
+
+
+def answer_cache_key(query: Query):
+    corpora = resolve_corpora(query.text, query.corpora)
+    return (query.k,) + retrieval_weights(query) + (tuple(sorted(corpora)) if corpora else None,)
+
+
+def answer_cache_version():
+    """Index version, read once per request before retrieval so an answer is
+    stored under the version its context came from. The version file is local:
+    a server deployed apart from ingestion never sees it change and relies on
+    ``answer_cache.ttl_seconds`` alone."""
+    return read_index_version(INDEX_VERSION_FILE) if answer_cache is not None else None
+
+
+def lookup_cached_answer(query: Query, query_embedding, version) -> Optional[str]:
+    if answer_cache is None:
+        return None
+    return answer_cache.lookup(query_embedding, answer_cache_key(query), version)
+
+
+def store_cached_answer(query: Query, query_embedding, answer: str, version):
+    if answer_cache is not None:
+        answer_cache.store(query_embedding, answer_cache_key(query), answer, version)
+
+
+async def answer_query(query: Query, mode: str = RELEVANCE_MODE) -> str:
+    """Answer from the cache, or retrieve, gate and generate; HTTP errors propagate."""
+    await ensure_initialized()
+    query_embedding = await embed_query(query.text)
+    version = answer_cache_version()
+    cached = lookup_cached_answer(query, query_embedding, version)
+    if cached is not None:
+        return cached
+
+    usage = start_request_usage()
+    answer = await generate_answer(query, query_embedding, mode)
+    finish_request_usage(usage)
+    store_cached_answer(query, query_embedding, answer, version)
+    return answer
+
+
+async def generate_answer(query: Query, query_embedding, mode: str = RELEVANCE_MODE,
+                          documents: Optional[List[Document]] = None) -> str:
+    context, message = await retrieve_relevant_context(query, query_embedding, mode, documents)
+    if message:
+        return message
+
+    # Step 2: If relevant, proceed to answer the question
+    single_pass = mode == "single_pass"
+    prompt = build_answer_prompt(context, query.text, single_pass=single_pass)
+    with timed("generation"):
+        response_data = await query_inference_api(build_answer_payload(prompt))
+
+    logger.debug(f"API Response: {response_data}")
+
+    answer = extract_generated_text(response_data, prompt)
+    if single_pass and is_not_relevant_answer(answer):
+        return NOT_RELEVANT_RESPONSE
+    return answer
+
+
+async def gate_single_pass_tokens(tokens: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Hold back leading tokens until they can't be the NOT_RELEVANT marker."""
+    buffered = ""
+    async for token in tokens:
+        if buffered is None:
+            yield token
+            continue
+        buffered += token
+        head = buffered.lstrip()
+        if len(head) < len(NOT_RELEVANT_MARKER) and NOT_RELEVANT_MARKER.startswith(head):
+            continue
+        if is_not_relevant_answer(head):
+            yield NOT_RELEVANT_RESPONSE
+            return
+        yield buffered
+        buffered = None
+    if buffered:
+        yield NOT_RELEVANT_RESPONSE if is_not_relevant_answer(buffered) else buffered
 
 
 @app.post("/chat")
 async def chat(query: Query):
     try:
-        # Retrieve relevant documents
-        documents = retriever_tool.call(query.text, query.k)
+        return {"response": await answer_query(query)}
 
-        if not documents:
-            return {"response": "I couldn't find relevant information. Please clarify your question."}
+    except httpx.HTTPError as e:
+        error_msg = format_http_error(e)
+        logger.error(error_msg)
+        raise HTTPException(status_code=500, detail=error_msg)
 
-        # Prepare context from documents
-        context = "\n\n".join([doc.content for doc in documents])
+    except Exception as e:
+        error_msg = f"Error processing request: {str(e)}\n{traceback.format_exc()}"
+        logger.exception("Error processing request")
+        raise HTTPException(status_code=500, detail=error_msg)
 
-        # Step 1: Check relevance first
-        is_relevant = check_relevance(context, query.text)
 
-        if not is_relevant:
-            return {"response": "Your question doesn't seem related to the document content. Please clarify your question."}
+@app.post("/chat/batch")
+async def chat_batch(batch: BatchQuery):
+    """Answer several queries in one request.
 
-        # Step 2: If relevant, proceed to answer the question
-        prompt = f"""Context information is below.
----------------------
-{context}
----------------------
-Given the context information, please answer the following question. If you cannot find the answer in the context, say "I don't know."
+    The queries are embedded in one batch; those without a cached answer are
+    retrieved with ``RetrieverTool.call_many`` (one multi-query vector search,
+    BM25 searches alongside), and generation then runs for up to
+    ``batch.concurrency`` items at once. ``results`` follow the order of
+    ``queries``, each ``{"response": ...}`` or ``{"error": ...}``.
+    """
+    queries = batch.queries
+    if len(queries) > BATCH_MAX_QUERIES:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_QUERIES} queries per batch")
+    try:
+        await ensure_initialized()
+        with timed("query_embedding"):
+            query_embeddings = await run_in_threadpool(retriever_tool.embed_many, [query.text for query in queries])
+        version = answer_cache_version()
+        results = [
+            None if cached is None else {"response": cached}
+            for cached in (lookup_cached_answer(query, query_embedding, version)
+                           for query, query_embedding in zip(queries, query_embeddings))
+        ]
+        pending = [i for i, result in enumerate(results) if result is None]
+        documents = await search_documents_many([queries[i] for i in pending],
+                                                [query_embeddings[i] for i in pending])
+    except Exception as e:
+        error_msg = f"Error processing request: {str(e)}\n{traceback.format_exc()}"
+        logger.exception("Error processing batch request")
+        raise HTTPException(status_code=500, detail=error_msg)
 
-Question: {query.text}"""
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
 
-        payload = {
-            "inputs": prompt,
-            "parameters": {
-                "max_new_tokens": config['model']['max_tokens'],
-                "temperature": config['model']['temperature'],
-                "top_p": 0.95,
-                "do_sample": True
-            }
-        }
+    async def answer_item(query: Query, query_embedding, query_documents: List[Document]) -> dict:
+        async with semaphore:
+            usage = start_request_usage()
+            try:
+                answer = await generate_answer(query, query_embedding, RELEVANCE_MODE, query_documents)
+            except httpx.HTTPError as e:
+                error_msg = format_http_error(e)
+                logger.error(error_msg)
+                return {"error": error_msg}
+            except Exception as e:
+                logger.exception("Error processing batch item")
+                return {"error": f"Error processing request: {str(e)}"}
+        finish_request_usage(usage)
+        store_cached_answer(query, query_embedding, answer, version)
+        return {"response": answer}
+
+    answers = await asyncio.gather(*(
+        answer_item(queries[i], query_embeddings[i], query_documents)
+        for i, query_documents in zip(pending, documents)
+    ))
+    for i, answer in zip(pending, answers):
+        results[i] = answer
+    return {"results": results}
 
-        try:
-            response = requests.post(API_URL, headers=headers, json=payload, stream=False)
-            response.raise_for_status()
-            response_data = response.json()
-
-            print("API Response:", response_data)
-
-            if isinstance(response_data, list) and len(response_data) > 0:
-                if "generated_text" in response_data[0]:
-                    generated_text = response_data[0]["generated_text"]
-                    if generated_text.startswith(prompt):
-                        generated_text = generated_text.replace(prompt, "").strip()
-                    return {"response": generated_text}
-                else:
-                    return {"response": str(response_data[0])}
-            elif isinstance(response_data, dict) and "generated_text" in response_data:
-                generated_text = response_data["generated_text"]
-                if generated_text.startswith(prompt):
-                    generated_text = generated_text.replace(prompt, "").strip()
-                return {"response": generated_text}
-            else:
-                return {"response": str(response_data)}
-
-        except requests.exceptions.RequestException as e:
-            error_msg = f"Error calling Hugging Face API: {str(e)}"
-            if hasattr(e.response, 'text'):
-                error_msg += f"\nAPI Response: {e.response.text}"
-            print(error_msg)
-            raise HTTPException(status_code=500, detail=error_msg)
 
+@app.post("/chat/stream")
+async def chat_stream(query: Query):
+    """Server-sent events variant of /chat.
+
+    Each event carries ``{"token": ...}``; the stream ends with ``{"done": true}``
+    or, if generation fails midway, ``{"error": ...}``.
+    """
+    usage = start_request_usage()
+    try:
+        await ensure_initialized()
+        query_embedding = await embed_query(query.text)
+        version = answer_cache_version()
+        cached = lookup_cached_answer(query, query_embedding, version)
+        if cached is not None:
+            context, message = None, cached
+        else:
+            context, message = await retrieve_relevant_context(query, query_embedding)
     except Exception as e:
         error_msg = f"Error processing request: {str(e)}\n{traceback.format_exc()}"
-        print(error_msg)
+        logger.exception("Error processing request")
         raise HTTPException(status_code=500, detail=error_msg)
 
+    async def events():
+        if message:
+            finish_request_usage(usage)
+            yield sse_event({"token": message})
+            yield sse_event({"done": True})
+            return
+
+        request_usage.set(usage)
+
+        single_pass = RELEVANCE_MODE == "single_pass"
+        prompt = build_answer_prompt(context, query.text, single_pass=single_pass)
+        tokens = stream_inference_api(build_answer_payload(prompt, stream=True))
+        if single_pass:
+            tokens = gate_single_pass_tokens(tokens)
+        answer_parts = []
+        start = time.perf_counter()
+        try:
+            async for token in tokens:
+                if not answer_parts:
+                    observe_stage("generation_first_token", time.perf_counter() - start)
+                answer_parts.append(token)
+                yield sse_event({"token": token})
+        except httpx.HTTPError as e:
+            error_msg = format_http_error(e)
+            logger.error(error_msg)
+            yield sse_event({"error": error_msg})
+            return
+        observe_stage("generation", time.perf_counter() - start)
+        finish_request_usage(usage)
+        store_cached_answer(query, query_embedding, "".join(answer_parts), version)
+        yield sse_event({"done": True})
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
 
 @app.get("/health")
 async def health_check():
     return {"status": "ok"}
 
 
+@app.get("/ready")
+async def readiness_check():
+    status_code = 200 if startup_state["status"] == "ready" else 503
+    return JSONResponse(status_code=status_code, content=startup_state)
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus exposition: stage and request latency histograms, token and cache stats."""
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
+
+
+@app.get("/embeddings/stats")
+async def embedding_stats():
+    if embedding_batcher is None:
+        return {"enabled": False}
+    return {"enabled": True, **embedding_batcher.stats()}
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    if answer_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **answer_cache.stats()}
+
+
+@app.get("/cache/retrieval/stats")
+async def retrieval_cache_stats():
+    if retrieval_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **retrieval_cache.stats()}
+
+
+@app.get("/context/stats")
+async def context_stats():
+    return {
+        "tokenizer": context_usage_state["tokenizer"],
+        "max_tokens": context_assembler.max_tokens,
+        "relevance_max_tokens": RELEVANCE_CONTEXT_TOKENS,
+        **token_usage.stats()
+    }
+
+
 if __name__ == "__main__":
-    print("Starting FastAPI server...")
+    logger.info("Starting FastAPI server")
     import uvicorn
-    uvicorn.run(app, host=config["server"]["host"], port=config["server"]["port"])
+    # Keep the logging configured above instead of uvicorn's defaults
+    uvicorn.run(app, host=config["server"]["host"], port=config["server"]["port"], log_config=None)
@@ -0,0 +1,107 @@
+import json
+import logging
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+
+# Spans from sub-millisecond cache hits up to slow generations
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+REGISTRY = CollectorRegistry()
+
+STAGE_SECONDS = Histogram(
+    "rag_stage_duration_seconds", "Time spent in each stage of answering a query",
+    ["stage"], buckets=LATENCY_BUCKETS, registry=REGISTRY
+)
+REQUEST_SECONDS = Histogram(
+    "rag_request_duration_seconds", "End-to-end request latency by endpoint",
+    ["endpoint", "status"], buckets=LATENCY_BUCKETS, registry=REGISTRY
+)
+INPUT_TOKENS = Counter(
+    "rag_input_tokens", "Prompt tokens sent to the inference endpoint", registry=REGISTRY
+)
+
+# Called with (stage, seconds) for every observation; benchmark_load.py keeps raw timings this way
+stage_listeners: List[Callable[[str, float], None]] = []
+
+
+def observe_stage(stage: str, seconds: float):
+    STAGE_SECONDS.labels(stage).observe(seconds)
+    for listener in stage_listeners:
+        listener(stage, seconds)
+
+
+@contextmanager
+def timed(stage: str):
+    """Observe the duration of the enclosed block in ``rag_stage_duration_seconds``."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+
+class StatsCollector:
+    """Expose ``stats()`` dicts (cache, batcher, ...) as gauges at scrape time.
+
+    Every numeric value of the dict returned by a registered source becomes
+    ``rag_<prefix>_<key>``; nested and non-numeric values are skipped.
+    """
+
+    def __init__(self):
+        self.sources: Dict[str, Callable[[], dict]] = {}
+
+    def register(self, prefix: str, stats_fn: Callable[[], dict]):
+        self.sources[prefix] = stats_fn
+
+    def collect(self):
+        for prefix, stats_fn in self.sources.items():
+            try:
+                stats = stats_fn()
+            except Exception:
+                continue
+            for key, value in stats.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                yield GaugeMetricFamily(f"rag_{prefix}_{key}", f"{prefix} {key.replace('_', ' ')}", value=value)
+
+
+STATS = StatsCollector()
+REGISTRY.register(STATS)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and any ``extra`` fields."""
+
+    _RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in self._RESERVED})
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(level: str = "INFO", fmt: str = "json"):
+    """Send root logging to stderr as JSON lines (``fmt: json``) or plain text."""
+    handler = logging.StreamHandler()
+    if fmt == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(level.upper())
@@ -1,9 +1,23 @@
+import argparse
+import json
 import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from PyPDF2 import PdfReader
 import logging
+import yaml
 from dotenv import load_dotenv
-from sentence_transformers import SentenceTransformer
-from pinecone import Pinecone, ServerlessSpec
+from chunk_store import DEFAULT_CHUNK_STORE_PATH, ChunkStore, chunk_store_enabled
+from chunking import create_chunker
+from corpora import corpora_signature, corpus_for_path, load_corpora
+from embedding_cache import EmbeddingCache
+from embeddings import embedding_model_id, load_embedding_model
+from document_manifest import (DEFAULT_MANIFEST_PATH, DocumentManifest, chunk_id, file_sha256,
+                               legacy_chunk_ids, text_sha256)
+from index_version import DEFAULT_VERSION_FILE, bump_index_version
+from lexical_index import DEFAULT_LEXICAL_INDEX_PATH, LexicalIndex
+from vector_store import create_vector_store
 
 # Load environment variables from .env file
 load_dotenv()
@@ -15,6 +29,20 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Load configuration
+with open("mcp/mcp.yaml", "r") as f:
+    config = yaml.safe_load(f)
+
+ingestion_config = config.get("ingestion", {})
+EMBED_BATCH_SIZE = ingestion_config.get("embed_batch_size", 64)
+UPSERT_BATCH_SIZE = ingestion_config.get("upsert_batch_size", 100)
+EXTRACT_WORKERS = ingestion_config.get("extract_workers", os.cpu_count() or 1)
+MAX_PENDING_DOCUMENTS = ingestion_config.get("max_pending_documents", 16)
+MAX_PENDING_UPSERTS = ingestion_config.get("max_pending_upserts", 2)
+MANIFEST_PATH = ingestion_config.get("manifest", DEFAULT_MANIFEST_PATH)
+# Every chunk is tagged with the corpus its directory belongs to
+CORPORA = load_corpora(config)
+
 def extract_text_from_txt(txt_path: str) -> str:
     """Extract text from a TXT file."""
     try:
@@ -29,113 +57,397 @@ def extract_text_from_pdf(pdf_path: str) -> str:
     try:
         with open(pdf_path, 'rb') as file:
             reader = PdfReader(file)
-            text = ""
+            pages = []
             for page in reader.pages:
                 page_text = page.extract_text()
                 if page_text:
-                    text += page_text + "\n"
-            return text
+                    pages.append(page_text + "\n")
+            return "".join(pages)
     except Exception as e:
         logger.error(f"Error processing PDF {pdf_path}: {str(e)}")
         return ""
 
-def chunk_text(text: str, chunk_size: int = 1000, overlap: int = 200) -> list:
-    """Split text into overlapping chunks."""
-    chunks = []
-    start = 0
-    text_length = len(text)
-
-    while start < text_length:
-        end = start + chunk_size
-        chunk = text[start:end]
-        chunks.append(chunk)
-        start = end - overlap
-
-    return chunks
-
-# Initialize Pinecone instance
-pinecone_api_key = os.getenv("PINECONE_API_KEY")
-if not pinecone_api_key:
-    raise ValueError("Pinecone API key not found in environment variables")
-
-pinecone_instance = Pinecone(api_key=pinecone_api_key)
-
-# Example: Create an index if it doesn't exist
-collection_name = "documents"
-if collection_name not in pinecone_instance.list_indexes().names():
-    pinecone_instance.create_index(
-        name=collection_name,
-        dimension=384,
-        metric="cosine",
-        spec=ServerlessSpec(cloud="aws", region="us-east-1")
-    )
-    logger.info(f"Created new index '{collection_name}'")
-else:
-    logger.info(f"Index '{collection_name}' already exists")
+def extract_text(path: str) -> tuple:
+    """Extract text from a supported document; runs inside the extraction pool."""
+    if path.endswith('.pdf'):
+        return path, extract_text_from_pdf(path)
+    if path.endswith('.txt'):
+        return path, extract_text_from_txt(path)
+    logger.warning(f"Unsupported file type: {path}")
+    return path, ""
+
+# The vector store and sentence transformer are created by init_resources() in
+# the main process only, so extraction workers start without loading them.
+index = None
+model = None
+embedding_cache = None
+chunker = None
+chunk_store = None
+lexical_index = None
+
+
+def init_resources():
+    global index, model, embedding_cache, chunker, chunk_store, lexical_index
+    if index is None:
+        # Initialize the vector store selected by vector_store.type
+        index = create_vector_store(config["vector_store"])
+        logger.info(f"Using {config['vector_store'].get('type', 'pinecone')} vector store")
+    if model is None:
+        # Initialize sentence transformer
+        model = load_embedding_model(config["vector_store"]["embedding_model"])
+    cache_config = config.get("embedding_cache", {})
+    if embedding_cache is None and cache_config.get("enabled", False):
+        embedding_cache = EmbeddingCache(
+            cache_config.get("path", "embeddings/cache"),
+            embedding_model_id(config["vector_store"]["embedding_model"]),
+            config["vector_store"].get("dimension", 384)
+        )
+        logger.info(f"Embedding cache at {embedding_cache.path} holds {len(embedding_cache)} vectors")
+    if chunker is None:
+        # Token-aware chunkers size chunks with the embedding model's tokenizer
+        chunker = create_chunker(config.get("chunking"), model)
+        logger.info(f"Chunking with {chunker.signature}")
+    chunk_store_config = config.get("chunk_store", {})
+    if chunk_store is None and chunk_store_enabled(config):
+        # Chunk text lives here instead of in vector metadata
+        chunk_store = ChunkStore(chunk_store_config.get("path", DEFAULT_CHUNK_STORE_PATH))
+        logger.info(f"Chunk store at {chunk_store.path} holds {len(chunk_store)} chunks")
+    lexical_config = config.get("lexical_index", {})
+    if lexical_index is None and lexical_config.get("enabled", False):
+        # BM25 index for hybrid retrieval, kept in step with the vector store
+        lexical_index = LexicalIndex(lexical_config.get("path", DEFAULT_LEXICAL_INDEX_PATH))
+        logger.info(f"Lexical index at {lexical_index.path} holds {len(lexical_index)} chunks")
+
+
+class IngestionProgress:
+    """Track how many chunks have been stored and the running throughput."""
+
+    def __init__(self):
+        self.start_time = time.perf_counter()
+        self.chunks = 0
+        self.failed = 0
+
+    def chunks_per_second(self) -> float:
+        elapsed = time.perf_counter() - self.start_time
+        return self.chunks / elapsed if elapsed > 0 else 0.0
+
+    def report(self):
+        logger.info(
+            f"Stored {self.chunks} chunks ({self.failed} failed) "
+            f"at {self.chunks_per_second():.1f} chunks/s"
+        )
+
+
+class BackgroundUpserter:
+    """Upsert batches on a worker thread so encoding the next batch overlaps the upload.
+
+    At most ``max_pending`` batches are queued; ``submit`` blocks beyond that.
+    """
+
+    def __init__(self, progress: IngestionProgress, max_pending: int = MAX_PENDING_UPSERTS):
+        self.progress = progress
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="upsert")
+        self._pending = deque()
+        self.failed_ids = set()
+
+    def _upsert(self, batch: list):
+        try:
+            index.upsert(batch)
+            self.progress.chunks += len(batch)
+        except Exception as e:
+            self.progress.failed += len(batch)
+            self.failed_ids.update(doc_id for doc_id, _, _ in batch)
+            logger.error(f"Error upserting batch of {len(batch)} chunks: {str(e)}")
+
+    def submit(self, batch: list):
+        while len(self._pending) >= self.max_pending:
+            self._pending.popleft().result()
+        self._pending.append(self._executor.submit(self._upsert, batch))
+
+    def close(self):
+        while self._pending:
+            self._pending.popleft().result()
+        self._executor.shutdown()
+
+
+def embed_and_upsert(records: list, upserter: BackgroundUpserter,
+                     embed_batch_size: int = EMBED_BATCH_SIZE,
+                     upsert_batch_size: int = UPSERT_BATCH_SIZE):
+    """Encode a list of (doc_id, chunk, metadata) records and queue them for bulk upsert."""
+    if not records:
+        return
+
+    texts = [chunk for _, chunk, _ in records]
+    if embedding_cache is not None:
+        # Boilerplate repeated across documents is only ever encoded once
+        embeddings = embedding_cache.encode(texts, model.encode, batch_size=embed_batch_size)
+    else:
+        embeddings = model.encode(texts, batch_size=embed_batch_size)
+
+    vectors = [
+        (doc_id, embedding.tolist(), metadata)
+        for (doc_id, _, metadata), embedding in zip(records, embeddings)
+    ]
+    for start in range(0, len(vectors), upsert_batch_size):
+        upserter.submit(vectors[start:start + upsert_batch_size])
+
+    upserter.progress.report()
+
 
-index = pinecone_instance.Index(collection_name)
+def iter_extracted(document_paths: list, workers: int = EXTRACT_WORKERS,
+                   max_pending: int = MAX_PENDING_DOCUMENTS):
+    """Yield ``(path, text)`` as documents finish extracting in a process pool.
 
-# Initialize sentence transformer
-model = SentenceTransformer('all-MiniLM-L6-v2')
+    No more than ``max_pending`` documents are in flight or waiting to be
+    consumed, which bounds memory while keeping the embedding stage fed.
+    """
+    paths = iter(document_paths)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = set()
+        for path in paths:
+            in_flight.add(pool.submit(extract_text, path))
+            if len(in_flight) >= max_pending:
+                break
 
-def process_documents(pdf_directories: list, collection_name: str = "documents"):
-    """Process PDFs from multiple directories and store them in Pinecone."""
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                next_path = next(paths, None)
+                if next_path is not None:
+                    in_flight.add(pool.submit(extract_text, next_path))
+                yield future.result()
+
+def is_under(path: str, directories: list) -> bool:
+    path = os.path.normpath(path)
+    return any(path.startswith(os.path.normpath(directory) + os.sep) for directory in directories)
+
+
+def delete_vectors(ids: list, batch_size: int = UPSERT_BATCH_SIZE):
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start:start + batch_size]
+        try:
+            index.delete(batch)
+        except Exception as e:
+            logger.error(f"Error deleting batch of {len(batch)} stale chunks: {str(e)}")
+
+
+def process_documents(pdf_directories: list, collection_name: str = "documents",
+                      embed_batch_size: int = EMBED_BATCH_SIZE,
+                      upsert_batch_size: int = UPSERT_BATCH_SIZE,
+                      extract_workers: int = EXTRACT_WORKERS,
+                      full: bool = False, manifest_path: str = MANIFEST_PATH,
+                      changes: dict = None):
+    """Process PDFs from multiple directories and store them in the vector store.
+
+    Text extraction runs in a pool of ``extract_workers`` processes, encoding
+    runs in this process and upserts go out on a background thread, so the
+    three stages overlap. Chunks are buffered across documents and flushed
+    once ``upsert_batch_size`` of them are pending.
+
+    Runs are incremental: files whose size/mtime or content hash match the
+    manifest are skipped, unchanged chunks of changed files are not re-embedded,
+    and vectors for chunks or files that disappeared are deleted. ``full``
+    ignores the manifest and re-embeds everything.
+
+    ``changes`` is a scraper change list (``added``/``modified``/``removed``
+    file paths). When given, only those files are looked at instead of
+    walking every directory.
+    """
     logger.info("Starting document processing...")
+    init_resources()
+    progress = IngestionProgress()
+    upserter = BackgroundUpserter(progress)
+    manifest = DocumentManifest(manifest_path)
+    pending = []
+    stale_ids = []
+    # Chunks of changed files that went away, deleted once the file is fully stored
+    replaced = {}
 
-    for directory in pdf_directories:
-        logger.info(f"Processing directory: {directory}")
-
-        # Get all PDF and text files
-        document_paths = []
-        for root, _, files in os.walk(directory):
-            for file in files:
-                if file.lower().endswith(('.pdf', '.txt')):
-                    document_paths.append(os.path.join(root, file))
-
-        logger.info(f"Found {len(document_paths)} documents in {directory}")
-
-        # Process each document
-        for path in document_paths:
-            logger.info(f"Processing document: {path}")
-
-            # Extract text
-            if path.endswith('.pdf'):
-                text = extract_text_from_pdf(path)
-            elif path.endswith('.txt'):
-                text = extract_text_from_txt(path)
-            else:
-                logger.warning(f"Unsupported file type: {path}")
-                continue
+    # Get all PDF and text files
+    document_paths = []
+    if changes is not None:
+        document_paths = [
+            path for path in changes.get("added", []) + changes.get("modified", [])
+            if os.path.exists(path) and is_under(path, pdf_directories)
+        ]
+        logger.info(f"Change list has {len(document_paths)} added or modified documents")
+    else:
+        for directory in pdf_directories:
+            logger.info(f"Processing directory: {directory}")
+            directory_paths = []
+            for root, _, files in os.walk(directory):
+                for file in files:
+                    if file.lower().endswith(('.pdf', '.txt')):
+                        directory_paths.append(os.path.join(root, file))
+
+            logger.info(f"Found {len(directory_paths)} documents in {directory}")
+            document_paths.extend(directory_paths)
+
+    # Work out which documents are new or changed since the last run. A new
+    # chunker, or a lexical index or chunk store that has yet to be built,
+    # re-chunks every file; chunks whose text survives keep their vectors.
+    rechunk = False
+    if manifest.chunker is not None and manifest.chunker != chunker.signature:
+        logger.info(f"Chunker changed from {manifest.chunker}, re-chunking every document")
+        rechunk = True
+    if lexical_index is not None and not len(lexical_index) and manifest.documents:
+        logger.info("Lexical index is empty, re-chunking every document to build it")
+        rechunk = True
+    if chunk_store is not None and not len(chunk_store) and manifest.documents:
+        logger.info("Chunk store is empty, re-chunking every document to fill it")
+        rechunk = True
+    # Vectors stored under another corpus mapping (or before tagging) carry
+    # the wrong tag; re-upsert everything, the embedding cache saves re-encoding
+    corpora = corpora_signature(CORPORA)
+    if manifest.documents and manifest.corpora != corpora:
+        logger.info("Corpus mapping changed, re-tagging every document")
+        rechunk = full = True
+    # Vectors upserted while their text went to the chunk store have none in
+    # metadata, which a remote index's readers need
+    text_in_metadata = chunk_store is None
+    if manifest.documents and text_in_metadata and not manifest.text_in_metadata:
+        logger.info("Chunk text moved back into vector metadata, re-upserting every document")
+        rechunk = full = True
+    if rechunk:
+        if changes is not None:
+            document_paths.extend(path for path in manifest.paths()
+                                  if path not in document_paths and os.path.exists(path))
+    manifest.chunker = chunker.signature
+    manifest.corpora = corpora
+    manifest.text_in_metadata = text_in_metadata
+    changed = {}
+    for path in document_paths:
+        stat = os.stat(path)
+        if not (full or rechunk) and manifest.matches_stat(path, stat):
+            continue
+        sha256 = file_sha256(path)
+        if not (full or rechunk) and manifest.matches_hash(path, sha256):
+            manifest.touch(path, stat)
+            continue
+        changed[path] = (stat, sha256)
+
+    # Documents that were deleted from disk take their vectors with them
+    if changes is not None:
+        removed = [path for path in changes.get("removed", []) if not os.path.exists(path)]
+    else:
+        present = set(document_paths)
+        removed = [path for path in manifest.paths() if path not in present]
+    for path in removed:
+        if path in manifest.documents and is_under(path, pdf_directories):
+            logger.info(f"Document removed: {path}")
+            stale_ids.extend(manifest.remove(path))
 
+    logger.info(
+        f"{len(changed)} new or changed documents, "
+        f"{len(document_paths) - len(changed)} unchanged"
+    )
+
+    try:
+        for path, text in iter_extracted(list(changed), extract_workers):
             if not text:
                 logger.warning(f"No text extracted from {path}, skipping...")
+                stale_ids.extend(manifest.remove(path))
                 continue
 
             # Chunk text
-            chunks = chunk_text(text)
-            logger.info(f"Created {len(chunks)} chunks from {path}")
-
-            # Create embeddings and store in Pinecone
+            chunks = chunker.chunk(text)
+            corpus = corpus_for_path(path, CORPORA)
+            previous_chunks = manifest.chunks(path)
+            previous_positions = manifest.positions(path)
+            current_chunks = {}
+            positions = {}
+            stored_texts = []
+            new_chunks = 0
             for i, chunk in enumerate(chunks):
-                try:
-                    embedding = model.encode(chunk).tolist()
+                chunk_hash = text_sha256(chunk)
+                doc_id = chunk_id(path, chunk_hash)
+                if doc_id in current_chunks:
+                    continue  # repeated text within the same file
+                current_chunks[doc_id] = chunk_hash
+                positions[doc_id] = i
+                stored_texts.append((doc_id, path, i, chunk))
+                if doc_id in previous_chunks and previous_positions.get(doc_id) == i and not full:
+                    continue  # unchanged chunk in the same place, already stored
+
+                new_chunks += 1
+                metadata = {
+                    "source": path,
+                    "chunk_index": i,
+                    "corpus": corpus,
+                }
+                if chunk_store is None:
+                    metadata["chunk_text"] = chunk
+                pending.append((doc_id, chunk, metadata))
+
+            # Text goes in before its vector is upserted, so a search never
+            # finds a vector without text
+            if chunk_store is not None:
+                chunk_store.put_many(stored_texts)
+            if lexical_index is not None:
+                lexical_index.add((doc_id, chunk, corpus) for doc_id, _, _, chunk in stored_texts)
 
-                    metadata = {
-                        "source": path,
-                        "chunk_index": i,
-                        "chunk_text": chunk  # ✅ Added actual chunk text
-                    }
-                    doc_id = f"{os.path.basename(path)}_{i}"
+            replaced[path] = {
+                doc_id: chunk_hash for doc_id, chunk_hash in previous_chunks.items()
+                if doc_id not in current_chunks
+            }
+            # Before the manifest existed chunks were stored as <basename>_<i>; a
+            # file's first run with one replaces those like any other stale chunk
+            if path not in manifest.documents:
+                replaced[path].update((doc_id, None) for doc_id in legacy_chunk_ids(path, text))
+            stat, sha256 = changed[path]
+            manifest.update(path, stat, sha256, current_chunks, positions)
+            logger.info(f"Created {len(chunks)} chunks from {path} ({new_chunks} to embed)")
 
-                    index.upsert([(doc_id, embedding, metadata)])
-                    logger.info(f"Upserted chunk {i} for document {path}")
+            # Create embeddings and store them once a full batch is ready
+            if len(pending) >= upsert_batch_size:
+                embed_and_upsert(pending, upserter, embed_batch_size, upsert_batch_size)
+                pending = []
 
-                except Exception as e:
-                    logger.error(f"Error storing chunk {i} from {path}: {str(e)}")
+        embed_and_upsert(pending, upserter, embed_batch_size, upsert_batch_size)
+    finally:
+        upserter.close()
 
-            logger.info(f"Finished processing {path}")
+    # A file with chunks that failed to upsert is retried by the next run, and
+    # keeps the vectors its new chunks replace so it stays searchable until then
+    for path, replaced_chunks in replaced.items():
+        if manifest.chunks(path).keys() & upserter.failed_ids:
+            logger.warning(f"Some chunks of {path} failed to store, it will be retried on the next run")
+            manifest.mark_incomplete(path, upserter.failed_ids, replaced_chunks)
+        else:
+            stale_ids.extend(replaced_chunks)
+
+    if stale_ids:
+        logger.info(f"Deleting {len(stale_ids)} stale chunks")
+        delete_vectors(stale_ids, upsert_batch_size)
+        if chunk_store is not None:
+            chunk_store.delete(stale_ids)
+        if lexical_index is not None:
+            lexical_index.delete(stale_ids)
+
+    index.save()
+    if lexical_index is not None:
+        lexical_index.save()
+    manifest.save()
+    logger.info(
+        f"Stored {progress.chunks} chunks in total "
+        f"({progress.chunks_per_second():.1f} chunks/s)"
+    )
+
+    if progress.chunks or stale_ids or rechunk:
+        # Let running servers know their cached answers are stale
+        version = bump_index_version(config["vector_store"].get("version_file", DEFAULT_VERSION_FILE))
+        logger.info(f"Index version bumped to {version}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Embed documents into the vector store")
+    parser.add_argument("--full", action="store_true",
+                        help="Ignore the manifest and re-embed every document")
+    parser.add_argument("--changes", metavar="PATH",
+                        help="Only process the files listed in a scraper change list "
+                             "(e.g. docs/angelone/changes.json)")
+    args = parser.parse_args()
+
     # Define directories to process
     pdf_directories = [
         "docs/insurance",
@@ -143,5 +455,10 @@ if __name__ == "__main__":
         "docs/angelone"
     ]
     
-    process_documents(pdf_directories)
+    changes = None
+    if args.changes:
+        with open(args.changes, "r", encoding="utf-8") as f:
+            changes = json.load(f)
+
+    process_documents(pdf_directories, full=args.full, changes=changes)
     logger.info("Document processing completed!")
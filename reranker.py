@@ -0,0 +1,45 @@
+import time
+from typing import List, Optional, Tuple
+
+DEFAULT_RERANKER_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+
+class CrossEncoderReranker:
+    """Re-score first-stage candidates with a cross-encoder and keep the best k.
+
+    Up to ``max_candidates`` candidates are scored in retrieval order,
+    ``batch_size`` (query, passage) pairs per forward pass, until all are
+    scored or ``time_budget_ms`` has been spent. Candidates left unscored keep
+    their first-stage order behind the scored ones, so a slow batch degrades
+    to plain retrieval instead of holding up the request. Candidates past
+    ``max_candidates`` are treated the same way.
+    """
+
+    def __init__(self, model_name: str = DEFAULT_RERANKER_MODEL, max_candidates: int = 20,
+                 batch_size: int = 16, time_budget_ms: Optional[float] = 150.0, max_length: int = 256):
+        from sentence_transformers import CrossEncoder
+
+        self.model_name = model_name
+        self.max_candidates = max_candidates
+        self.batch_size = batch_size
+        self.time_budget = time_budget_ms / 1000 if time_budget_ms else None
+        self.model = CrossEncoder(model_name, max_length=max_length)
+
+    def rerank(self, query: str, passages: List[str], k: int) -> List[Tuple[int, Optional[float]]]:
+        """Return ``(position, score)`` for the best ``k`` of ``passages``, best first.
+
+        ``score`` is None for candidates the budget did not reach.
+        """
+        candidates = passages[:self.max_candidates]
+        deadline = time.perf_counter() + self.time_budget if self.time_budget else None
+        scores = []
+        for start in range(0, len(candidates), self.batch_size):
+            if deadline is not None and scores and time.perf_counter() >= deadline:
+                break
+            batch = candidates[start:start + self.batch_size]
+            scores.extend(float(score) for score in self.model.predict([(query, passage) for passage in batch]))
+
+        scored = sorted(enumerate(scores), key=lambda item: item[1], reverse=True)
+        # Past the budget or max_candidates, the rest keep retrieval order so k can still be filled
+        unscored = [(position, None) for position in range(len(scores), len(passages))]
+        return (scored + unscored)[:k]
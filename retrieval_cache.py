@@ -0,0 +1,95 @@
+import json
+import re
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+_SPACE = re.compile(r"\s+")
+
+
+def normalize_query(text: str) -> str:
+    """Case-fold, collapse whitespace and drop trailing punctuation, so trivially
+    different spellings of a question share a cache entry."""
+    return _SPACE.sub(" ", text.casefold()).strip().rstrip("?!. ")
+
+
+class RetrievalCache:
+    """LRU cache of retrieval results, bounded by the bytes they occupy.
+
+    Values are JSON-serialisable lists (the ranked documents for a query);
+    they are stored serialised, which both fixes their size and hands every
+    hit a fresh copy that callers may mutate. Least-recently-used entries are
+    evicted once the stored values exceed ``max_bytes``. Like the answer
+    cache, everything is dropped when the index version passed to
+    ``lookup``/``store`` changes.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> serialised value, oldest first
+        self._bytes = 0
+        self._version = None
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_version(self, version):
+        if version != self._version:
+            if self._entries:
+                self._clear()
+                self.invalidations += 1
+            self._version = version
+
+    def _clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def lookup(self, key: Hashable, version=None) -> Optional[list]:
+        with self._lock:
+            self._check_version(version)
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return json.loads(data)
+
+    def store(self, key: Hashable, value: list, version=None):
+        data = json.dumps(value).encode("utf-8")
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            self._check_version(version)
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            while self._entries and self._bytes + len(data) > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+            self._entries[key] = data
+            self._bytes += len(data)
+
+    def invalidate(self):
+        with self._lock:
+            self._clear()
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "index_version": self._version,
+            }
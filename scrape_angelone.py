@@ -1,32 +1,107 @@
-import requests
+import argparse
+import asyncio
+import hashlib
+import json
+from collections import defaultdict
+import httpx
 from bs4 import BeautifulSoup
 import os
-from urllib.parse import urljoin
-import time
+from urllib.parse import urljoin, urldefrag, urlparse
 import logging
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+
+class HostRateLimiter:
+    """Space requests to the same host at least ``1 / requests_per_second`` apart."""
+
+    def __init__(self, requests_per_second: float = 2.0):
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self._next_slot = defaultdict(float)
+        self._locks = defaultdict(asyncio.Lock)
+
+    async def wait(self, url: str):
+        host = urlparse(url).netloc
+        async with self._locks[host]:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            slot = max(now, self._next_slot[host])
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
 class AngelOneScraper:
-    def __init__(self, base_url="https://www.angelone.in/support"):
+    """Breadth-first crawler for the AngelOne support pages.
+
+    A pool of ``workers`` coroutines pulls URLs from an explicit frontier queue
+    and shares one keep-alive HTTP client; a per-host rate limiter replaces the
+    old one-second sleep. The visited set, frontier and changes found so far
+    are written to ``state_path`` every ``checkpoint_every`` pages and when the
+    crawl stops, so an interrupted crawl picks up where it left off. The state
+    file is removed once the frontier is exhausted.
+
+    Per-URL validators (ETag/Last-Modified), the extracted text's hash and the
+    page's links are kept in ``pages_path`` across crawls. Pages are fetched
+    conditionally; a 304 or an unchanged hash leaves the saved file untouched.
+    Every crawl writes ``changes_path`` listing the saved files that were
+    added, modified or removed, for ``process_documents.py --changes``.
+    """
+
+    def __init__(self, base_url="https://www.angelone.in/support", output_dir="docs/angelone",
+                 state_path=None, workers=8, requests_per_second=2.0, timeout=30.0,
+                 checkpoint_every=50):
         self.base_url = base_url
         self.visited_urls = set()
-        self.output_dir = "docs/angelone"
-        
+        self.output_dir = output_dir
+        self.state_path = state_path or os.path.join(output_dir, ".crawl_state.json")
+        self.workers = workers
+        self.rate_limiter = HostRateLimiter(requests_per_second)
+        self.timeout = timeout
+        self.checkpoint_every = checkpoint_every
+        self.pages_path = os.path.join(output_dir, ".pages.json")
+        self.changes_path = os.path.join(output_dir, "changes.json")
+        self.pages = {}
+        self.changes = {"added": [], "modified": [], "removed": [], "unchanged": []}
+
+        self._seen = set()  # visited plus everything ever queued
+        self._queue = None
+        self._pages_since_checkpoint = 0
+
         # Create output directory if it doesn't exist
         os.makedirs(self.output_dir, exist_ok=True)
 
-    def get_page_content(self, url):
-        """Fetch and parse a webpage."""
+    @staticmethod
+    def normalize_url(url):
+        return urldefrag(url)[0]
+
+    def should_follow(self, url):
+        # Only follow links within the support section
+        return url.startswith(self.base_url)
+
+    async def get_page_content(self, client, url):
+        """Fetch a webpage, conditionally if we have validators from an earlier crawl.
+
+        Returns the response for 200, 304, 404 and 410, or None on any other error.
+        """
+        record = self.pages.get(url, {})
+        headers = {}
+        if record.get("etag"):
+            headers["If-None-Match"] = record["etag"]
+        if record.get("last_modified"):
+            headers["If-Modified-Since"] = record["last_modified"]
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            return response.text
+            await self.rate_limiter.wait(url)
+            response = await client.get(url, headers=headers)
+            if response.status_code not in (304, 404, 410):
+                response.raise_for_status()
+            return response
         except Exception as e:
             logger.error(f"Error fetching {url}: {str(e)}")
             return None
@@ -36,69 +111,219 @@ class AngelOneScraper:
         # Remove script and style elements
         for script in soup(["script", "style"]):
             script.decompose()
-        
+
+        # Mark headings Markdown-style so the heading-aware chunker can split on them
+        for heading in soup.find_all(["h1", "h2", "h3", "h4", "h5", "h6"]):
+            title = heading.get_text(" ", strip=True)
+            heading.string = f"{'#' * int(heading.name[1])} {title}" if title else ""
+
         # Get text content
         text = soup.get_text(separator='\n', strip=True)
-        
+
         # Clean up text
         lines = (line.strip() for line in text.splitlines())
         chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
         text = '\n'.join(chunk for chunk in chunks if chunk)
-        
+
         return text
 
-    def save_content(self, url, content):
-        """Save the extracted content to a file."""
+    def content_path(self, url):
         # Create a filename from the URL
         filename = url.replace(self.base_url, "").replace("/", "_").strip("_")
         if not filename:
             filename = "home"
         filename = f"{filename}.txt"
-        
-        filepath = os.path.join(self.output_dir, filename)
-        
+
+        return os.path.join(self.output_dir, filename)
+
+    def save_content(self, url, content):
+        """Save the extracted content to a file."""
+        filepath = self.content_path(url)
+
         with open(filepath, 'w', encoding='utf-8') as f:
             f.write(f"Source URL: {url}\n\n")
             f.write(content)
-        
+
         logger.info(f"Saved content from {url} to {filepath}")
+        return filepath
 
-    def scrape_page(self, url):
-        """Scrape a single page and its linked pages."""
-        if url in self.visited_urls:
-            return
-        
-        self.visited_urls.add(url)
-        logger.info(f"Scraping: {url}")
-        
-        # Get page content
-        content = self.get_page_content(url)
-        if not content:
-            return
-        
-        # Parse the page
+    def process_page(self, url, content, previous_hash=None):
+        """Parse a fetched page and save its text if it changed.
+
+        Returns ``(links, content_hash, saved)``.
+        """
         soup = BeautifulSoup(content, 'html.parser')
-        
+        links = [self.normalize_url(urljoin(url, link['href'])) for link in soup.find_all('a', href=True)]
+
         # Extract and save the main content
         text_content = self.extract_text(soup)
-        self.save_content(url, text_content)
-        
-        # Find and follow links
-        for link in soup.find_all('a', href=True):
-            href = link['href']
-            full_url = urljoin(url, href)
-            
-            # Only follow links within the support section
-            if full_url.startswith(self.base_url) and full_url not in self.visited_urls:
-                time.sleep(1)  # Be nice to the server
-                self.scrape_page(full_url)
-
-    def start_scraping(self):
+        content_hash = hashlib.sha256(text_content.encode("utf-8")).hexdigest()
+        saved = content_hash != previous_hash or not os.path.exists(self.content_path(url))
+        if saved:
+            self.save_content(url, text_content)
+        return links, content_hash, saved
+
+    def remove_page(self, url):
+        record = self.pages.pop(url, None)
+        filepath = record["file"] if record else self.content_path(url)
+        if os.path.exists(filepath):
+            os.remove(filepath)
+            self.changes["removed"].append(filepath)
+            logger.info(f"Removed {filepath}: {url} is gone")
+
+    def enqueue(self, url):
+        if url not in self._seen and self.should_follow(url):
+            self._seen.add(url)
+            self._queue.put_nowait(url)
+
+    def load_state(self, resume=True):
+        """Return the saved frontier, restoring the visited set, or None if there is no saved crawl.
+
+        Changes found before the interruption are carried over even when not
+        resuming: ``.pages.json`` already holds their new hashes, so no later
+        crawl would report them again.
+        """
+        if not os.path.exists(self.state_path):
+            return None
+        with open(self.state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        for key, paths in state.get("changes", {}).items():
+            self.changes[key].extend(paths)
+        if not resume:
+            return None
+        self.visited_urls = set(state["visited"])
+        logger.info(f"Resuming crawl: {len(self.visited_urls)} visited, {len(state['frontier'])} queued")
+        return state["frontier"]
+
+    @staticmethod
+    def write_json(path, data):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=1)
+        os.replace(tmp_path, path)
+
+    def load_pages(self):
+        if os.path.exists(self.pages_path):
+            with open(self.pages_path, 'r', encoding='utf-8') as f:
+                self.pages = json.load(f)
+
+    def save_state(self):
+        frontier = sorted(self._seen - self.visited_urls)
+        self.write_json(self.state_path, {"visited": sorted(self.visited_urls), "frontier": frontier,
+                                          "changes": self.changes})
+        self.write_json(self.pages_path, self.pages)
+        self._pages_since_checkpoint = 0
+
+    def write_changes(self):
+        changes = {key: sorted(set(paths)) for key, paths in self.changes.items()}
+        # A page saved before an interruption and seen again after it is still changed
+        changed = set(changes["added"]) | set(changes["modified"])
+        changes["unchanged"] = [path for path in changes["unchanged"] if path not in changed]
+        self.write_json(self.changes_path, changes)
+        logger.info(
+            f"Changes: {len(changes['added'])} added, {len(changes['modified'])} modified, "
+            f"{len(changes['removed'])} removed, {len(changes['unchanged'])} unchanged"
+        )
+
+    async def scrape_page(self, client, url):
+        """Scrape a single page and queue the support pages it links to."""
+        logger.info(f"Scraping: {url}")
+
+        # Get page content
+        response = await self.get_page_content(client, url)
+        record = self.pages.get(url)
+        links = []
+        if response is None:
+            pass
+        elif response.status_code in (404, 410):
+            self.remove_page(url)
+        elif response.status_code == 304 and record:
+            links = record["links"]
+            self.changes["unchanged"].append(record["file"])
+        else:
+            # Parsing is CPU-bound, keep it off the event loop
+            previous_hash = record["content_hash"] if record else None
+            links, content_hash, saved = await asyncio.to_thread(self.process_page, url, response.text, previous_hash)
+            filepath = self.content_path(url)
+            if not saved:
+                self.changes["unchanged"].append(filepath)
+            elif record:
+                self.changes["modified"].append(filepath)
+            else:
+                self.changes["added"].append(filepath)
+            self.pages[url] = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "content_hash": content_hash,
+                "file": filepath,
+                "links": links,
+            }
+
+        for link in links:
+            self.enqueue(link)
+
+        self.visited_urls.add(url)
+        self._pages_since_checkpoint += 1
+        if self._pages_since_checkpoint >= self.checkpoint_every:
+            self.save_state()
+
+    async def _worker(self, client):
+        while True:
+            url = await self._queue.get()
+            try:
+                await self.scrape_page(client, url)
+            except Exception as e:
+                logger.error(f"Error scraping {url}: {str(e)}")
+                self.visited_urls.add(url)
+            finally:
+                self._queue.task_done()
+
+    async def crawl(self, resume=True):
+        """Crawl from the base URL (or a saved frontier) until no pages are left."""
+        self._queue = asyncio.Queue()
+        self.load_pages()
+        frontier = self.load_state(resume)
+        self._seen = set(self.visited_urls)
+        for url in frontier if frontier is not None else [self.base_url]:
+            self.enqueue(url)
+
+        limits = httpx.Limits(max_connections=self.workers, max_keepalive_connections=self.workers)
+        async with httpx.AsyncClient(headers=HEADERS, timeout=self.timeout, limits=limits,
+                                     follow_redirects=True) as client:
+            workers = [asyncio.create_task(self._worker(client)) for _ in range(self.workers)]
+            try:
+                await self._queue.join()
+            finally:
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+                if self._queue.empty() and not (self._seen - self.visited_urls):
+                    self.write_json(self.pages_path, self.pages)
+                    if os.path.exists(self.state_path):
+                        os.remove(self.state_path)
+                else:
+                    # Interrupted: keep what we have so the next run can resume
+                    self.save_state()
+                self.write_changes()
+
+    def start_scraping(self, resume=True):
         """Start the scraping process from the base URL."""
         logger.info("Starting scraping process...")
-        self.scrape_page(self.base_url)
-        logger.info("Scraping completed!")
+        asyncio.run(self.crawl(resume=resume))
+        logger.info(f"Scraping completed! Visited {len(self.visited_urls)} pages.")
 
 if __name__ == "__main__":
-    scraper = AngelOneScraper()
-    scraper.start_scraping() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Crawl the AngelOne support pages into docs/angelone")
+    parser.add_argument("--base-url", default="https://www.angelone.in/support")
+    parser.add_argument("--output-dir", default="docs/angelone")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=2.0, help="Requests per second per host")
+    parser.add_argument("--fresh", action="store_true", help="Ignore any saved crawl state")
+    args = parser.parse_args()
+
+    scraper = AngelOneScraper(args.base_url, args.output_dir, workers=args.workers,
+                              requests_per_second=args.rate)
+    try:
+        scraper.start_scraping(resume=not args.fresh)
+    except KeyboardInterrupt:
+        logger.info(f"Crawl interrupted; state saved to {scraper.state_path}")
@@ -0,0 +1,121 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+import numpy as np
+
+
+class SemanticCache:
+    """Bounded answer cache keyed on query embeddings.
+
+    A lookup hits when a stored entry with the same ``key`` (e.g. ``k``) has a
+    cosine similarity of at least ``similarity_threshold`` with the query.
+    Entries are evicted least-recently-used once ``max_entries`` is reached and
+    expire after ``ttl_seconds``. The whole cache is dropped whenever the index
+    version passed to ``lookup``/``store`` changes.
+    """
+
+    def __init__(self, max_entries: int = 1000, similarity_threshold: float = 0.95,
+                 ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+
+        self._embeddings: Optional[np.ndarray] = None  # (max_entries, dim), allocated on first store
+        self._active = np.zeros(max_entries, dtype=bool)
+        self._entries = OrderedDict()  # slot -> (key, answer, created_at), oldest first
+        self._free_slots = list(range(max_entries - 1, -1, -1))
+        self._version = None
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _check_version(self, version):
+        if version != self._version:
+            if self._entries:
+                self._clear()
+                self.invalidations += 1
+            self._version = version
+
+    def _clear(self):
+        self._entries.clear()
+        self._active[:] = False
+        self._free_slots = list(range(self.max_entries - 1, -1, -1))
+
+    def _release(self, slot: int):
+        del self._entries[slot]
+        self._active[slot] = False
+        self._free_slots.append(slot)
+
+    def lookup(self, embedding, key: Hashable, version=None) -> Optional[str]:
+        with self._lock:
+            self._check_version(version)
+            if not self._entries:
+                self.misses += 1
+                return None
+
+            similarities = self._embeddings @ self._normalize(embedding)
+            similarities[~self._active] = -1.0
+            now = time.monotonic()
+            for slot in np.argsort(-similarities):
+                slot = int(slot)
+                if similarities[slot] < self.similarity_threshold:
+                    break
+                entry_key, answer, created_at = self._entries[slot]
+                if now - created_at > self.ttl_seconds:
+                    self._release(slot)
+                    continue
+                if entry_key != key:
+                    continue
+                self._entries.move_to_end(slot)
+                self.hits += 1
+                return answer
+
+            self.misses += 1
+            return None
+
+    def store(self, embedding, key: Hashable, answer: str, version=None):
+        vector = self._normalize(embedding)
+        with self._lock:
+            self._check_version(version)
+            if self._embeddings is None:
+                self._embeddings = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+
+            if not self._free_slots:
+                oldest_slot = next(iter(self._entries))
+                self._release(oldest_slot)
+                self.evictions += 1
+
+            slot = self._free_slots.pop()
+            self._embeddings[slot] = vector
+            self._active[slot] = True
+            self._entries[slot] = (key, answer, time.monotonic())
+
+    def invalidate(self):
+        with self._lock:
+            self._clear()
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "index_version": self._version,
+            }
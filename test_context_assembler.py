@@ -0,0 +1,67 @@
+from context_assembler import ContextAssembler, merge_overlapping
+
+FIRST = "Claims are settled within thirty days of receiving the claim form."
+SECOND = "receiving the claim form. Delays beyond that earn interest at the bank rate."
+OTHER = "Brokerage is charged per executed order on delivery and intraday trades."
+
+
+def test_merge_overlapping_drops_the_shared_text():
+    assert merge_overlapping(FIRST, SECOND) == (
+        "Claims are settled within thirty days of receiving the claim form. "
+        "Delays beyond that earn interest at the bank rate."
+    )
+    # No overlap: the chunks are joined on a new line
+    assert merge_overlapping(FIRST, OTHER) == f"{FIRST}\n{OTHER}"
+
+
+def test_neighbouring_chunks_merge_at_their_best_rank():
+    passages = [
+        (OTHER, {"source": "fees.txt", "chunk_index": 0}),
+        (SECOND, {"source": "claims.txt", "chunk_index": 4.0}),
+        (FIRST, {"source": "claims.txt", "chunk_index": 3}),
+    ]
+    context, stats = ContextAssembler(max_tokens=1000).assemble(passages)
+    assert context == f"{OTHER}\n\n{merge_overlapping(FIRST, SECOND)}"
+    assert stats["merged"] == 1
+
+
+def test_chunks_sharing_an_index_are_both_kept():
+    passages = [
+        (FIRST, {"source": "claims.txt", "chunk_index": 3}),
+        (OTHER, {"source": "claims.txt", "chunk_index": 3}),
+        (FIRST, {"source": "claims.txt", "chunk_index": 3}),
+    ]
+    context, stats = ContextAssembler(max_tokens=1000).assemble(passages)
+    assert context == f"{FIRST}\n\n{OTHER}"
+    assert stats["merged"] == 1
+
+
+def test_near_duplicates_are_dropped():
+    passages = [(FIRST, {}), (FIRST.replace("thirty", "30"), {}), (OTHER, None)]
+    context, stats = ContextAssembler(max_tokens=1000, duplicate_threshold=0.6).assemble(passages)
+    assert context == f"{FIRST}\n\n{OTHER}"
+    assert stats["duplicates"] == 1
+
+
+def test_context_is_cut_to_the_token_budget():
+    long_passage = " ".join(f"Sentence number {i} is here." for i in range(20))
+    assembler = ContextAssembler(max_tokens=30, min_partial_tokens=10)
+    context, stats = assembler.assemble([(FIRST, {}), (long_passage, {})])
+
+    assert context.startswith(FIRST)
+    assert stats["tokens_after"] <= 30
+    assert stats["tokens_after"] == sum(assembler.count_tokens(context.split("\n\n")))
+    assert "Sentence number 0 is here." in context and long_passage not in context
+
+    # Too little room left for a useful partial passage: it is skipped
+    context, stats = ContextAssembler(max_tokens=20, min_partial_tokens=10).assemble([(FIRST, {}), (long_passage, {})])
+    assert context == FIRST and stats["dropped"] == 1
+
+
+if __name__ == "__main__":
+    test_merge_overlapping_drops_the_shared_text()
+    test_neighbouring_chunks_merge_at_their_best_rank()
+    test_chunks_sharing_an_index_are_both_kept()
+    test_near_duplicates_are_dropped()
+    test_context_is_cut_to_the_token_budget()
+    print("Context assembler tests passed!")
@@ -0,0 +1,50 @@
+import os
+import tempfile
+
+import numpy as np
+
+from embedding_cache import EmbeddingCache
+
+DIMENSION = 8
+
+
+class CountingEncoder:
+    def __init__(self):
+        self.encoded = []
+
+    def __call__(self, texts, **kwargs):
+        self.encoded.extend(texts)
+        return np.stack([np.full(DIMENSION, len(text), dtype=np.float32) for text in texts])
+
+
+def test_persisted_vectors_are_shared():
+    with tempfile.TemporaryDirectory() as directory:
+        encoder = CountingEncoder()
+        EmbeddingCache(directory, "model", DIMENSION).encode(["a chunk", "another chunk"], encoder)
+
+        reader = EmbeddingCache(directory, "model", DIMENSION)
+        vectors = reader.encode(["another chunk", "a chunk"], encoder)
+        assert encoder.encoded == ["a chunk", "another chunk"]
+        assert vectors[:, 0].tolist() == [13.0, 7.0]
+
+
+def test_unpersisted_vectors_stay_in_a_bounded_memory_cache():
+    with tempfile.TemporaryDirectory() as directory:
+        EmbeddingCache(directory, "model", DIMENSION).encode(["a chunk"], CountingEncoder())
+        cache = EmbeddingCache(directory, "model", DIMENSION, memory_entries=2)
+        size = os.path.getsize(cache.path)
+
+        encoder = CountingEncoder()
+        for query in ["query 1", "query 2", "query 1", "query 3", "a chunk", "query 2"]:
+            cache.encode([query], encoder, persist=False)
+
+        # Chunk vectors are read from the file; queries are evicted least recently used first
+        assert encoder.encoded == ["query 1", "query 2", "query 3", "query 2"]
+        assert os.path.getsize(cache.path) == size
+        assert len(cache) == 1
+
+
+if __name__ == "__main__":
+    test_persisted_vectors_are_shared()
+    test_unpersisted_vectors_stay_in_a_bounded_memory_cache()
+    print("Embedding cache tests passed!")
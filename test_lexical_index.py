@@ -0,0 +1,63 @@
+import math
+import os
+import tempfile
+
+from lexical_index import LexicalIndex, tokenize
+
+CHUNKS = [
+    ("fees", "DP charges are levied when shares are sold from a demat account", "angelone"),
+    ("claims", "Claims are settled within thirty days of the claim form", "insurance"),
+    ("charges", "Brokerage charges and DP-charges for delivery trades", "angelone"),
+]
+
+
+def test_tokenize_splits_punctuation_and_drops_stopwords():
+    assert tokenize("What are the DP-charges?") == ["dp", "charges"]
+
+
+def test_scores_follow_bm25():
+    with tempfile.TemporaryDirectory() as directory:
+        index = LexicalIndex(directory, k1=1.2, b=0.0)
+        index.add(CHUNKS)
+        results = index.search("claim form", 3)
+        assert [match["id"] for match in results] == ["claims"]
+
+        # With b=0 the length normalisation drops out: idf * tf * (k1 + 1) / (tf + k1)
+        idf = math.log(1 + (3 - 1 + 0.5) / (1 + 0.5))
+        assert math.isclose(results[0]["score"], 2 * idf, rel_tol=1e-5)
+        assert [match["id"] for match in index.search("dp charges", 3)] == ["charges", "fees"]
+
+
+def test_corpus_filter_and_delete():
+    with tempfile.TemporaryDirectory() as directory:
+        index = LexicalIndex(directory)
+        index.add(CHUNKS)
+        assert [match["id"] for match in index.search("charges claims", 3, corpora=["insurance"])] == ["claims"]
+
+        index.delete(["charges"])
+        assert [match["id"] for match in index.search("dp charges", 3)] == ["fees"]
+        assert "charges" not in index and len(index) == 2
+
+
+def test_saved_index_is_picked_up_by_readers():
+    with tempfile.TemporaryDirectory() as directory:
+        writer = LexicalIndex(directory)
+        writer.add(CHUNKS[:1])
+        writer.save()
+        reader = LexicalIndex(directory)
+        assert [match["id"] for match in reader.search("demat", 3)] == ["fees"]
+
+        writer.add(CHUNKS[1:])
+        writer.save()
+        os.utime(writer.index_path, (0, 0))  # mtime resolution can hide a quick second save
+        reader.refresh()
+        assert len(reader) == 3
+        assert [match["id"] for match in reader.search("claim", 3, corpora=["insurance"])] == ["claims"]
+
+
+if __name__ == "__main__":
+    test_tokenize_splits_punctuation_and_drops_stopwords()
+    test_scores_follow_bm25()
+    test_corpus_filter_and_delete()
+    test_saved_index_is_picked_up_by_readers()
+    print("Lexical index tests passed!")
@@ -0,0 +1,95 @@
+import os
+import tempfile
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+os.environ.setdefault("HF_API_KEY", "test")
+
+import mcp_server
+from chunk_store import ChunkStore
+from lexical_index import LexicalIndex
+from vector_store import NumpyVectorStore
+
+
+class AxisModel:
+    """Embeds every query onto the first axis."""
+
+    def encode(self, texts, batch_size=32):
+        return np.tile(np.array([1.0, 0.0, 0.0], dtype=np.float32), (len(texts), 1))
+
+
+def setup_retrieval(workdir: str, with_chunk_store: bool = True) -> mcp_server.RetrieverTool:
+    """A vector store holding only chunk "a", a BM25 index holding only chunk "b"."""
+    mcp_server.model = AxisModel()
+    mcp_server.embedding_cache = mcp_server.reranker = mcp_server.retrieval_cache = None
+    mcp_server.corpus_router = None
+    mcp_server.index = NumpyVectorStore(os.path.join(workdir, "index"), 3)
+    mcp_server.index.upsert([("a", [1.0, 0.0, 0.0], {"source": "docs/a.txt", "chunk_index": 0})])
+    mcp_server.lexical_index = LexicalIndex(os.path.join(workdir, "lexical_index"))
+    mcp_server.lexical_index.add([("b", "Demat accounts charge an annual maintenance fee", None)])
+    mcp_server.chunk_store = None
+    if with_chunk_store:
+        mcp_server.chunk_store = ChunkStore(os.path.join(workdir, "chunks.sqlite3"))
+        mcp_server.chunk_store.put_many([
+            ("a", "docs/a.txt", 0, "Accounts are opened online."),
+            ("b", "docs/b.txt", 4, "Demat accounts charge an annual maintenance fee"),
+        ])
+    return mcp_server.RetrieverTool()
+
+
+def test_fusion_weights_ranks_and_keeps_vector_fields():
+    lexical = [{"id": "b", "score": 7.5}, {"id": "a", "score": 2.0}]
+    vector = [{"id": "a", "score": 0.9, "metadata": {"source": "a"}}, {"id": "c", "score": 0.8, "metadata": {}}]
+
+    fused = mcp_server.reciprocal_rank_fusion([lexical, vector], [1.0, 1.0], k=60)
+    assert [match["id"] for match in fused] == ["a", "b", "c"]
+    assert fused[0]["fusion"] == 1 / 62 + 1 / 61
+    assert (fused[0]["score"], fused[0]["metadata"]) == (0.9, {"source": "a"})
+    assert "score" not in fused[1]
+
+    fused = mcp_server.reciprocal_rank_fusion([lexical, vector], [1.0, 0.0], k=60)
+    assert [match["id"] for match in fused] == ["b", "a", "c"]
+
+
+def test_lexical_only_hits_take_their_text_from_the_chunk_store():
+    with tempfile.TemporaryDirectory() as workdir:
+        tool = setup_retrieval(workdir)
+        documents = tool.call("annual maintenance fee", k=2, vector_weight=1.0, lexical_weight=1.0)
+        by_source = {document.metadata["source"]: document for document in documents}
+        assert set(by_source) == {"docs/a.txt", "docs/b.txt"}
+        assert by_source["docs/b.txt"].content == "Demat accounts charge an annual maintenance fee"
+        assert by_source["docs/b.txt"].metadata["chunk_index"] == 4
+
+
+def test_matches_without_text_are_dropped():
+    with tempfile.TemporaryDirectory() as workdir:
+        tool = setup_retrieval(workdir, with_chunk_store=False)
+        documents = tool.call("annual maintenance fee", k=2, vector_weight=1.0, lexical_weight=1.0)
+        assert documents == []
+
+
+def test_auto_chunk_store_follows_the_lexical_index():
+    config = {"chunk_store": {"enabled": "auto"}, "vector_store": {"type": "pinecone"}}
+    assert not mcp_server.chunk_store_enabled(dict(config, lexical_index={"enabled": False}))
+    assert mcp_server.chunk_store_enabled(dict(config, lexical_index={"enabled": True}))
+    assert mcp_server.chunk_store_enabled(dict(config, vector_store={"type": "faiss"}))
+
+
+def test_unknown_corpora_are_rejected():
+    client = TestClient(mcp_server.app)
+    for path, body in [("/chat", {"text": "dp charges", "corpora": ["angelone", "nope"]}),
+                       ("/chat/batch", {"queries": [{"text": "dp charges"}, {"text": "claims", "corpora": ["nope"]}]})]:
+        response = client.post(path, json=body)
+        assert response.status_code == 422
+        assert "nope" in response.text
+    assert mcp_server.Query(text="dp charges", corpora=list(mcp_server.CORPORA)).corpora == list(mcp_server.CORPORA)
+
+
+if __name__ == "__main__":
+    test_fusion_weights_ranks_and_keeps_vector_fields()
+    test_lexical_only_hits_take_their_text_from_the_chunk_store()
+    test_matches_without_text_are_dropped()
+    test_auto_chunk_store_follows_the_lexical_index()
+    test_unknown_corpora_are_rejected()
+    print("Server retrieval tests passed!")
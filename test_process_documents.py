@@ -0,0 +1,175 @@
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+
+import process_documents
+from chunk_store import ChunkStore
+from chunking import CharacterChunker
+from document_manifest import DocumentManifest
+from vector_store import NumpyVectorStore
+
+DIMENSION = 16
+
+
+class HashingModel:
+    """Deterministic stand-in for the sentence transformer."""
+
+    def encode(self, texts, batch_size=32):
+        return np.stack([
+            np.frombuffer(hashlib.sha256(text.encode("utf-8")).digest()[:DIMENSION], dtype=np.uint8)
+            .astype(np.float32) + 1.0
+            for text in texts
+        ])
+
+
+class FlakyVectorStore(NumpyVectorStore):
+    """Local store whose upserts fail while ``failing`` is set."""
+
+    failing = False
+
+    def upsert(self, vectors):
+        if self.failing:
+            raise ConnectionError("upsert failed")
+        super().upsert(vectors)
+
+
+def setup_ingestion(workdir: str) -> FlakyVectorStore:
+    """Point process_documents at a local store and in-memory stand-ins under ``workdir``."""
+    config = dict(process_documents.config)
+    config["vector_store"] = {"version_file": os.path.join(workdir, "index_version")}
+    config["embedding_cache"] = config["chunk_store"] = config["lexical_index"] = {"enabled": False}
+    process_documents.config = config
+    process_documents.index = FlakyVectorStore(os.path.join(workdir, "index"), DIMENSION)
+    process_documents.model = HashingModel()
+    process_documents.chunker = CharacterChunker(100, 0)
+    process_documents.embedding_cache = process_documents.chunk_store = process_documents.lexical_index = None
+    return process_documents.index
+
+
+def ingest(docs_dir: str, workdir: str):
+    process_documents.process_documents([docs_dir], extract_workers=1,
+                                        manifest_path=os.path.join(workdir, "manifest.json"))
+
+
+def write_document(path: str, text: str):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def test_failed_upserts_are_retried():
+    with tempfile.TemporaryDirectory() as workdir:
+        docs_dir = os.path.join(workdir, "docs")
+        os.makedirs(docs_dir)
+        path = os.path.join(docs_dir, "policy.txt")
+        write_document(path, "Claims are settled within thirty days. " * 10)
+        store = setup_ingestion(workdir)
+
+        store.failing = True
+        ingest(docs_dir, workdir)
+        assert len(store) == 0
+        manifest = DocumentManifest(os.path.join(workdir, "manifest.json"))
+        assert not manifest.matches_stat(path, os.stat(path))
+
+        store.failing = False
+        ingest(docs_dir, workdir)
+        manifest = DocumentManifest(os.path.join(workdir, "manifest.json"))
+        assert len(store) == 4
+        assert sorted(store._ids) == sorted(manifest.chunks(path))
+
+
+def test_failed_update_keeps_previous_vectors():
+    with tempfile.TemporaryDirectory() as workdir:
+        docs_dir = os.path.join(workdir, "docs")
+        os.makedirs(docs_dir)
+        path = os.path.join(docs_dir, "policy.txt")
+        write_document(path, "Claims are settled within thirty days. " * 5)
+        store = setup_ingestion(workdir)
+        ingest(docs_dir, workdir)
+        original_ids = set(store._ids)
+
+        write_document(path, "Claims are settled within fifteen days. " * 5)
+        store.failing = True
+        ingest(docs_dir, workdir)
+        # The update failed, so the old chunks are still searchable
+        assert set(store._ids) == original_ids
+
+        store.failing = False
+        ingest(docs_dir, workdir)
+        manifest = DocumentManifest(os.path.join(workdir, "manifest.json"))
+        assert set(store._ids) == set(manifest.chunks(path))
+        assert not set(store._ids) & original_ids
+
+
+def test_first_run_replaces_legacy_ids():
+    with tempfile.TemporaryDirectory() as workdir:
+        docs_dir = os.path.join(workdir, "docs")
+        os.makedirs(docs_dir)
+        path = os.path.join(docs_dir, "policy.txt")
+        write_document(path, "Claims are settled within thirty days. " * 40)
+        store = setup_ingestion(workdir)
+        # What ingestion stored before the manifest: 1000/200 character windows as <basename>_<i>
+        legacy = [(f"policy.txt_{i}", np.ones(DIMENSION).tolist(), {"source": path}) for i in range(2)]
+        store.upsert(legacy + [("other.txt_0", np.ones(DIMENSION).tolist(), {})])
+
+        ingest(docs_dir, workdir)
+        manifest = DocumentManifest(os.path.join(workdir, "manifest.json"))
+        assert set(store._ids) == set(manifest.chunks(path)) | {"other.txt_0"}
+
+
+def test_new_files_replace_legacy_ids_under_an_existing_manifest():
+    with tempfile.TemporaryDirectory() as workdir:
+        docs_dir = os.path.join(workdir, "docs")
+        os.makedirs(docs_dir)
+        write_document(os.path.join(docs_dir, "faq.txt"), "Accounts are opened online. " * 5)
+        store = setup_ingestion(workdir)
+        ingest(docs_dir, workdir)
+
+        # A file stored before the manifest and first seen by a later run
+        path = os.path.join(docs_dir, "policy.txt")
+        write_document(path, "Claims are settled within thirty days. " * 40)
+        store.upsert([(f"policy.txt_{i}", np.ones(DIMENSION).tolist(), {"source": path}) for i in range(2)])
+        ingest(docs_dir, workdir)
+        assert not any(doc_id.startswith("policy.txt_") for doc_id in store._ids)
+
+
+def test_moved_chunks_get_their_new_position():
+    with tempfile.TemporaryDirectory() as workdir:
+        docs_dir = os.path.join(workdir, "docs")
+        os.makedirs(docs_dir)
+        path = os.path.join(docs_dir, "policy.txt")
+        paragraphs = [f"Paragraph {i} of the policy wording. ".ljust(100, ".") for i in range(3)]
+        write_document(path, "".join(paragraphs))
+        store = setup_ingestion(workdir)
+        ingest(docs_dir, workdir)
+
+        write_document(path, "A new opening paragraph. ".ljust(100, ".") + "".join(paragraphs))
+        ingest(docs_dir, workdir)
+        positions = {metadata["chunk_text"]: metadata["chunk_index"] for metadata in store._metadata}
+        assert [positions[paragraph] for paragraph in paragraphs] == [1, 2, 3]
+
+
+def test_chunk_text_returns_to_metadata_without_a_chunk_store():
+    with tempfile.TemporaryDirectory() as workdir:
+        docs_dir = os.path.join(workdir, "docs")
+        os.makedirs(docs_dir)
+        write_document(os.path.join(docs_dir, "policy.txt"), "Claims are settled within thirty days. " * 5)
+        store = setup_ingestion(workdir)
+        process_documents.chunk_store = ChunkStore(os.path.join(workdir, "chunks.sqlite3"))
+        ingest(docs_dir, workdir)
+        assert not any("chunk_text" in metadata for metadata in store._metadata)
+
+        process_documents.chunk_store = None
+        ingest(docs_dir, workdir)
+        assert all(metadata["chunk_text"] for metadata in store._metadata)
+
+
+if __name__ == "__main__":
+    test_failed_upserts_are_retried()
+    test_failed_update_keeps_previous_vectors()
+    test_first_run_replaces_legacy_ids()
+    test_new_files_replace_legacy_ids_under_an_existing_manifest()
+    test_moved_chunks_get_their_new_position()
+    test_chunk_text_returns_to_metadata_without_a_chunk_store()
+    print("Ingestion tests passed!")
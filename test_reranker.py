@@ -0,0 +1,41 @@
+from reranker import CrossEncoderReranker
+
+
+class LengthModel:
+    """Scores a passage by its length, so longer passages rank first."""
+
+    def __init__(self):
+        self.pairs = []
+
+    def predict(self, pairs):
+        self.pairs.extend(pairs)
+        return [len(passage) for _, passage in pairs]
+
+
+def make_reranker(max_candidates: int, batch_size: int = 2) -> CrossEncoderReranker:
+    reranker = CrossEncoderReranker.__new__(CrossEncoderReranker)
+    reranker.model_name = "length"
+    reranker.max_candidates = max_candidates
+    reranker.batch_size = batch_size
+    reranker.time_budget = None
+    reranker.model = LengthModel()
+    return reranker
+
+
+def test_scores_candidates_and_keeps_the_best_k():
+    reranker = make_reranker(max_candidates=4)
+    ranked = reranker.rerank("query", ["a", "aaa", "aa", "aaaa"], 2)
+    assert ranked == [(3, 4.0), (1, 3.0)]
+
+
+def test_k_past_max_candidates_is_filled_in_retrieval_order():
+    reranker = make_reranker(max_candidates=2)
+    ranked = reranker.rerank("query", ["a", "aa", "aaaa", "aaa"], 4)
+    assert ranked == [(1, 2.0), (0, 1.0), (2, None), (3, None)]
+    assert len(reranker.model.pairs) == 2
+
+
+if __name__ == "__main__":
+    test_scores_candidates_and_keeps_the_best_k()
+    test_k_past_max_candidates_is_filled_in_retrieval_order()
+    print("Reranker tests passed!")
@@ -0,0 +1,56 @@
+import json
+
+from retrieval_cache import RetrievalCache, normalize_query
+
+
+def documents(text: str) -> list:
+    return [{"content": text, "metadata": {"source": "docs/a.txt"}, "score": 0.5}]
+
+
+def test_spelling_variants_share_a_key():
+    assert normalize_query("  What are DP   charges?? ") == normalize_query("what are dp charges")
+
+
+def test_hits_return_a_fresh_copy():
+    cache = RetrievalCache()
+    cache.store(("dp charges", 3), documents("DP charges are levied on sale."))
+    hit = cache.lookup(("dp charges", 3))
+    hit[0]["content"] = "changed"
+    assert cache.lookup(("dp charges", 3)) == documents("DP charges are levied on sale.")
+    assert cache.lookup(("dp charges", 5)) is None
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_least_recently_used_entries_are_evicted_by_size():
+    size = len(json.dumps(documents("x" * 100)).encode("utf-8"))
+    cache = RetrievalCache(max_bytes=2 * size)
+    cache.store("first", documents("a" * 100))
+    cache.store("second", documents("b" * 100))
+    cache.lookup("first")
+    cache.store("third", documents("c" * 100))
+
+    assert cache.lookup("second") is None
+    assert cache.lookup("first") is not None and cache.lookup("third") is not None
+    assert cache.stats()["bytes"] == 2 * size and cache.evictions == 1
+
+    # Replacing an entry frees its old size; a value over the bound is not stored
+    cache.store("first", documents("d" * 100))
+    assert cache.stats()["bytes"] == 2 * size
+    cache.store("huge", documents("e" * 3 * size))
+    assert cache.lookup("huge") is None and cache.stats()["entries"] == 2
+
+
+def test_a_new_index_version_empties_the_cache():
+    cache = RetrievalCache()
+    cache.store("query", documents("old text"), version="1")
+    assert cache.lookup("query", version="1") is not None
+    assert cache.lookup("query", version="2") is None
+    assert cache.stats() == dict(cache.stats(), entries=0, bytes=0, invalidations=1, index_version="2")
+
+
+if __name__ == "__main__":
+    test_spelling_variants_share_a_key()
+    test_hits_return_a_fresh_copy()
+    test_least_recently_used_entries_are_evicted_by_size()
+    test_a_new_index_version_empties_the_cache()
+    print("Retrieval cache tests passed!")
@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from scrape_angelone import AngelOneScraper
+
+# A tiny support site: pages link to each other, to themselves with a
+# fragment, and to a page outside /support that must not be crawled
+PAGES = {
+    "/support": '<h1>Support</h1><a href="/support/account">Account</a> <a href="/support/funds#top">Funds</a> <a href="/blog">Blog</a>',
+    "/support/account": '<h1>Account</h1><p>Open an account online.</p><a href="/support">Home</a> <a href="/support/funds">Funds</a>',
+    "/support/funds": '<h1>Funds</h1><p>Add funds with UPI.</p><a href="/support/account">Account</a>',
+    "/blog": "<h1>Blog</h1>",
+}
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    requested = []
+    not_modified = []
+
+    def do_GET(self):
+        FixtureHandler.requested.append(self.path)
+        body = PAGES.get(self.path)
+        if body is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        payload = f"<html><body>{body}</body></html>".encode("utf-8")
+        etag = f'"{hashlib.sha1(payload).hexdigest()}"'
+        if self.headers.get("If-None-Match") == etag:
+            FixtureHandler.not_modified.append(self.path)
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fixture_server():
+    FixtureHandler.requested = []
+    FixtureHandler.not_modified = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/support"
+
+
+def test_crawl_local_site():
+    server, base_url = start_fixture_server()
+    try:
+        with tempfile.TemporaryDirectory() as output_dir:
+            scraper = AngelOneScraper(base_url, output_dir, workers=4, requests_per_second=0)
+            scraper.start_scraping()
+
+            assert scraper.visited_urls == {base_url, f"{base_url}/account", f"{base_url}/funds"}
+            assert sorted(FixtureHandler.requested) == ["/support", "/support/account", "/support/funds"]
+            saved = sorted(name for name in os.listdir(output_dir) if name.endswith(".txt"))
+            assert saved == ["account.txt", "funds.txt", "home.txt"]
+            with open(os.path.join(output_dir, "account.txt"), encoding="utf-8") as f:
+                assert "Open an account online." in f.read()
+            assert not os.path.exists(scraper.state_path)
+    finally:
+        server.shutdown()
+
+
+def test_resume_from_saved_state():
+    server, base_url = start_fixture_server()
+    try:
+        with tempfile.TemporaryDirectory() as output_dir:
+            scraper = AngelOneScraper(base_url, output_dir, workers=2, requests_per_second=0)
+            with open(scraper.state_path, "w", encoding="utf-8") as f:
+                json.dump({"visited": [base_url, f"{base_url}/account"], "frontier": [f"{base_url}/funds"]}, f)
+
+            scraper.start_scraping()
+
+            assert FixtureHandler.requested == ["/support/funds"]
+            assert len(scraper.visited_urls) == 3
+            assert not os.path.exists(scraper.state_path)
+    finally:
+        server.shutdown()
+
+
+def test_resume_keeps_changes_from_before_the_interruption():
+    server, base_url = start_fixture_server()
+    try:
+        with tempfile.TemporaryDirectory() as output_dir:
+            scraper = AngelOneScraper(base_url, output_dir, workers=2, requests_per_second=0)
+            scraper.start_scraping()
+            scraper.write_json(scraper.state_path, {
+                "visited": [base_url, f"{base_url}/account"],
+                "frontier": [f"{base_url}/funds"],
+                "changes": {"added": [os.path.join(output_dir, "home.txt")],
+                            "modified": [os.path.join(output_dir, "account.txt")],
+                            "removed": [], "unchanged": []},
+            })
+
+            AngelOneScraper(base_url, output_dir, workers=2, requests_per_second=0).start_scraping()
+
+            with open(scraper.changes_path, encoding="utf-8") as f:
+                changes = json.load(f)
+            assert changes["added"] == [os.path.join(output_dir, "home.txt")]
+            assert changes["modified"] == [os.path.join(output_dir, "account.txt")]
+            assert changes["unchanged"] == [os.path.join(output_dir, "funds.txt")]
+    finally:
+        server.shutdown()
+
+
+def test_recrawl_only_reports_changed_pages():
+    server, base_url = start_fixture_server()
+    original_pages = dict(PAGES)
+    try:
+        with tempfile.TemporaryDirectory() as output_dir:
+            AngelOneScraper(base_url, output_dir, workers=2, requests_per_second=0).start_scraping()
+            account_path = os.path.join(output_dir, "account.txt")
+            account_mtime = os.stat(account_path).st_mtime_ns
+
+            PAGES["/support/funds"] = '<h1>Funds</h1><p>Add funds with UPI or net banking.</p><a href="/support/new">New</a>'
+            PAGES["/support/account"] = PAGES["/support/account"].replace("<p>", '<p class="lead">')
+            PAGES["/support/new"] = '<h1>New</h1><p>A new page.</p>'
+            FixtureHandler.requested = []
+            scraper = AngelOneScraper(base_url, output_dir, workers=2, requests_per_second=0)
+            scraper.start_scraping()
+
+            # Unchanged pages are answered with 304 and left alone
+            assert FixtureHandler.not_modified == ["/support"]
+            with open(scraper.changes_path, encoding="utf-8") as f:
+                changes = json.load(f)
+            assert changes["added"] == [os.path.join(output_dir, "new.txt")]
+            assert changes["modified"] == [os.path.join(output_dir, "funds.txt")]
+            assert changes["unchanged"] == [account_path, os.path.join(output_dir, "home.txt")]
+            assert changes["removed"] == []
+
+            # Only the markup changed, so account.txt was not rewritten
+            assert os.stat(account_path).st_mtime_ns == account_mtime
+
+            del PAGES["/support/new"]
+            AngelOneScraper(base_url, output_dir, workers=2, requests_per_second=0).start_scraping()
+            with open(scraper.changes_path, encoding="utf-8") as f:
+                changes = json.load(f)
+            assert changes["removed"] == [os.path.join(output_dir, "new.txt")]
+            assert not os.path.exists(os.path.join(output_dir, "new.txt"))
+    finally:
+        PAGES.clear()
+        PAGES.update(original_pages)
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    test_crawl_local_site()
+    test_resume_from_saved_state()
+    test_resume_keeps_changes_from_before_the_interruption()
+    test_recrawl_only_reports_changed_pages()
+    print("Scraper tests passed!")
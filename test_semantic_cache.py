@@ -0,0 +1,53 @@
+import time
+
+import numpy as np
+
+from semantic_cache import SemanticCache
+
+
+def test_similar_queries_hit_only_with_the_same_key():
+    cache = SemanticCache(max_entries=4, similarity_threshold=0.95)
+    cache.store([1.0, 0.0, 0.0], 3, "three chunks", version="1")
+
+    assert cache.lookup([0.99, 0.05, 0.0], 3, version="1") == "three chunks"
+    assert cache.lookup([0.99, 0.05, 0.0], 5, version="1") is None
+    assert cache.lookup([0.0, 1.0, 0.0], 3, version="1") is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = SemanticCache(max_entries=2)
+    vectors = np.eye(3)
+    cache.store(vectors[0], 3, "first")
+    cache.store(vectors[1], 3, "second")
+    assert cache.lookup(vectors[0], 3) == "first"
+
+    cache.store(vectors[2], 3, "third")
+    assert cache.lookup(vectors[1], 3) is None
+    assert cache.lookup(vectors[0], 3) == "first"
+    assert cache.lookup(vectors[2], 3) == "third"
+    assert cache.evictions == 1
+
+
+def test_expired_entries_are_dropped():
+    cache = SemanticCache(ttl_seconds=0.01)
+    cache.store([1.0, 0.0], 3, "answer")
+    time.sleep(0.02)
+    assert cache.lookup([1.0, 0.0], 3) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_a_new_index_version_empties_the_cache():
+    cache = SemanticCache()
+    cache.store([1.0, 0.0], 3, "answer", version="1")
+    assert cache.lookup([1.0, 0.0], 3, version="2") is None
+    assert cache.lookup([1.0, 0.0], 3, version="1") is None
+    assert cache.invalidations == 1
+
+
+if __name__ == "__main__":
+    test_similar_queries_hit_only_with_the_same_key()
+    test_least_recently_used_entries_are_evicted()
+    test_expired_entries_are_dropped()
+    test_a_new_index_version_empties_the_cache()
+    print("Semantic cache tests passed!")
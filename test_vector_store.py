@@ -0,0 +1,62 @@
+import os
+import tempfile
+
+import numpy as np
+
+from faiss_index import INDEX_TYPES
+from vector_store import FaissVectorStore, NumpyVectorStore
+
+DIMENSION = 32
+
+
+def random_vectors(count: int, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).normal(size=(count, DIMENSION)).astype(np.float32)
+
+
+def test_small_corpora_fall_back_to_flat():
+    # Too few vectors to train IVF lists or 256-centroid PQ codebooks
+    for index_type in INDEX_TYPES:
+        for count in (0, 1, 100):
+            with tempfile.TemporaryDirectory() as path:
+                store = FaissVectorStore(path, DIMENSION, build_params={"index_type": index_type, "pq_m": 8})
+                vectors = random_vectors(count)
+                store.upsert([(str(i), vectors[i].tolist(), {}) for i in range(count)])
+                store.save()
+
+                assert os.path.exists(store.index_path) == bool(count)
+                reloaded = FaissVectorStore(path, DIMENSION, build_params={"index_type": index_type, "pq_m": 8})
+                matches = reloaded.query(random_vectors(1, seed=1)[0], 3)
+                assert len(matches) == min(3, count)
+
+
+def test_filtered_queries_search_only_the_partition():
+    vectors = random_vectors(300)
+    corpora = ["insurance" if i % 3 == 0 else "angelone" for i in range(300)]
+    queries = random_vectors(4, seed=2)
+    insurance_filter = {"corpus": {"$in": ["insurance"]}}
+    for store in (NumpyVectorStore(tempfile.mkdtemp(), DIMENSION),
+                  FaissVectorStore(tempfile.mkdtemp(), DIMENSION, build_params={"index_type": "hnsw"})):
+        store.upsert([(str(i), vectors[i].tolist(), {"corpus": corpora[i]}) for i in range(300)])
+
+        results = store.query_many(queries, 5, filter=insurance_filter)
+        normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        rows = np.arange(0, 300, 3)
+        for query, matches in zip(queries, results):
+            exact = rows[np.argsort(-(normalized[rows] @ query))[:5]]
+            assert [match["id"] for match in matches] == [str(i) for i in exact]
+            assert {match["metadata"]["corpus"] for match in matches} == {"insurance"}
+
+        # The partition is built once and kept until the vectors change
+        partition = store._partition(insurance_filter)
+        matches = store.query(queries[0], 200, filter=insurance_filter)
+        assert store._partition(insurance_filter) is partition
+        assert 0 < len(matches) <= 100 and len({match["id"] for match in matches}) == len(matches)
+        store.upsert([("new", queries[0].tolist(), {"corpus": "insurance"})])
+        assert store.query(queries[0], 1, filter=insurance_filter)[0]["id"] == "new"
+        assert store.query(queries[0], 1, filter={"corpus": "other"}) == []
+
+
+if __name__ == "__main__":
+    test_small_corpora_fall_back_to_flat()
+    test_filtered_queries_search_only_the_partition()
+    print("Vector store tests passed!")
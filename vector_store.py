@@ -0,0 +1,423 @@
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from faiss_index import build_index, index_options, set_search_params
+
+VECTOR_STORE_TYPES = ("pinecone", "faiss", "numpy")
+
+logger = logging.getLogger(__name__)
+
+
+def matches_filter(metadata: dict, filter: Optional[dict]) -> bool:
+    """Evaluate the subset of Pinecone's filter syntax the local stores support:
+    ``{field: value}``, ``{field: {"$eq": value}}`` and ``{field: {"$in": [...]}}``,
+    all of which must hold."""
+    for field, condition in (filter or {}).items():
+        value = metadata.get(field)
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        for operator, operand in condition.items():
+            if operator == "$eq":
+                if value != operand:
+                    return False
+            elif operator == "$in":
+                if value not in operand:
+                    return False
+            else:
+                raise ValueError(f"Unsupported filter operator '{operator}'")
+    return True
+
+
+class VectorStore:
+    """Interface shared by the remote and local vector index backends.
+
+    ``query`` returns a list of ``{"id", "score", "metadata"}`` dicts ordered by
+    descending cosine similarity. ``filter`` restricts the search to vectors
+    whose metadata matches, in Pinecone's filter syntax.
+    """
+
+    def upsert(self, vectors: List[Tuple[str, list, dict]]):
+        raise NotImplementedError
+
+    def query(self, vector, top_k: int, include_metadata: bool = True,
+              filter: Optional[dict] = None) -> List[Dict]:
+        raise NotImplementedError
+
+    def query_many(self, vectors, top_k: int, include_metadata: bool = True,
+                   filter: Optional[dict] = None) -> List[List[Dict]]:
+        """``query`` for each of ``vectors``, results in the same order."""
+        return [self.query(vector, top_k, include_metadata, filter) for vector in vectors]
+
+    def delete(self, ids: List[str]):
+        raise NotImplementedError
+
+    def save(self):
+        """Persist pending changes. Remote stores write through, so this is a no-op."""
+
+    def refresh(self):
+        """Pick up changes written by another process. No-op for remote stores."""
+
+
+class PineconeVectorStore(VectorStore):
+    def __init__(self, index_name: str = "documents", dimension: int = 384, metric: str = "cosine",
+                 cloud: str = "aws", region: str = "us-east-1", api_key: Optional[str] = None,
+                 query_concurrency: int = 8):
+        from pinecone import Pinecone, ServerlessSpec
+
+        self.query_concurrency = query_concurrency
+
+        api_key = api_key or os.getenv("PINECONE_API_KEY")
+        if not api_key:
+            raise ValueError("Pinecone API key not found in environment variables")
+
+        pinecone_instance = Pinecone(api_key=api_key)
+
+        # Create an index if it doesn't exist
+        if index_name not in pinecone_instance.list_indexes().names():
+            pinecone_instance.create_index(
+                name=index_name,
+                dimension=dimension,
+                metric=metric,
+                spec=ServerlessSpec(cloud=cloud, region=region)
+            )
+            logger.info(f"Created Pinecone index '{index_name}'")
+        else:
+            logger.info(f"Using existing Pinecone index '{index_name}'")
+
+        self.index = pinecone_instance.Index(index_name)
+
+    def upsert(self, vectors: List[Tuple[str, list, dict]]):
+        self.index.upsert(vectors)
+
+    def query(self, vector, top_k: int, include_metadata: bool = True,
+              filter: Optional[dict] = None) -> List[Dict]:
+        results = self.index.query(
+            vector=np.asarray(vector, dtype=np.float32).tolist(),
+            top_k=top_k,
+            include_metadata=include_metadata,
+            filter=filter
+        )
+        return [
+            {"id": match["id"], "score": match.get("score"), "metadata": match.get("metadata") or {}}
+            for match in results.get("matches", [])
+        ]
+
+    def query_many(self, vectors, top_k: int, include_metadata: bool = True,
+                   filter: Optional[dict] = None) -> List[List[Dict]]:
+        """One request per vector, at most ``query_concurrency`` in flight."""
+        if len(vectors) <= 1:
+            return super().query_many(vectors, top_k, include_metadata, filter)
+        with ThreadPoolExecutor(max_workers=min(self.query_concurrency, len(vectors))) as pool:
+            return list(pool.map(lambda vector: self.query(vector, top_k, include_metadata, filter), vectors))
+
+    def delete(self, ids: List[str]):
+        self.index.delete(ids=ids)
+
+
+class NumpyVectorStore(VectorStore):
+    """In-process exact cosine search over a float32 matrix.
+
+    Vectors are L2-normalised on insert so a dot product is the cosine
+    similarity. The store lives in ``path`` as ``vectors.npy`` plus
+    ``metadata.json`` and is only written to disk on ``save()``.
+    """
+
+    def __init__(self, path: str, dimension: int = 384):
+        self.path = path
+        self.dimension = dimension
+        self._lock = threading.RLock()
+        self._loaded_mtime = None
+        self._load()
+
+    @property
+    def vectors_path(self) -> str:
+        return os.path.join(self.path, "vectors.npy")
+
+    @property
+    def metadata_path(self) -> str:
+        return os.path.join(self.path, "metadata.json")
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _load(self):
+        with self._lock:
+            self._ids: List[str] = []
+            self._metadata: List[dict] = []
+            self._vectors = np.zeros((0, self.dimension), dtype=np.float32)
+            if os.path.exists(self.metadata_path) and os.path.exists(self.vectors_path):
+                with open(self.metadata_path, "r", encoding="utf-8") as f:
+                    stored = json.load(f)
+                self._ids = stored["ids"]
+                self._metadata = stored["metadata"]
+                self._vectors = np.load(self.vectors_path)
+                if len(self._vectors) != len(self._ids):
+                    raise ValueError(f"Local vector store at {self.path} is inconsistent; re-run ingestion")
+                self._loaded_mtime = os.path.getmtime(self.metadata_path)
+            self._positions = {doc_id: i for i, doc_id in enumerate(self._ids)}
+            self._on_change()
+
+    def _on_change(self):
+        """Called whenever the vectors change; subclasses with a derived search structure extend it."""
+        self._partitions: Dict[str, tuple] = {}
+
+    def _partition(self, filter: dict) -> tuple:
+        """``(rows, searcher)`` for the vectors whose metadata matches ``filter``: their
+        positions and a search structure over only them, cached until the next change."""
+        key = json.dumps(filter, sort_keys=True)
+        partition = self._partitions.get(key)
+        if partition is None:
+            rows = np.array([i for i, metadata in enumerate(self._metadata) if matches_filter(metadata, filter)],
+                            dtype=np.int64)
+            partition = (rows, self._build_partition(rows) if len(rows) else None)
+            self._partitions[key] = partition
+        return partition
+
+    def _build_partition(self, rows: np.ndarray):
+        """The partition's own copy of its vectors, so a filtered search scans only them."""
+        return np.ascontiguousarray(self._vectors[rows])
+
+    def _search_partition(self, searcher, queries: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        return self._exact_search(queries, top_k, searcher)
+
+    @staticmethod
+    def _normalize(vectors) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def refresh(self):
+        try:
+            mtime = os.path.getmtime(self.metadata_path)
+        except OSError:
+            return
+        if mtime != self._loaded_mtime:
+            self._load()
+
+    def upsert(self, vectors: List[Tuple[str, list, dict]]):
+        if not vectors:
+            return
+        with self._lock:
+            new_ids, new_metadata, new_rows = [], [], []
+            for doc_id, embedding, metadata in vectors:
+                row = self._normalize(embedding)
+                if doc_id in self._positions:
+                    position = self._positions[doc_id]
+                    self._vectors[position] = row
+                    self._metadata[position] = metadata or {}
+                else:
+                    self._positions[doc_id] = len(self._ids) + len(new_ids)
+                    new_ids.append(doc_id)
+                    new_metadata.append(metadata or {})
+                    new_rows.append(row)
+            if new_rows:
+                self._ids.extend(new_ids)
+                self._metadata.extend(new_metadata)
+                self._vectors = np.vstack([self._vectors, np.stack(new_rows)])
+            self._on_change()
+
+    def delete(self, ids: List[str]):
+        with self._lock:
+            doomed = {self._positions[doc_id] for doc_id in ids if doc_id in self._positions}
+            if not doomed:
+                return
+            keep = [i for i in range(len(self._ids)) if i not in doomed]
+            self._ids = [self._ids[i] for i in keep]
+            self._metadata = [self._metadata[i] for i in keep]
+            self._vectors = self._vectors[keep]
+            self._positions = {doc_id: i for i, doc_id in enumerate(self._ids)}
+            self._on_change()
+
+    def _search(self, query: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        scores = self._vectors @ query
+        if top_k < len(scores):
+            candidates = np.argpartition(-scores, top_k)[:top_k]
+        else:
+            candidates = np.arange(len(scores))
+        order = candidates[np.argsort(-scores[candidates])]
+        return scores[order], order
+
+    def _search_many(self, queries: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """``_search`` for a matrix of queries with one matrix product."""
+        return self._exact_search(queries, top_k)
+
+    def _exact_search(self, queries: np.ndarray, top_k: int,
+                      vectors: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Brute-force top-k for a matrix of queries over ``vectors`` (by default all of them)."""
+        if vectors is None:
+            vectors = self._vectors
+        scores = queries @ vectors.T
+        if top_k < scores.shape[1]:
+            candidates = np.argpartition(-scores, top_k, axis=1)[:, :top_k]
+        else:
+            candidates = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+        candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1)
+        positions = np.take_along_axis(candidates, order, axis=1)
+        return np.take_along_axis(candidate_scores, order, axis=1), positions
+
+    def _matches(self, scores, positions, include_metadata: bool) -> List[Dict]:
+        return [
+            {
+                "id": self._ids[position],
+                "score": float(score),
+                "metadata": self._metadata[position] if include_metadata else {}
+            }
+            for score, position in zip(scores, positions)
+            if position >= 0
+        ]
+
+    def query(self, vector, top_k: int, include_metadata: bool = True,
+              filter: Optional[dict] = None) -> List[Dict]:
+        if filter:
+            return self.query_many([vector], top_k, include_metadata, filter)[0]
+        with self._lock:
+            if not self._ids:
+                return []
+            scores, positions = self._search(self._normalize(vector), top_k)
+            return self._matches(scores, positions, include_metadata)
+
+    def query_many(self, vectors, top_k: int, include_metadata: bool = True,
+                   filter: Optional[dict] = None) -> List[List[Dict]]:
+        """All ``vectors`` in one search. A ``filter`` is applied by searching a
+        structure built over only the matching vectors, kept for later queries
+        with the same filter, so a partition is never searched past its own size."""
+        with self._lock:
+            rows, searcher = self._partition(filter) if filter else (None, None)
+            if not self._ids or not len(vectors) or (rows is not None and not len(rows)):
+                return [[] for _ in vectors]
+            queries = self._normalize(np.stack(vectors))
+            if rows is None:
+                scores, positions = self._search_many(queries, top_k)
+            else:
+                scores, positions = self._search_partition(searcher, queries, top_k)
+                # Partition positions back to store positions; -1 marks a missing result
+                positions = np.where(positions >= 0, rows[np.maximum(positions, 0)], -1)
+            return [self._matches(row_scores, row_positions, include_metadata)
+                    for row_scores, row_positions in zip(scores, positions)]
+
+    def _save_derived(self):
+        """Hook for subclasses to persist their search structure before metadata.json."""
+
+    def save(self):
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+            np.save(self.vectors_path, self._vectors)
+            self._save_derived()
+            # metadata.json is written last; its mtime tells readers to reload
+            tmp_path = f"{self.metadata_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"ids": self._ids, "metadata": self._metadata}, f)
+            os.replace(tmp_path, self.metadata_path)
+            self._loaded_mtime = os.path.getmtime(self.metadata_path)
+
+
+class FaissVectorStore(NumpyVectorStore):
+    """Local store that searches through a FAISS inner-product index.
+
+    The NumPy matrix stays the source of truth; the FAISS index is rebuilt
+    lazily after the vectors change and written to ``index.faiss`` on save.
+    Filtered queries search a separate in-memory index per filter (a corpus,
+    say), built on first use.
+    ``build_params`` choose the index type (see ``faiss_index.build_index``)
+    and ``search_params`` set ``nprobe``/``ef_search`` on whatever index is
+    loaded from disk or built.
+    """
+
+    def __init__(self, path: str, dimension: int = 384, build_params: Optional[dict] = None,
+                 search_params: Optional[dict] = None):
+        try:
+            import faiss
+        except ImportError as e:
+            raise ImportError(
+                "vector_store.type 'faiss' needs the faiss-cpu package; "
+                "install it or use type 'numpy'"
+            ) from e
+        self._faiss = faiss
+        self._index = None
+        self.build_params = build_params or {}
+        self.search_params = search_params or {}
+        super().__init__(path, dimension)
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.path, "index.faiss")
+
+    def _load(self):
+        super()._load()
+        with self._lock:
+            if os.path.exists(self.index_path):
+                index = self._faiss.read_index(self.index_path)
+                if index.ntotal == len(self._ids):
+                    set_search_params(index, **self.search_params)
+                    self._index = index
+
+    def _on_change(self):
+        super()._on_change()
+        self._index = None
+
+    def _get_index(self):
+        if self._index is None:
+            index = build_index(self._vectors.reshape(-1, self.dimension), **self.build_params)
+            set_search_params(index, **self.search_params)
+            self._index = index
+        return self._index
+
+    def _build_partition(self, rows: np.ndarray):
+        """A FAISS index of the configured type over only the partition's vectors."""
+        index = build_index(self._vectors[rows], **self.build_params)
+        set_search_params(index, **self.search_params)
+        return index
+
+    def _search_partition(self, searcher, queries: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        return searcher.search(queries, top_k)
+
+    def rebuild_index(self):
+        """Discard the current FAISS index and build one with ``build_params``."""
+        with self._lock:
+            self._index = None
+            self._get_index()
+
+    def _search(self, query: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        scores, positions = self._get_index().search(query.reshape(1, -1), top_k)
+        return scores[0], positions[0]
+
+    def _search_many(self, queries: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        return self._get_index().search(queries, top_k)
+
+    def _save_derived(self):
+        if not self._ids:
+            # Nothing to index; a leftover index.faiss would describe deleted vectors
+            if os.path.exists(self.index_path):
+                os.remove(self.index_path)
+            return
+        self._faiss.write_index(self._get_index(), self.index_path)
+
+
+def create_vector_store(store_config: dict) -> VectorStore:
+    """Build the backend selected by ``vector_store.type`` in mcp.yaml."""
+    store_type = store_config.get("type", "pinecone")
+    dimension = store_config.get("dimension", 384)
+
+    if store_type == "pinecone":
+        return PineconeVectorStore(
+            index_name=store_config.get("index_name", "documents"),
+            dimension=dimension,
+            metric=store_config.get("metric", "cosine"),
+            cloud=store_config.get("cloud", "aws"),
+            region=store_config.get("region", "us-east-1"),
+            query_concurrency=store_config.get("query_concurrency", 8)
+        )
+    if store_type == "faiss":
+        return FaissVectorStore(store_config["path"], dimension, **index_options(store_config.get("faiss", {})))
+    if store_type == "numpy":
+        return NumpyVectorStore(store_config["path"], dimension)
+
+    raise ValueError(f"Unknown vector store type '{store_type}', expected one of {VECTOR_STORE_TYPES}")